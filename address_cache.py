@@ -0,0 +1,110 @@
+# address_cache.py
+# In-memory cache for scraped address lookups with stale-while-revalidate.
+# Jurisdictions almost never change, so an entry past its TTL is still
+# served at once (marked stale) while one background refresh per address
+# replaces it. Only past the hard expiry does the caller wait for a scrape.
+#
+# ADDRESS_CACHE_TTL       seconds an entry is fresh, default 1 day
+# ADDRESS_CACHE_MAX_AGE   seconds after which a stale entry is not served, default 30 days
+
+import os
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from tracing import trace
+
+ADDRESS_CACHE_TTL = float(os.environ.get("ADDRESS_CACHE_TTL", str(24 * 3600)))
+ADDRESS_CACHE_MAX_AGE = float(os.environ.get("ADDRESS_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+
+FRESH, STALE, EXPIRED, MISS = "fresh", "stale", "expired", "miss"
+
+# Describe one request (backend attempts and timings, cache state), never the address
+PER_REQUEST_FIELDS = ("_attempts", "_cache")
+
+
+class CacheEntry(NamedTuple):
+    value: dict
+    stored: float
+
+
+class AddressCache:
+    """
+    key -> (lookup result, time stored). Thread-safe; refreshes run on
+    their own daemon threads, outside any request's trace. Values go in and
+    come out as copies, so a caller adding fields to its result never
+    changes what later requests are served.
+    """
+
+    def __init__(self, ttl: float = ADDRESS_CACHE_TTL, max_age: float = ADDRESS_CACHE_MAX_AGE, clock=time.time):
+        self.ttl = ttl
+        self.max_age = max(max_age, ttl)
+        self.clock = clock
+        self._entries: Dict[str, CacheEntry] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Tuple[Optional[dict], str, float]:
+        """
+        (value, state, age in seconds). Expired entries come back with
+        value None; they are only replaced once a new lookup succeeds.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, MISS, 0.0
+        age = self.clock() - entry.stored
+        if age <= self.ttl:
+            return dict(entry.value), FRESH, age
+        if age <= self.max_age:
+            return dict(entry.value), STALE, age
+        return None, EXPIRED, age
+
+    def put(self, key: str, value: dict) -> None:
+        value = {k: v for k, v in value.items() if k not in PER_REQUEST_FIELDS}
+        with self._lock:
+            self._entries[key] = CacheEntry(value, self.clock())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def revalidate(self, key: str, refresh: Callable[[], dict]) -> bool:
+        """
+        Start a background refresh of `key` unless one is running. The
+        refresh stores its own result (as an uncached lookup does); a failed
+        one leaves the stale entry in place. False if one was already running.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                with trace("cache.revalidate", key=key) as s:
+                    result = refresh()
+                    s.set(error=result.get("error") if isinstance(result, dict) else None)
+            except Exception:
+                pass  # recorded as the cache.revalidate span's error
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name="address-cache-refresh", daemon=True).start()
+        return True
+
+
+def mark_stale(value: dict, age: float) -> dict:
+    """
+    Copy of a stale cached result, flagged in "_method" and "_cache".
+    """
+    result = dict(value)
+    if result.get("_method"):
+        result["_method"] = f"{result['_method']} (cached, stale)"
+    else:
+        result["_method"] = "Cached (stale)"
+    result["_cache"] = {"state": STALE, "age_s": round(age), "refreshing": True}
+    return result
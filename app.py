@@ -1,10 +1,18 @@
 import re
-import sqlite3
 import streamlit as st
 import pandas as pd
 
-from fuzzywuzzy import fuzz
 import os
+from typing import Optional, Tuple
+
+from estimate_store import CENT, EstimateStore
+from estimator import build_estimate, estimate_for_jurisdiction, resolve_location
+from jurisdictions import JurisdictionStore
+from lookup_jobs import DONE, FAILED, PENDING, LookupRunner
+from millage_index import MillageIndex, MillageSnapshot
+from millage_store import DB_PATH, TABLE_NAME
+from spatial_resolver import SpatialResolver, get_resolver, parse_location
+from tracing import trace
 
 # Use cloud scraper if in cloud environment (Koyeb, Streamlit Cloud, etc.)
 IS_CLOUD = (
@@ -14,34 +22,24 @@ IS_CLOUD = (
 )
 
 if IS_CLOUD:
-    from cloud_scraper import get_township_school_from_address
+    from cloud_scraper import get_backend_status, get_resource_status, get_township_school_from_address
 else:
+    from resource_tracker import resource_status as get_resource_status
     from selenium_scraper import get_township_school_from_address
+    get_backend_status = None
 
-DB_PATH = "all_millage_rates.db"
-TABLE_NAME = "millage"
-
-
-# ----------------- Text cleaning -----------------
-def clean_city_twp(s: str) -> str:
-    s = (s or "").strip().lower()
-    junk = [
-        "city of", "village of", "charter township of", "charter township",
-        "township of", "township", "twp", "city", "village"
-    ]
-    for j in junk:
-        s = s.replace(j, " ")
-    s = re.sub(r"[^a-z0-9\s]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s.title()
 
-
-def clean_school(s: str) -> str:
-    s = (s or "").strip().lower()
-    s = s.replace("&", "and")
-    s = re.sub(r"[^a-z0-9\s]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s.title()
+def show_backend_status(scraped: dict):
+    # Per-backend attempts for this lookup and live circuit breaker state
+    if scraped.get("_attempts"):
+        st.write("**Lookup attempts:**")
+        st.table(pd.DataFrame(scraped["_attempts"]))
+    if get_backend_status:
+        st.write("**Backend health (next lookup tries them in this order):**")
+        st.table(pd.DataFrame(get_backend_status()))
+    # Profile dirs, browser processes and memory - leaks show up here first
+    st.write("**Scraper resources:**")
+    st.json(get_resource_status())
 
 
 # ----------------- Mortgage Coach helpers -----------------
@@ -74,52 +72,44 @@ def money_number_only(x: float) -> str:
 
 
 # ----------------- Load millage data -----------------
-@st.cache_data
-def load_millage_data():
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query(f"SELECT * FROM {TABLE_NAME}", conn)
-    conn.close()
-
-    required = [
-        "Township/City",
-        "School District",
-        "Total Homestead Millage Rate",
-        "Total Non-Homestead Millage Rate",
-    ]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise ValueError(f"DB table is missing columns: {missing}")
-
-    df["Township_Clean"] = df["Township/City"].apply(clean_city_twp)
-    df["School_Clean"] = df["School District"].apply(clean_school)
-    df["Combined_Clean"] = df["Township_Clean"] + " - " + df["School_Clean"]
-
-    df["Combined Key"] = df["Township/City"].astype(str) + " - " + df["School District"].astype(str)
-    return df
-
-
-def find_top_matches(df: pd.DataFrame, township: str, school: str, top_n: int = 8):
-    t = clean_city_twp(township)
-    s = clean_school(school)
-    target = f"{t} - {s}"
-
-    scores = []
-    for _, row in df.iterrows():
-        cand = row["Combined_Clean"]
-        score = fuzz.token_set_ratio(target, cand)
-        scores.append(score)
-
-    out = df.copy()
-    out["Score"] = scores
-    out = out.sort_values("Score", ascending=False).head(top_n).reset_index(drop=True)
-    return target, out
-
-
-def calc_taxes(price: float, millage_rate_mills: float):
-    assessed = price * 0.45
-    annual = assessed * (millage_rate_mills / 1000.0)
-    monthly = annual / 12.0
-    return assessed, annual, monthly
+@st.cache_resource
+def get_millage_index() -> MillageIndex:
+    # Shared across sessions; refresh() swaps in new import generations in place
+    return MillageIndex(DB_PATH, TABLE_NAME)
+
+
+@st.cache_resource
+def get_jurisdictions() -> JurisdictionStore:
+    # Materialized per-jurisdiction rates + address memo, shared across sessions
+    return JurisdictionStore(DB_PATH)
+
+
+@st.cache_resource
+def get_estimates() -> EstimateStore:
+    # Every shown estimate, recomputed in bulk when a rate import lands
+    return EstimateStore(DB_PATH, jurisdictions=get_jurisdictions())
+
+
+@st.cache_resource
+def get_lookup_runner() -> LookupRunner:
+    # Background address lookups, shared across sessions
+    return LookupRunner()
+
+
+@st.cache_resource
+def get_spatial_resolver() -> Tuple[Optional[SpatialResolver], str]:
+    # BOUNDARY_PLACES / BOUNDARY_SCHOOLS indexed once at startup: (None, "") when
+    # not configured; a load error is kept so reruns don't re-read broken files
+    try:
+        return get_resolver(), ""
+    except Exception as e:
+        return None, str(e)
+
+
+def load_millage_data() -> MillageSnapshot:
+    index = get_millage_index()
+    index.refresh()
+    return index.snapshot()
 
 
 # ----------------- UI -----------------
@@ -127,16 +117,26 @@ st.set_page_config(page_title="Michigan Property Tax Estimator", layout="centere
 st.title("🏠 Michigan Property Tax Estimator")
 
 HEADLESS = True
+POLL_SECONDS = 0.5
+MAX_JOBS = 10  # lookups kept per session, newest last
+JOB_ICONS = {PENDING: "⏳", DONE: "✅", FAILED: "⚠️"}
 
 if "last_result" not in st.session_state:
     st.session_state["last_result"] = None
+if "lookup_jobs" not in st.session_state:
+    st.session_state["lookup_jobs"] = []
+    st.session_state["active_job"] = None
 
 try:
-    millage_df = load_millage_data()
+    snapshot = load_millage_data()
 except Exception as e:
     st.error(f"Could not load millage database: {e}")
     st.stop()
 
+resolver, resolver_error = get_spatial_resolver()
+if resolver_error:
+    st.warning(f"Boundary files could not be loaded, coordinates are ignored: {resolver_error}")
+
 st.markdown("### Inputs")
 address = st.text_input(
     "Property Address",
@@ -144,33 +144,121 @@ address = st.text_input(
 )
 price = st.number_input("Property Value ($)", min_value=10000, step=1000, format="%d")
 tax_type = st.radio("Tax Type", ["Homestead", "Non-Homestead"], horizontal=True)
+coordinates = ""
+if resolver is not None:
+    coordinates = st.text_input(
+        "Coordinates (optional)",
+        placeholder="e.g. 42.8847, -85.7239 - looked up in the local boundary files, no scrape",
+    )
+
+recheck = st.checkbox("Re-check jurisdiction (ignore the saved match for this address)")
+
+
+def submit_lookup(addr: str, location: Optional[Tuple[float, float]] = None):
+    # Runs in the background; the new job becomes the one shown below
+    lookup = get_township_school_from_address
+    resolved = resolve_location(resolver, location)
+    if resolved:
+        # The boundary files placed it: the job only matches, no scrape
+        def lookup(_addr, headless=True):
+            return dict(resolved)
+    job = get_lookup_runner().submit(addr, lookup, snapshot, headless=HEADLESS)
+    jobs = st.session_state["lookup_jobs"]
+    jobs.append(job)
+    del jobs[:-MAX_JOBS]
+    st.session_state["active_job"] = job.job_id
+    st.session_state["last_result"] = None
+
+
+def keep_result(result: dict):
+    # Save the estimate unless only the rerun is new (same address, match, price and tax type)
+    prev = st.session_state["last_result"]
+    if prev and all(prev[k] == result[k] for k in ("address", "matched_key", "price", "tax_type")):
+        result["estimate_id"] = prev.get("estimate_id")
+    else:
+        result["estimate_id"] = get_estimates().save(result, source="app")
+    st.session_state["last_result"] = result
+
+
+def find_job(job_id):
+    return next((j for j in st.session_state["lookup_jobs"] if j.job_id == job_id), None)
+
 
 if st.button("Estimate Taxes"):
     if not address.strip() or not price:
         st.warning("Please enter both the address and property value.")
         st.stop()
-
-    # Show progress indicator
-    with st.spinner("🔍 Looking up address information..."):
-        status_placeholder = st.empty()
-        status_placeholder.info("⏳ Starting address lookup...")
-        
-        scraped = get_township_school_from_address(address.strip(), headless=HEADLESS)
-        
-        status_placeholder.empty()
-
-    if isinstance(scraped, dict) and "error" in scraped:
+    try:
+        location = parse_location(coordinates)
+    except ValueError as e:
+        st.warning(f"Coordinates ignored: {e}")
+        location = None
+
+    # One correlation ID for the memo probe and the background lookup + match
+    with trace("estimate", address=address.strip(), tax_type=tax_type):
+        # An address seen before resolves from the memo: no lookup, no matching
+        known = None if recheck else get_jurisdictions().lookup_address(address.strip())
+        if known:
+            jurisdiction, county_raw, score = known
+            st.success("✅ Known address - using its saved jurisdiction (no lookup needed)")
+            st.session_state["active_job"] = None
+            keep_result(estimate_for_jurisdiction(address.strip(), price, tax_type, county_raw, jurisdiction, score))
+        else:
+            submit_lookup(address.strip(), location)
+
+# ----------------- Lookups -----------------
+jobs = st.session_state["lookup_jobs"]
+# Jobs whose completion this run has already drawn
+st.session_state["drawn_done"] = {j.job_id for j in jobs if j.done}
+
+
+@st.fragment(run_every=POLL_SECONDS if any(not j.done for j in jobs) else None)
+def show_lookups():
+    # Redrawn on its own every POLL_SECONDS while a lookup is pending
+    jobs = st.session_state["lookup_jobs"]
+    if not jobs:
+        return
+    st.markdown("### Lookups")
+    for job in reversed(jobs):
+        active = job.job_id == st.session_state["active_job"]
+        text, show = st.columns([5, 1])
+        with text:
+            line = f"{JOB_ICONS[job.state]} **{job.address}** - {job.detail} ({job.elapsed:.1f}s)"
+            if job.county:
+                line += f" · {job.county}"
+            st.write(line)
+            if active and not job.done and len(job.history()) > 1:
+                st.caption(" → ".join(h["detail"] or h["stage"] for h in job.history()))
+        with show:
+            if job.done and not active and st.button("Show", key=f"show_{job.job_id}"):
+                st.session_state["active_job"] = job.job_id
+                st.rerun()
+    # A lookup finished since the page was drawn: redraw all of it
+    if any(j.done and j.job_id not in st.session_state["drawn_done"] for j in jobs):
+        st.rerun()
+
+
+show_lookups()
+
+job = find_job(st.session_state["active_job"])
+if job and job.done:
+    scraped = job.scraped or {}
+    if "error" in scraped:
         st.error(f"⚠️ **Scraper Error**: {scraped['error']}")
-        
+
         # Show debug info
         with st.expander("🔧 Debug Information"):
-            st.write("**Address searched:**", address.strip())
+            st.write("**Address searched:**", job.address)
+            st.write(f"**Trace ID:** `{job.trace_id}`")
             st.write("**Error details:**", scraped['error'])
             st.write("**Environment:**", "Cloud" if IS_CLOUD else "Local")
             if "_debug" in scraped:
                 st.write("**Technical details:**", scraped['_debug'])
+            st.write("**Lookup stages:**")
+            st.table(pd.DataFrame(job.history()))
+            show_backend_status(scraped)
             st.code(str(scraped), language="json")
-        
+
         st.warning("💡 **Troubleshooting Tips:**")
         st.markdown("""
         - Try the address again (sometimes the site needs a moment)
@@ -178,72 +266,81 @@ if st.button("Estimate Taxes"):
         - Try a slightly different address format
         - The system will automatically try multiple lookup methods
         """)
-        
+
         # Show a retry button
-        if st.button("🔄 Try Again"):
+        if st.button("🔄 Try Again", key=f"retry_{job.job_id}"):
+            submit_lookup(job.address)
             st.rerun()
-        st.stop()
+    elif job.top is None:
+        st.error(job.error)
 
-    # Show success message
-    st.success("✅ Address lookup successful!")
-    
-    township_raw = (scraped.get("township") or "").strip()
-    school_raw = (scraped.get("school_district") or scraped.get("school") or "").strip()
-    county_raw = (scraped.get("county") or "").strip()
-
-    # Show what was found
-    with st.expander("🔍 Raw Scraper Results"):
-        st.write(f"**Township:** {township_raw if township_raw else 'Not found'}")
-        st.write(f"**School District:** {school_raw if school_raw else 'Not found'}")
-        st.write(f"**County:** {county_raw if county_raw else 'Not found'}")
-        
-        # Show which method was used
-        if "_method" in scraped:
-            st.info(f"📡 **Lookup method:** {scraped['_method']}")
-        
-        # Show full scraped data for debugging
-        st.write("**Full scraped data:**")
-        st.json(scraped)
-
-    if not township_raw or not school_raw:
-        st.error("Could not extract township and/or school district from that address.")
-        
         # Show debug info
         with st.expander("🔧 Debug Information"):
+            st.write(f"**Trace ID:** `{job.trace_id}`")
             st.write("**Raw scraped data:**")
             st.json(scraped)
-            st.write("**Township found:**", township_raw)
-            st.write("**School found:**", school_raw)
-        st.stop()
-    
-    # Show matching progress
-    st.info("🎯 Finding best millage rate matches...")
-
-    target_key, top = find_top_matches(millage_df, township_raw, school_raw, top_n=8)
-
-    st.subheader("📍 Best matches (pick the correct one)")
-    options = [f"{row['Combined Key']}   (Score: {row['Score']})" for _, row in top.iterrows()]
-    chosen = st.selectbox("Select match", options, index=0)
-
-    row = top.iloc[options.index(chosen)]
-
-    millage_rate = float(row["Total Homestead Millage Rate"]) if tax_type == "Homestead" else float(row["Total Non-Homestead Millage Rate"])
-    assessed, annual, monthly = calc_taxes(price, millage_rate)
-
-    st.session_state["last_result"] = {
-        "address": address.strip(),
-        "price": float(price),
-        "tax_type": tax_type,
-        "county": county_raw,
-        "matched_key": row["Combined Key"],
-        "match_score": int(row["Score"]),
-        "millage_rate": float(millage_rate),
-        "assessed": float(assessed),
-        "annual": float(annual),
-        "monthly": float(monthly),
-    }
+            st.write("**Township found:**", (scraped.get("township") or "").strip())
+            st.write("**School found:**", (scraped.get("school_district") or scraped.get("school") or "").strip())
+    else:
+        # Show success message
+        st.success(f"✅ Address lookup successful! ({job.elapsed:.1f}s)")
+        if scraped.get("_cache", {}).get("state") == "stale":
+            age_h = scraped["_cache"]["age_s"] / 3600
+            st.caption(f"From a cached lookup {age_h:.0f}h old - refreshing it in the background.")
+
+        township_raw = (scraped.get("township") or "").strip()
+        school_raw = (scraped.get("school_district") or scraped.get("school") or "").strip()
+
+        # Show what was found
+        with st.expander("🔍 Raw Scraper Results"):
+            st.write(f"**Township:** {township_raw if township_raw else 'Not found'}")
+            st.write(f"**School District:** {school_raw if school_raw else 'Not found'}")
+            st.write(f"**County:** {job.county if job.county else 'Not found'}")
+
+            # Show which method was used
+            if "_method" in scraped:
+                st.info(f"📡 **Lookup method:** {scraped['_method']}")
+            st.write(f"**Trace ID:** `{job.trace_id}`")
+            st.write("**Lookup stages:**")
+            st.table(pd.DataFrame(job.history()))
+            show_backend_status(scraped)
+
+            # Show full scraped data for debugging
+            st.write("**Full scraped data:**")
+            st.json(scraped)
+
+        st.subheader("📍 Best matches (pick the correct one)")
+        options = job.top.options()
+        chosen = st.selectbox("Select match", options, index=0, key=f"match_{job.job_id}")
+
+        match = job.top[options.index(chosen)]
+
+        keep_result(build_estimate(job.address, price, tax_type, job.county, match))
+        if job.chosen_key != match.combined_key:
+            get_jurisdictions().remember(job.address, match.combined_key, job.county, match.score)
+            job.chosen_key = match.combined_key
 
 # ----------------- Results -----------------
+
+# Same address, new price or tax type: one probe of the jurisdiction table
+r = st.session_state["last_result"]
+if r and r["address"] == address.strip() and (r["price"] != float(price) or r["tax_type"] != tax_type):
+    jurisdiction = get_jurisdictions().get(r["matched_key"])
+    if jurisdiction:
+        keep_result(
+            estimate_for_jurisdiction(r["address"], price, tax_type, r["county"], jurisdiction, r["match_score"])
+        )
+
+# Rates imported since the estimate was made: the import already recomputed the saved copy
+r = st.session_state["last_result"]
+if r and r.get("estimate_id"):
+    saved = get_estimates().get(r["estimate_id"])
+    if saved and abs(saved["annual"] - r["annual"]) >= CENT:
+        st.info(f"Millage rates changed since this estimate (was ${r['annual']:,.2f}/yr) - showing the new rates.")
+        st.session_state["last_result"] = dict(
+            r, millage_rate=saved["millage_rate"], annual=saved["annual"], monthly=saved["monthly"]
+        )
+
 if st.session_state["last_result"]:
     r = st.session_state["last_result"]
 
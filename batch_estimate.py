@@ -0,0 +1,122 @@
+# batch_estimate.py
+# Tax estimates for a CSV of properties (e.g. a CRM export) without the UI.
+# The boundary files are loaded once up front: rows with lat/lon are placed
+# from BOUNDARY_PLACES / BOUNDARY_SCHOOLS with no scrape, and only rows
+# without coordinates, or outside every boundary, go to the address lookup.
+# Addresses seen before come from the address memo, as in the app.
+#
+# Input columns: address, price, tax_type (default Homestead), lat, lon
+#
+# Usage: python batch_estimate.py input.csv [--output estimates.csv] [--db DB]
+#        [--places PLACES --schools SCHOOLS] [--no-lookup] [--save]
+
+import argparse
+import time
+from collections import Counter
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from estimate_store import EstimateStore
+from estimator import estimate_taxes
+from jurisdictions import JurisdictionStore
+from millage_index import MillageIndex
+from millage_store import DB_PATH
+from spatial_resolver import BOUNDARY_PLACES, BOUNDARY_SCHOOLS, SpatialResolver
+
+OUTPUT_COLUMNS = [
+    "address", "price", "tax_type", "method", "county", "matched_key", "match_score",
+    "millage_rate", "annual", "monthly", "error", "trace_id",
+]
+
+
+def no_lookup(address: str, headless: bool = True) -> dict:
+    return {"error": "No coordinates inside the boundary files, and lookups are off (--no-lookup)"}
+
+
+def row_location(row) -> Optional[Tuple[float, float]]:
+    lat, lon = row.get("lat"), row.get("lon")
+    if pd.isna(lat) or pd.isna(lon):
+        return None
+    return float(lat), float(lon)
+
+
+def estimate_rows(
+    df: pd.DataFrame,
+    snapshot,
+    lookup,
+    resolver: Optional[SpatialResolver] = None,
+    jurisdictions: Optional[JurisdictionStore] = None,
+    estimates: Optional[EstimateStore] = None,
+) -> pd.DataFrame:
+    """
+    One output row per input row, in order; failed rows carry "error".
+    """
+    out = []
+    for row in df.to_dict("records"):
+        address = str(row["address"]).strip()
+        tax_type = row.get("tax_type")
+        tax_type = tax_type if isinstance(tax_type, str) and tax_type else "Homestead"
+        result = estimate_taxes(
+            address, float(row["price"]), tax_type, snapshot, lookup,
+            jurisdictions=jurisdictions, location=row_location(row), resolver=resolver,
+        )
+        record = {
+            "address": address, "price": float(row["price"]), "tax_type": tax_type,
+            "method": result["scraped"].get("_method"), "trace_id": result["trace_id"],
+        }
+        if "error" in result:
+            record["error"] = result["error"]
+        else:
+            record.update(result["estimate"])
+            if estimates is not None:
+                estimates.save(result["estimate"], source="batch")
+        out.append(record)
+    return pd.DataFrame(out).reindex(columns=OUTPUT_COLUMNS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate taxes for a CSV of properties")
+    parser.add_argument("input_csv")
+    parser.add_argument("--output", default="estimates.csv")
+    parser.add_argument("--db", default=DB_PATH, help="Millage database")
+    parser.add_argument("--places", default=BOUNDARY_PLACES, help="Place boundaries (default $BOUNDARY_PLACES)")
+    parser.add_argument("--schools", default=BOUNDARY_SCHOOLS, help="School districts (default $BOUNDARY_SCHOOLS)")
+    parser.add_argument("--no-lookup", action="store_true", help="Never scrape; rows not placed by coordinates fail")
+    parser.add_argument("--save", action="store_true", help="Save the estimates so rate imports recompute them")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input_csv)
+    missing = {"address", "price"} - set(df.columns)
+    if missing:
+        parser.error(f"{args.input_csv} is missing column(s): {', '.join(sorted(missing))}")
+
+    # Everything loaded once, before the first row
+    t0 = time.perf_counter()
+    resolver = None
+    if args.places and args.schools:
+        resolver = SpatialResolver.from_files(args.places, args.schools)
+        print(
+            f"✅ Loaded {len(resolver.places)} places, {len(resolver.schools)} school districts "
+            f"in {time.perf_counter() - t0:.2f}s"
+        )
+    elif {"lat", "lon"} <= set(df.columns):
+        print("No boundary files (--places/--schools): coordinates are ignored")
+    snapshot = MillageIndex(args.db).snapshot()
+    jurisdictions = JurisdictionStore(args.db)
+    estimates = EstimateStore(args.db, jurisdictions=jurisdictions) if args.save else None
+    if args.no_lookup:
+        lookup = no_lookup
+    else:
+        from cloud_scraper import get_township_school_from_address as lookup
+
+    t0 = time.perf_counter()
+    result = estimate_rows(df, snapshot, lookup, resolver, jurisdictions, estimates)
+    result.to_csv(args.output, index=False)
+
+    methods = Counter(m for m in result["method"] if isinstance(m, str))
+    errors = int(result["error"].notna().sum())
+    print(
+        f"✅ {len(result) - errors} of {len(result)} estimated in {time.perf_counter() - t0:.2f}s "
+        f"({', '.join(f'{n} {m}' for m, n in methods.most_common()) or 'none'}), written to {args.output}"
+    )
@@ -0,0 +1,68 @@
+# bench_chrome_startup.py
+# Time Chrome launches the way the Selenium fallback does them.
+#
+# Usage: python bench_chrome_startup.py [-n 10] [--cold]
+#   --cold  re-run binary/driver discovery and use an empty profile for every
+#           launch (the behaviour before discovery caching / profile templates)
+
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import cloud_scraper
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _cold_profile_dir():
+    return tempfile.mkdtemp(prefix="chromedata_")
+
+
+def run(n: int, cold: bool) -> dict:
+    discovery = []
+    launches = []
+    if cold:
+        cloud_scraper._new_profile_dir = _cold_profile_dir
+
+    for _ in range(n):
+        if cold or not discovery:
+            cloud_scraper._chrome_setup = None
+            start = time.perf_counter()
+            setup = cloud_scraper.discover_chrome()
+            discovery.append(time.perf_counter() - start)
+            if setup.error:
+                raise SystemExit(f"❌ {setup.error}")
+
+        start = time.perf_counter()
+        driver, tmp_ud = cloud_scraper._create_chrome_driver(headless=True)
+        driver.get("about:blank")
+        launches.append(time.perf_counter() - start)
+        driver.quit()
+        shutil.rmtree(tmp_ud, ignore_errors=True)
+
+    return {
+        "mode": "cold" if cold else "cached",
+        "launches": n,
+        "discovery_ms_total": round(sum(discovery) * 1000, 1),
+        "launch_ms_median": round(statistics.median(launches) * 1000, 1),
+        "launch_ms_p95": round(_percentile(launches, 95) * 1000, 1),
+        "launch_ms_max": round(max(launches) * 1000, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Chrome launch time")
+    parser.add_argument("-n", type=int, default=10, help="number of launches")
+    parser.add_argument("--cold", action="store_true", help="rediscover and use a cold profile each launch")
+    args = parser.parse_args()
+    result = run(args.n, args.cold)
+    for k, v in result.items():
+        print(f"{k}: {v}")
+    sys.exit(0)
@@ -0,0 +1,321 @@
+# bench_parsers.py
+# Regression and speed check for the result-page parsers. Every page listed
+# in parser_corpus/manifest.json (with the fields it should yield) is run
+# through each scraper's _parse_address_page (and the streaming parser the
+# fast lookup uses); the report shows mismatches,
+# per-page parse time and peak memory allocated while parsing.
+#
+# The corpus is the captured page.html plus synthetic variants made from it
+# (list page, village, charter township, no school section, huge ad payload).
+# A candidate parser can be checked against the same pages with
+# --parser name=module:function. A manifest entry may override expected
+# fields per parser ("expected_by_parser") where one knowingly differs.
+#
+# Usage: python bench_parsers.py [--parsers cloud,selenium] [--parser fast=my_parser:parse] [--repeat 5] [--output report.json]
+#        python bench_parsers.py --make-corpus   (regenerate the synthetic pages from page.html)
+
+import argparse
+import gzip
+import importlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_DIR = os.path.join(HERE, "parser_corpus")
+MANIFEST = "manifest.json"
+SOURCE_PAGE = os.path.join(HERE, "page.html")
+FIELDS = ("township", "county", "school_district")
+
+PARSERS = {
+    "cloud": "cloud_scraper:_parse_address_page",
+    "selenium": "selenium_scraper:_parse_address_page",
+    "playwright": "playwright_scraper:_parse_address_page",
+    "stream": "page_stream:parse_address_page",
+}
+
+
+def read_page(path: str) -> str:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def write_page(path: str, html: str) -> None:
+    # mtime=0 keeps regenerated files byte-identical
+    with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+        f.write(html.encode("utf-8"))
+
+
+def load_manifest(corpus_dir: str = CORPUS_DIR) -> List[dict]:
+    with open(os.path.join(corpus_dir, MANIFEST), encoding="utf-8") as f:
+        return json.load(f)["pages"]
+
+
+def load_parser(spec: str) -> Callable[[str], dict]:
+    module, _, func = spec.partition(":")
+    return getattr(importlib.import_module(module), func or "_parse_address_page")
+
+
+# ---- Synthetic pages ----------------------------------------------------------
+
+_ADMIN_START = '<div class="halfcontentpadded">\n<h2>Administrative'
+_SCHOOL_START = '<div class="halfcontentpadded">\n<h2>School'
+
+
+def _section_bounds(html: str, start: str) -> Tuple[int, int]:
+    i = html.index(start)
+    return i, html.index("</div>", i) + len("</div>")
+
+
+def _admin_section(places: List[str]) -> str:
+    items = "\n".join(f'<li><a href="/mi/{p.split(",")[0].lower().replace(" ", "-")}/">{p}</a></li>' for p in places)
+    return f"{_ADMIN_START}/Census/Geographic Units</h2>\nThe address is located within:\n<ul>\n{items}\n</ul>\n</div>"
+
+
+def _school_section(district: str, zones: List[str]) -> str:
+    items = "\n".join(f'<li><a href="/schools/profiles,n,{z.lower()}.cfm">{z}</a></li>' for z in zones)
+    return (
+        f"{_SCHOOL_START} District &amp; School Zones</h2>\n"
+        f'The address is located within the <a href="/schools/sorted-by-districts,n,{district.lower()}.cfm">'
+        f"{district}</a> and the specific school zones are:\n<ul>\n{items}\n</ul>\n</div>"
+    )
+
+
+def _with_sections(html: str, admin: str, school: str) -> str:
+    # School section first: it comes after the admin one in the page
+    i, j = _section_bounds(html, _SCHOOL_START)
+    html = html[:i] + school + html[j:]
+    i, j = _section_bounds(html, _ADMIN_START)
+    return html[:i] + admin + html[j:]
+
+
+def _drop_section(html: str, start: str) -> str:
+    i, j = _section_bounds(html, start)
+    return html[:i] + html[j:]
+
+
+def _list_page(html: str) -> str:
+    entries = [
+        "4524 Glory Way SW, Wyoming, MI 49418",
+        "4524 Glory Way SE, Kentwood, MI 49508",
+        "4524 Glory Ct SW, Wyoming, MI 49418",
+    ]
+    links = "\n".join(
+        f'<a class="list-group-item" href="/maps/address-research.cfm?addr={e.replace(" ", "+")}">{e}</a>'
+        for e in entries
+    )
+    html = _drop_section(_drop_section(html, _SCHOOL_START), _ADMIN_START)
+    i = html.index("<body")
+    i = html.index(">", i) + 1
+    return html[:i] + f'\n<h2>Multiple matches found</h2>\n<div class="list-group">\n{links}\n</div>\n' + html[i:]
+
+
+def _ad_payload(rng: random.Random, size: int) -> str:
+    """
+    Inline ad scripts, tracking pixels and nested slot divs, roughly `size`
+    characters, with link text that must not be mistaken for a district.
+    """
+    tokens = [f"{rng.getrandbits(64):016x}" for _ in range(64)]
+    parts, total = [], 0
+    while total < size:
+        slot = f"ez-ad-{rng.randrange(10**6)}"
+        config = json.dumps({
+            "slot": slot,
+            "sizes": [[rng.choice([300, 320, 728, 970]), rng.choice([50, 90, 250, 600])] for _ in range(4)],
+            "targeting": {f"k{n}": rng.choice(tokens) for n in range(12)},
+        })
+        part = (
+            f'<div class="ad-slot" id="{slot}"><div class="ad-inner"><div class="ad-frame">'
+            f'<script type="text/javascript">window.__ads=window.__ads||[];window.__ads.push({config});</script>'
+            f'<iframe src="about:blank" width="300" height="250"></iframe>'
+            f'<img src="https://px.example/{rng.choice(tokens)}.gif" width="1" height="1">'
+            f'<a href="https://ads.example/{slot}">Sponsored: homes near top-rated schools</a>'
+            "</div></div></div>\n"
+        )
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)
+
+
+def _huge_ads(html: str, size: int = 3_000_000, seed: int = 11) -> str:
+    rng = random.Random(seed)
+    i, _ = _section_bounds(html, _ADMIN_START)
+    html = html[:i] + _ad_payload(rng, size // 2) + html[i:]
+    j = html.index("</body>")
+    return html[:j] + _ad_payload(rng, size // 2) + html[j:]
+
+
+GRAND_RAPIDS = {
+    "township": "City of Grand Rapids, MI",
+    "county": "Kent County",
+    "school_district": "Grand Rapids Public Schools School District",
+}
+
+# file -> (description, builder(page.html) -> html, expected fields)
+VARIANTS = {
+    "list_page.html.gz": (
+        "Disambiguation list: no result sections, nothing to extract",
+        _list_page,
+        {"township": None, "county": None, "school_district": None},
+    ),
+    "village.html.gz": (
+        "Village of Spring Lake, Ottawa County",
+        lambda h: _with_sections(
+            h,
+            _admin_section(["Village of Spring Lake, MI", "Ottawa County", "ZIP Code 49456"]),
+            _school_section("Spring Lake Public Schools School District", ["Holmes Elementary School"]),
+        ),
+        {
+            "township": "Village of Spring Lake, MI",
+            "county": "Ottawa County",
+            "school_district": "Spring Lake Public Schools School District",
+        },
+    ),
+    "charter_township.html.gz": (
+        "Plainfield Charter Township, Kent County",
+        lambda h: _with_sections(
+            h,
+            _admin_section(["Plainfield Charter Township, MI", "Kent County", "ZIP Code 49341"]),
+            _school_section("Rockford Public Schools School District", ["Valley View Elementary School"]),
+        ),
+        {
+            "township": "Plainfield Charter Township, MI",
+            "county": "Kent County",
+            "school_district": "Rockford Public Schools School District",
+        },
+    ),
+    "missing_school.html.gz": (
+        "Result page without the school district section",
+        lambda h: _drop_section(h, _SCHOOL_START),
+        dict(GRAND_RAPIDS, school_district=None),
+    ),
+    "huge_ads.html.gz": (
+        "page.html with ~3 MB of inline ad markup around the sections",
+        _huge_ads,
+        GRAND_RAPIDS,
+    ),
+}
+
+
+def make_corpus(corpus_dir: str = CORPUS_DIR, source: str = SOURCE_PAGE) -> List[dict]:
+    """
+    Write the synthetic pages and (re)list them in the manifest. Entries
+    for other pages (e.g. captured ones added by hand) are kept.
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    html = read_page(source)
+    try:
+        pages = [p for p in load_manifest(corpus_dir) if p["file"] not in VARIANTS]
+    except FileNotFoundError:
+        pages = []
+    if not any(p["file"] == os.path.relpath(source, corpus_dir) for p in pages):
+        pages.insert(0, {
+            "file": os.path.relpath(source, corpus_dir),
+            "description": "Captured result page: City of Grand Rapids, Kent County",
+            "expected": GRAND_RAPIDS,
+        })
+    for name, (description, build, expected) in VARIANTS.items():
+        write_page(os.path.join(corpus_dir, name), build(html))
+        pages.append({"file": name, "description": description, "expected": expected})
+    with open(os.path.join(corpus_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({"pages": pages}, f, indent=2)
+        f.write("\n")
+    return pages
+
+
+# ---- Harness ------------------------------------------------------------------
+
+def check_page(parse: Callable[[str], dict], html: str, expected: Dict[str, Optional[str]]) -> List[str]:
+    try:
+        got = parse(html)
+    except Exception as e:
+        return [f"raised {e.__class__.__name__}: {e}"]
+    return [f"{k}: expected {expected.get(k)!r}, got {got.get(k)!r}" for k in FIELDS if got.get(k) != expected.get(k)]
+
+
+def measure(parse: Callable[[str], dict], html: str, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        parse(html)
+        times.append(time.perf_counter() - t0)
+    # Separate pass: tracemalloc slows parsing down too much to time under it
+    tracemalloc.start()
+    try:
+        parse(html)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 2),
+        "min_ms": round(min(times) * 1000, 2),
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def run(parsers: Dict[str, str], corpus_dir: str = CORPUS_DIR, repeat: int = 5) -> dict:
+    pages = load_manifest(corpus_dir)
+    htmls = {p["file"]: read_page(os.path.join(corpus_dir, p["file"])) for p in pages}
+    results, skipped = [], {}
+    for name, spec in parsers.items():
+        try:
+            parse = load_parser(spec)
+        except (ImportError, AttributeError) as e:
+            skipped[name] = f"{e.__class__.__name__}: {e}"
+            continue
+        for page in pages:
+            html = htmls[page["file"]]
+            expected = dict(page["expected"], **page.get("expected_by_parser", {}).get(name, {}))
+            results.append(dict(
+                parser=name,
+                page=page["file"],
+                size_kb=round(len(html) / 1024, 1),
+                errors=check_page(parse, html, expected),
+                **measure(parse, html, repeat),
+            ))
+    return {"pages": len(pages), "repeat": repeat, "results": results, "skipped": skipped}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and time the result-page parsers on the saved corpus")
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--parsers", default=",".join(PARSERS), help="comma-separated built-in parser names")
+    parser.add_argument("--parser", action="append", default=[], metavar="NAME=MODULE:FUNC", help="extra parser to check")
+    parser.add_argument("--repeat", type=int, default=5, help="timed parses per page")
+    parser.add_argument("--output", default="", help="also write the results as JSON")
+    parser.add_argument("--make-corpus", action="store_true", help="regenerate the synthetic pages from page.html")
+    args = parser.parse_args()
+
+    if args.make_corpus:
+        pages = make_corpus(args.corpus)
+        print(f"✅ Wrote {len(VARIANTS)} synthetic pages; {len(pages)} pages in {os.path.join(args.corpus, MANIFEST)}")
+        sys.exit(0)
+
+    selected = {n: PARSERS[n] for n in args.parsers.split(",") if n}
+    for extra in args.parser:
+        name, _, spec = extra.partition("=")
+        selected[name] = spec
+    report = run(selected, args.corpus, args.repeat)
+
+    print(f"{'parser':<11} {'page':<26} {'KB':>7} {'median ms':>10} {'min ms':>8} {'peak KB':>9}  result")
+    for r in report["results"]:
+        status = "ok" if not r["errors"] else "FAIL"
+        print(
+            f"{r['parser']:<11} {r['page']:<26} {r['size_kb']:>7} {r['median_ms']:>10} "
+            f"{r['min_ms']:>8} {r['peak_alloc_kb']:>9}  {status}"
+        )
+        for err in r["errors"]:
+            print(f"    {err}")
+    for name, reason in report["skipped"].items():
+        print(f"⚠️ {name} skipped ({reason})")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    sys.exit(1 if any(r["errors"] for r in report["results"]) else 0)
@@ -0,0 +1,147 @@
+# bench_scorers.py
+# Accuracy / speed comparison of the match scorers in scorers.py. Runs every
+# labeled (scraped township, scraped school) -> correct Combined Key pair in
+# match_labels.csv through find_top_matches with each scorer and reports
+# top-1 / top-3 accuracy next to queries per second.
+#
+# Usage: python bench_scorers.py [--labels match_labels.csv] [--scorers token_set,rapidfuzz] [--output report.json]
+#        python bench_scorers.py --make-labels [-n 300]   (regenerate the label file from the database)
+
+import argparse
+import csv
+import json
+import random
+import time
+from typing import Dict, List
+
+from millage_index import MillageIndex, combined_key, find_top_matches
+from millage_store import DB_PATH, TABLE_NAME
+from scorers import SCORERS, get_scorer
+
+LABELS_FILE = "match_labels.csv"
+LABEL_FIELDS = ["township", "school_district", "county", "expected_key"]
+
+# How hometownlocator tends to spell what the rate sheets abbreviate
+SCHOOL_SUFFIXES = ["Public Schools", "Area Schools", "Community Schools", "School District", "Schools", "Public School District"]
+
+
+def _scraped_township(name: str, rng: random.Random) -> str:
+    if name.startswith("City of "):
+        base = name[len("City of "):]
+        return rng.choice([name, f"{base} city", f"City of {base}"])
+    if name.startswith("Village of "):
+        base = name[len("Village of "):]
+        return rng.choice([name, f"{base} village"])
+    base = name[: -len(" Township")] if name.endswith(" Township") else name
+    return rng.choice([
+        f"{base} Township",
+        f"Charter Township of {base}",
+        f"{base} Charter Township",
+        f"Township of {base}",
+    ])
+
+
+def _scraped_school(name: str, rng: random.Random) -> str:
+    base = name.split("(")[0].strip() or name
+    school = f"{base} {rng.choice(SCHOOL_SUFFIXES)}"
+    if rng.random() < 0.15 and len(base) > 5:
+        # Occasional typo: drop one letter
+        i = rng.randrange(1, len(base) - 1)
+        school = base[:i] + base[i + 1:] + school[len(base):]
+    return school
+
+
+def make_labels(n: int = 300, seed: int = 7, db_path: str = DB_PATH) -> List[Dict[str, str]]:
+    """
+    Sample n distinct jurisdictions and spell them the way the scraper
+    returns them. The correct key is the row's own Combined Key.
+    """
+    df = MillageIndex(db_path, TABLE_NAME).snapshot().df
+    keys = combined_key(df)
+    # Pairs that occur more than once (e.g. several rate rows) are ambiguous by name
+    unique = ~keys.duplicated(keep=False)
+    rows = df[unique].assign(**{"Combined Key": keys[unique]})
+    rng = random.Random(seed)
+    picked = rows.sample(n=min(n, len(rows)), random_state=seed)
+    return [
+        {
+            "township": _scraped_township(str(r["Township/City"]), rng),
+            "school_district": _scraped_school(str(r["School District"]), rng),
+            "county": str(r["County"]),
+            "expected_key": r["Combined Key"],
+        }
+        for _, r in picked.iterrows()
+    ]
+
+
+def load_labels(path: str = LABELS_FILE) -> List[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def run(labels: List[Dict[str, str]], scorer_names: List[str], db_path: str = DB_PATH, repeat: int = 1) -> List[dict]:
+    snapshot = MillageIndex(db_path, TABLE_NAME).snapshot()
+    results = []
+    for name in scorer_names:
+        scorer = get_scorer(name)
+        top1 = top3 = 0
+        elapsed = 0.0
+        for _ in range(repeat):
+            top1 = top3 = 0
+            for label in labels:
+                t0 = time.perf_counter()
+                _, top = find_top_matches(
+                    snapshot.df,
+                    label["township"],
+                    label["school_district"],
+                    top_n=3,
+                    county=label.get("county", ""),
+                    partitions=snapshot.partitions,
+                    scorer=scorer,
+                )
+                elapsed += time.perf_counter() - t0
+                top1 += bool(top.keys) and top.keys[0] == label["expected_key"]
+                top3 += label["expected_key"] in top.keys
+        queries = len(labels) * repeat
+        results.append({
+            "scorer": scorer.name,
+            "top1_accuracy": round(top1 / len(labels), 4) if labels else None,
+            "top3_accuracy": round(top3 / len(labels), 4) if labels else None,
+            "queries_per_s": round(queries / elapsed, 1) if elapsed else None,
+            "ms_per_query": round(elapsed / queries * 1000, 3) if queries else None,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare match scorers on a labeled set")
+    parser.add_argument("--labels", default=LABELS_FILE)
+    parser.add_argument("--scorers", default=",".join(SCORERS), help="comma-separated scorer names")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the label set (timing only)")
+    parser.add_argument("--output", default="", help="also write the results as JSON")
+    parser.add_argument("--make-labels", action="store_true", help="regenerate the label file from the database")
+    parser.add_argument("-n", type=int, default=300, help="labels to generate with --make-labels")
+    args = parser.parse_args()
+
+    if args.make_labels:
+        labels = make_labels(args.n, db_path=args.db)
+        with open(args.labels, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=LABEL_FIELDS)
+            writer.writeheader()
+            writer.writerows(labels)
+        print(f"✅ Wrote {len(labels)} labels to {args.labels}")
+    else:
+        labels = load_labels(args.labels)
+        results = run(labels, [s for s in args.scorers.split(",") if s], args.db, args.repeat)
+        print(f"{len(labels)} labeled queries")
+        print(f"{'scorer':<12} {'top-1':>7} {'top-3':>7} {'q/s':>9} {'ms/q':>8}")
+        for r in results:
+            print(
+                f"{r['scorer']:<12} {r['top1_accuracy']:>7.1%} {r['top3_accuracy']:>7.1%} "
+                f"{r['queries_per_s']:>9} {r['ms_per_query']:>8}"
+            )
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"labels": len(labels), "results": results}, f, indent=2, sort_keys=True)
+                f.write("\n")
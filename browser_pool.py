@@ -0,0 +1,210 @@
+# browser_pool.py
+# Worker processes that own the browser fallbacks (Selenium / Playwright), so
+# a hung chromedriver or a Chrome memory spike lives outside the Streamlit
+# process. Each job gets a hard deadline; a worker that misses it is killed
+# together with its whole browser process tree and replaced.
+
+import atexit
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from resource_tracker import TRACKER, add_counters
+
+# Spawn, not fork: the Streamlit server is multi-threaded
+_CTX = multiprocessing.get_context("spawn")
+
+
+class BrowserJobTimeout(Exception):
+    pass
+
+
+class PoolBusy(Exception):
+    pass
+
+
+def _lookup_functions() -> Dict[str, Callable[..., dict]]:
+    # Imported in the worker only; cloud_scraper imports this module
+    from cloud_scraper import _playwright_lookup, _selenium_lookup, discover_chrome
+
+    # Pay for binary/driver discovery at worker start, not on the first job
+    discover_chrome()
+
+    return {
+        "selenium": lambda address, headless: _selenium_lookup(address, headless=headless),
+        "playwright": lambda address, headless: _playwright_lookup(address),
+    }
+
+
+def _worker_main(conn) -> None:
+    # Own process group, so the parent can kill Chrome along with the worker
+    if hasattr(os, "setsid"):
+        try:
+            os.setsid()
+        except OSError:
+            pass
+    functions = _lookup_functions()
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        backend, address, headless = job
+        try:
+            status, payload = "ok", functions[backend](address, headless)
+        except Exception as e:
+            status, payload = "error", str(e) or e.__class__.__name__
+        # Cumulative resource counters ride along, so the parent can sum them
+        conn.send((status, payload, TRACKER.counters()))
+
+
+class _Worker:
+    def __init__(self):
+        self.conn, child_conn = _CTX.Pipe()
+        self.process = _CTX.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.counters: Dict[str, int] = {}
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        try:
+            # The worker's group takes its chromedriver / Chrome children with it
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError, PermissionError, OSError):
+            # No group to kill: no killpg here, or the worker died (or is still
+            # starting) before setsid. Process.kill tolerates a dead process.
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class BrowserPool:
+    """
+    Fixed number of browser worker processes, started lazily.
+
+    run() blocks the calling thread only; other Streamlit sessions keep
+    running, and at most `size` browsers exist at once.
+    """
+
+    def __init__(self, size: int = 2, job_timeout: float = 45.0, queue_timeout: float = 30.0, max_jobs: int = 25):
+        self.size = size
+        self.job_timeout = job_timeout
+        self.queue_timeout = queue_timeout
+        # Recycle workers periodically to shed leaked browser memory
+        self.max_jobs = max_jobs
+        self._idle: "queue.Queue[Optional[_Worker]]" = queue.Queue()
+        for _ in range(size):
+            self._idle.put(None)  # slot without a started worker yet
+        self._workers = set()
+        self._lock = threading.Lock()
+        self.killed = 0
+        # Resource counters of workers that are gone
+        self._retired_counters: Dict[str, int] = {}
+        atexit.register(self.shutdown)
+
+    def _acquire(self) -> _Worker:
+        try:
+            worker = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            raise PoolBusy(f"All {self.size} browser workers busy for {self.queue_timeout:.0f}s")
+        if worker is not None and not worker.alive():
+            # Died while idle: keep its counters, close its pipe and handle
+            self._discard(worker, kill=True)
+            worker = None
+        if worker is None:
+            worker = _Worker()
+            with self._lock:
+                self._workers.add(worker)
+        return worker
+
+    def _release(self, worker: Optional[_Worker]) -> None:
+        if worker is not None and worker.jobs >= self.max_jobs:
+            self._discard(worker, kill=False)
+            worker = None
+        self._idle.put(worker)
+
+    def _discard(self, worker: _Worker, kill: bool) -> None:
+        with self._lock:
+            self._workers.discard(worker)
+            add_counters(self._retired_counters, worker.counters)
+        if kill:
+            worker.kill()
+            self.killed += 1
+        else:
+            worker.stop()
+
+    def run(self, backend: str, address: str, headless: bool = True, timeout: Optional[float] = None) -> dict:
+        """
+        Run one lookup in a worker and return its parsed dict. Raises
+        BrowserJobTimeout (worker killed), PoolBusy, or Exception with the
+        worker's error message.
+        """
+        timeout = self.job_timeout if timeout is None else timeout
+        worker = self._acquire()
+        try:
+            worker.jobs += 1
+            worker.conn.send((backend, address, headless))
+            deadline = time.monotonic() + timeout
+            while not worker.conn.poll(min(0.5, max(0.0, deadline - time.monotonic()))):
+                if not worker.alive():
+                    raise EOFError("worker died")
+                if time.monotonic() >= deadline:
+                    self._discard(worker, kill=True)
+                    worker = None
+                    raise BrowserJobTimeout(f"{backend} lookup exceeded {timeout:.0f}s; worker killed")
+            status, payload, worker.counters = worker.conn.recv()
+        except (EOFError, OSError, BrokenPipeError) as e:
+            if worker is not None:
+                self._discard(worker, kill=True)
+                worker = None
+            raise Exception(f"{backend} worker crashed: {e}")
+        finally:
+            self._release(worker)
+
+        if status != "ok":
+            raise Exception(payload)
+        return payload
+
+    def status(self) -> dict:
+        with self._lock:
+            live = sum(1 for w in self._workers if w.alive())
+        return {"size": self.size, "live_workers": live, "idle_slots": self._idle.qsize(), "killed": self.killed}
+
+    def resource_counters(self) -> Dict[str, int]:
+        """
+        Profile dir / driver counters summed over current and past workers.
+        A killed worker's counts since its last finished job are lost.
+        """
+        with self._lock:
+            total = dict(self._retired_counters)
+            for worker in self._workers:
+                add_counters(total, worker.counters)
+        return total
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
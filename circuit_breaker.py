@@ -0,0 +1,169 @@
+# circuit_breaker.py
+# Per-backend circuit breakers for the address lookup chain. Each backend
+# (HTTP, Selenium, Playwright) keeps a rolling window of outcomes; a backend
+# that keeps failing is skipped for a cooldown, then probed once (half-open)
+# before it is trusted again. Backends are tried cheapest-expected-first.
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        expected_latency: float,
+        window: int = 20,
+        failure_threshold: int = 3,
+        min_samples: int = 5,
+        max_failure_rate: float = 0.5,
+        cooldown: float = 60.0,
+        max_age: float = 300.0,
+    ):
+        self.name = name
+        # Prior used for ordering until real timings come in
+        self.expected_latency = expected_latency
+        self.failure_threshold = failure_threshold
+        self.min_samples = min_samples
+        self.max_failure_rate = max_failure_rate
+        self.cooldown = cooldown
+        # Outcomes older than this are forgotten, so a backend that lost the
+        # ordering gets tried first again once its bad record has aged out
+        self.max_age = max_age
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.last_error = ""
+        self._outcomes: Deque[Tuple[float, bool, float]] = deque(maxlen=window)
+        self._probe_in_flight = False
+        # Reentrant: the stats below lock too, and record() reaches them holding it
+        self._lock = threading.RLock()
+
+    # ---- decisions ----
+    def allow(self) -> bool:
+        """
+        Whether a call may go to this backend now. After the cooldown an open
+        breaker lets exactly one probe through (half-open).
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record(self, ok: bool, latency: float, error: str = "") -> None:
+        with self._lock:
+            self._outcomes.append((time.monotonic(), ok, latency))
+            self._probe_in_flight = False
+            if ok:
+                self.consecutive_failures = 0
+                self.state = CLOSED
+                return
+
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN or self._should_trip():
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def _should_trip(self) -> bool:
+        if self.consecutive_failures >= self.failure_threshold:
+            return True
+        outcomes = self._recent()
+        if len(outcomes) < self.min_samples:
+            return False
+        failures = sum(1 for _, ok, _ in outcomes if not ok)
+        return failures / len(outcomes) > self.max_failure_rate
+
+    # ---- stats ----
+    def _recent(self) -> List[Tuple[float, bool, float]]:
+        # record() appends from lookup threads; copy under the lock
+        cutoff = time.monotonic() - self.max_age
+        with self._lock:
+            return [o for o in self._outcomes if o[0] >= cutoff]
+
+    def success_rate(self) -> Optional[float]:
+        outcomes = self._recent()
+        if not outcomes:
+            return None
+        return sum(1 for _, ok, _ in outcomes if ok) / len(outcomes)
+
+    def mean_latency(
+        self, successes_only: bool = True, outcomes: Optional[List[Tuple[float, bool, float]]] = None
+    ) -> Optional[float]:
+        if outcomes is None:
+            outcomes = self._recent()
+        samples = [t for _, ok, t in outcomes if ok or not successes_only]
+        if not samples:
+            return None
+        return sum(samples) / len(samples)
+
+    def expected_cost(self) -> float:
+        """
+        Expected seconds to a successful answer: mean success latency divided
+        by the (Laplace-smoothed) success rate. Backends without recent
+        samples use their prior latency.
+        """
+        outcomes = self._recent()
+        latency = self.mean_latency(outcomes=outcomes)
+        if latency is None:
+            latency = max(self.mean_latency(successes_only=False, outcomes=outcomes) or 0.0, self.expected_latency)
+        successes = sum(1 for _, ok, _ in outcomes if ok)
+        return latency * (len(outcomes) + 2) / (successes + 1)
+
+    def sort_key(self) -> Tuple[bool, float]:
+        with self._lock:
+            return self.state != CLOSED, self.expected_cost()
+
+    def status(self) -> dict:
+        # One consistent view: no outcome lands between the fields
+        with self._lock:
+            rate = self.success_rate()
+            latency = self.mean_latency()
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+            return {
+                "backend": self.name,
+                "state": self.state,
+                "samples": len(self._recent()),
+                "success_rate": None if rate is None else round(rate, 2),
+                "mean_latency_s": None if latency is None else round(latency, 2),
+                "expected_cost_s": round(self.expected_cost(), 2),
+                "consecutive_failures": self.consecutive_failures,
+                "retry_in_s": None if retry_in is None else round(retry_in, 1),
+                "last_error": self.last_error[:200],
+            }
+
+
+class BreakerRegistry:
+    """
+    The breakers of one lookup chain, plus the adaptive ordering.
+    """
+
+    def __init__(self, breakers: List[CircuitBreaker]):
+        self._order = [b.name for b in breakers]
+        self.breakers: Dict[str, CircuitBreaker] = {b.name: b for b in breakers}
+
+    def ordered(self) -> List[CircuitBreaker]:
+        """
+        Closed breakers first, cheapest expected cost first; the configured
+        order breaks ties.
+        """
+        # Keys taken once per breaker, so concurrent record() calls cannot reorder mid-sort
+        keys = {b.name: (*b.sort_key(), self._order.index(b.name)) for b in self.breakers.values()}
+        return sorted(self.breakers.values(), key=lambda b: keys[b.name])
+
+    def status(self) -> List[dict]:
+        return [b.status() for b in self.ordered()]
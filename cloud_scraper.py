@@ -1,14 +1,20 @@
 # cloud_scraper.py
 # Cloud-compatible scraper using Selenium with Chrome (works on Linux cloud platforms like Koyeb)
 
+import json
 import os
 import re
 import tempfile
 import shutil
-from typing import Optional, Dict, Tuple
+import threading
+import time
+from typing import Optional, Dict, List, NamedTuple, Tuple
+from urllib.parse import urljoin
 
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from fuzzywuzzy import fuzz
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -18,6 +24,23 @@ from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from address_cache import FRESH, STALE, AddressCache, mark_stale
+from browser_pool import BrowserPool
+from lookup_jobs import report_stage
+from page_stream import PageRead, read_response
+from circuit_breaker import BreakerRegistry, CircuitBreaker
+from tracing import event, span
+from resource_tracker import (
+    DRIVER_LOG,
+    TRACKER,
+    measure_rss,
+    new_profile_dir,
+    quit_driver,
+    remove_profile_dir,
+    resource_status,
+    start_reaper,
+)
+
 # Try to use lxml parser (faster), fall back to html.parser
 try:
     import lxml
@@ -25,12 +48,16 @@ try:
 except ImportError:
     PARSER = "html.parser"
 
-HTL_HOME = "https://michigan.hometownlocator.com/"
-LOOKUP_URL = "https://michigan.hometownlocator.com/maps/address-lookup.cfm"
+# HTL_BASE_URL points the scraper at another host (e.g. htl_standin.py for load tests)
+HTL_HOME = os.environ.get("HTL_BASE_URL", "https://michigan.hometownlocator.com/")
+LOOKUP_URL = urljoin(HTL_HOME, "/maps/address-lookup.cfm")
 HEADERS = {"User-Agent": "Mozilla/5.0"}
+# Parse the fast-path response while it downloads and stop reading once the
+# result sections are in (0 = download whole pages and parse afterwards)
+STREAM_FETCH = os.environ.get("STREAM_FETCH", "1") != "0"
 
-# Cache for address lookups (in-memory, persists for session)
-_address_cache: Dict[str, dict] = {}
+# Cache for address lookups (in-memory, stale-while-revalidate past its TTL)
+_address_cache = AddressCache()
 
 
 def _clean_text(s: str) -> str:
@@ -89,72 +116,321 @@ def _parse_address_page(html: str) -> Dict[str, Optional[str]]:
     return result
 
 
-def _try_fast_lookup(address: str) -> Optional[dict]:
+# Shared HTTP session: keeps connections (and the site's cookies) alive across lookups
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
+
+def _get_http_session() -> requests.Session:
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=10)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            _http_session = session
+        return _http_session
+
+
+def _has_sections(html: str) -> bool:
+    return "halfcontentpadded" in html
+
+
+def _parse_result_links(html: str, base_url: str) -> List[Tuple[str, str]]:
+    """
+    (text, absolute url) for each entry of a disambiguation list page
+    (the "div.list-group a" links the browser fallbacks click), or for
+    address-research links when the page only points at the result.
+    """
+    soup = BeautifulSoup(html, PARSER)
+    links = []
+    for a in soup.select("div.list-group a[href]"):
+        links.append((_clean_text(a.get_text(" ")), urljoin(base_url, a["href"])))
+    if not links:
+        for a in soup.find_all("a", href=re.compile(r"address-research", re.I)):
+            links.append((_clean_text(a.get_text(" ")), urljoin(base_url, a["href"])))
+    return links
+
+
+def _pick_result_link(links: List[Tuple[str, str]], address: str) -> str:
+    """
+    Best-matching list entry for the address; the first one wins ties,
+    which is what the browser fallbacks would click.
+    """
+    best_url, best_score = links[0][1], -1
+    for text, url in links:
+        score = fuzz.token_set_ratio(address.lower(), text.lower())
+        if score > best_score:
+            best_url, best_score = url, score
+    return best_url
+
+
+# The site's answer for an address it does not know: a valid page, not a backend failure
+NOT_FOUND = {"township": None, "county": None, "school_district": None, "_not_found": True}
+# The site's own "no results" message; only this counts as NOT_FOUND
+NO_RESULTS_RE = re.compile(r"no\s+(?:results?|matches)\s+(?:were\s+)?(?:found|for)", re.I)
+
+
+def _read_page(r: requests.Response) -> PageRead:
+    """
+    Body of a lookup response: stream-parsed (stopping once the result
+    sections are complete) or, with STREAM_FETCH=0, downloaded whole.
+    """
+    if r.status_code != 200:
+        r.close()
+        raise requests.HTTPError(f"HTTP {r.status_code} from {r.url}", response=r)
+    if STREAM_FETCH:
+        return read_response(r)
+    html = r.text
+    return PageRead(None, html, len(r.content), False, _has_sections(html))
+
+
+def _page_result(page: PageRead) -> Optional[dict]:
+    if page.parsed is not None:
+        return page.parsed
+    if page.html and (page.has_sections or re.search(r"township|school district", page.html, re.I)):
+        with span("parse", parser=PARSER):
+            return _parse_address_page(page.html)
+    return None
+
+
+def _try_fast_lookup(address: str) -> dict:
     """
-    Try HTTP fetch (no browser). Return parsed dict or None to indicate fallback.
-    Optimized with shorter timeout and connection reuse.
-    Enhanced for better reliability on cloud platforms.
+    Try HTTP fetch (no browser). Reuses a pooled session. If the lookup
+    lands on a list page the best entry is followed over HTTP; if it finds
+    nothing, the home page is fetched first (redirect + cookies) and the
+    lookup retried once. Returns the parsed page, or NOT_FOUND when the
+    site says it has no results for the address. Everything else that gives
+    no answer raises (transport and HTTP errors, unreadable result pages,
+    bot checks, unknown layouts), so the browsers get their turn.
     """
     try:
-        session = requests.Session()
-        
-        # First, try the direct lookup URL
-        r = session.get(
-            LOOKUP_URL,
-            params={"addr": address},
-            headers=HEADERS,
-            timeout=15,  # Increased timeout for cloud
-            allow_redirects=True,
-        )
-        
-        if r.status_code != 200:
-            # Try alternative approach - go to home page first, then lookup
-            try:
-                home_r = session.get(HTL_HOME, headers=HEADERS, timeout=10)
-                if home_r.status_code == 200:
-                    # Try lookup again after getting home page
-                    r = session.get(
-                        LOOKUP_URL,
-                        params={"addr": address},
-                        headers=HEADERS,
-                        timeout=15,
-                        allow_redirects=True,
-                    )
-            except Exception:
-                pass
-        
-        if r.status_code != 200:
-            return None
-
-        html = r.text
-        
-        # Check if we got redirected to a results page
-        if "halfcontentpadded" not in html.lower():
-            # Maybe we need to follow redirects differently
-            # Check if there's a direct result in the HTML
-            if "township" in html.lower() or "school district" in html.lower():
-                # Try parsing anyway
-                parsed = _parse_address_page(html)
-                if parsed.get("township") or parsed.get("school_district"):
-                    return parsed
-            return None
-
-        parsed = _parse_address_page(html)
-        if parsed.get("township") or parsed.get("school_district"):
-            return parsed
-        return None
+        session = _get_http_session()
+        primed = False
+
+        for _ in range(2):
+            with span("http.get", step="lookup", stream=STREAM_FETCH) as hs:
+                r = session.get(
+                    LOOKUP_URL,
+                    params={"addr": address},
+                    timeout=15,  # Increased timeout for cloud
+                    allow_redirects=True,
+                    stream=STREAM_FETCH,
+                )
+                page = _read_page(r)
+                hs.set(status=r.status_code, bytes=page.bytes_read, early_stop=page.stopped_early)
+
+            # Disambiguation list instead of a result page: follow the best entry
+            if page.html and not page.has_sections:
+                links = _parse_result_links(page.html, r.url)
+                if links:
+                    report_stage("http", f"List page with {len(links)} matches - following the closest one...")
+                    with span("http.get", step="list", links=len(links), stream=STREAM_FETCH) as hs:
+                        r = session.get(
+                            _pick_result_link(links, address),
+                            headers={"Referer": r.url},
+                            timeout=15,
+                            allow_redirects=True,
+                            stream=STREAM_FETCH,
+                        )
+                        page = _read_page(r)
+                        hs.set(status=r.status_code, bytes=page.bytes_read, early_stop=page.stopped_early)
+
+            parsed = _page_result(page)
+            if parsed and (parsed.get("township") or parsed.get("school_district")):
+                return parsed
+
+            if primed:
+                break
+            # Go through the home page the way a browser would, then retry
+            report_stage("http", "No result yet - retrying through the home page...")
+            with span("http.get", step="prime") as hs:
+                home_r = session.get(HTL_HOME, timeout=10, allow_redirects=True)
+                hs.set(status=home_r.status_code)
+            if home_r.status_code != 200:
+                raise requests.HTTPError(f"HTTP {home_r.status_code} from {HTL_HOME}", response=home_r)
+            primed = True
+
+        if page.has_sections:
+            # A result page the parser could not read (layout change?)
+            raise ValueError("result page without jurisdiction data")
+        if page.html and NO_RESULTS_RE.search(page.html):
+            return dict(NOT_FOUND)
+        raise ValueError("neither a result, list nor no-results page")
     except Exception as e:
-        # Log error but don't crash - return None to try browser fallback
-        import sys
-        print(f"Fast lookup error: {str(e)}", file=sys.stderr)
+        event("http.error", error=str(e))
+        raise
+
+
+CHROME_BINARY_LOCATIONS = [
+    "/usr/bin/chromium-browser",  # Most common on Ubuntu/Debian
+    "/usr/bin/chromium",
+    "/usr/bin/google-chrome",
+    "/usr/bin/google-chrome-stable",
+    "/snap/bin/chromium",
+    "/usr/lib/chromium-browser/chromium-browser",
+]
+CHROMEDRIVER_PATHS = [
+    "/usr/bin/chromedriver",
+    "/usr/local/bin/chromedriver",
+    "/snap/bin/chromium.chromedriver",
+]
+# Download a matching chromedriver with webdriver_manager when none is
+# installed. Only ever attempted once, during discovery; set to 0 where
+# there is no outbound network so discovery fails fast instead.
+CHROMEDRIVER_AUTO_INSTALL = os.environ.get("CHROMEDRIVER_AUTO_INSTALL", "1") != "0"
+
+
+class ChromeUnavailable(Exception):
+    pass
+
+
+class ChromeSetup(NamedTuple):
+    binary: Optional[str]
+    driver: Optional[str]
+    error: str
+
+
+_chrome_setup: Optional[ChromeSetup] = None
+_chrome_setup_lock = threading.Lock()
+
+
+def _find_chrome_binary() -> Optional[str]:
+    for location in CHROME_BINARY_LOCATIONS:
+        if os.path.exists(location):
+            return location
+    for cmd in ["chromium-browser", "chromium", "google-chrome", "google-chrome-stable"]:
+        found = shutil.which(cmd)
+        if found:
+            return found
+    return None
+
+
+def _find_chromedriver(chrome_binary: Optional[str]) -> Optional[str]:
+    for path in CHROMEDRIVER_PATHS:
+        if os.path.exists(path):
+            return path
+    found = shutil.which("chromedriver")
+    if found:
+        return found
+    if not CHROMEDRIVER_AUTO_INSTALL:
         return None
 
+    from webdriver_manager.chrome import ChromeDriverManager
+    from webdriver_manager.core.os_manager import ChromeType
+
+    if chrome_binary and "chromium" in chrome_binary.lower():
+        return ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install()
+    return ChromeDriverManager().install()
+
+
+def discover_chrome() -> ChromeSetup:
+    """
+    Locate the Chrome binary and chromedriver once per process and cache the
+    answer (including a failure, so later lookups fail fast).
+    """
+    global _chrome_setup
+    with _chrome_setup_lock:
+        if _chrome_setup is not None:
+            return _chrome_setup
+
+        binary = _find_chrome_binary()
+        driver = None
+        error = ""
+        if binary:
+            try:
+                driver = _find_chromedriver(binary)
+            except Exception as e:
+                error = f"chromedriver download failed: {e}"
+
+        if not binary:
+            error = f"No Chrome/Chromium binary found (searched {CHROME_BINARY_LOCATIONS} and PATH)"
+        elif not driver and not error:
+            error = (
+                f"No chromedriver found (searched {CHROMEDRIVER_PATHS} and PATH; "
+                f"auto-install {'failed' if CHROMEDRIVER_AUTO_INSTALL else 'disabled'})"
+            )
+        _chrome_setup = ChromeSetup(binary, driver, error)
+        if error:
+            event("chrome.discovery_failed", binary=binary, driver=driver, error=error)
+        return _chrome_setup
+
+
+# ---- Profile template ----
+_CHROME_PREFERENCES = {
+    "profile": {
+        "managed_default_content_settings": {"images": 2},
+        "default_content_setting_values": {"notifications": 2},
+        "exit_type": "Normal",
+        "exited_cleanly": True,
+    },
+    "browser": {"has_seen_welcome_page": True},
+}
+# Profiles go on tmpfs when there's room; Docker's default /dev/shm is 64 MB
+PROFILE_MIN_FREE_BYTES = 256 * 1024 * 1024
+_profile_template: Optional[str] = None
+
+
+def _profile_root() -> str:
+    shm = "/dev/shm"
+    try:
+        if os.access(shm, os.W_OK) and shutil.disk_usage(shm).free >= PROFILE_MIN_FREE_BYTES:
+            return shm
+    except OSError:
+        pass
+    return tempfile.gettempdir()
+
+
+def _get_profile_template() -> str:
+    """
+    A pre-initialized user-data-dir (first-run done, prefs written) that each
+    launch clones instead of letting Chrome build a cold profile. One
+    template per root is shared by every process (pool workers included).
+    """
+    global _profile_template
+    with _chrome_setup_lock:
+        if _profile_template and os.path.isdir(_profile_template):
+            return _profile_template
+        root = _profile_root()
+        template = os.path.join(root, "chrometemplate_v1")
+        if not os.path.isdir(template):
+            # Build next to it and rename, so a concurrent worker never sees a half-written template
+            staging = tempfile.mkdtemp(prefix="chrometemplate_staging_", dir=root)
+            os.makedirs(os.path.join(staging, "Default"), exist_ok=True)
+            open(os.path.join(staging, "First Run"), "w").close()
+            with open(os.path.join(staging, "Local State"), "w") as f:
+                json.dump({"browser": {"enabled_labs_experiments": []}}, f)
+            with open(os.path.join(staging, "Default", "Preferences"), "w") as f:
+                json.dump(_CHROME_PREFERENCES, f)
+            try:
+                os.rename(staging, template)
+            except OSError:
+                # Another process won the race
+                shutil.rmtree(staging, ignore_errors=True)
+        _profile_template = template
+        return template
+
+
+def _new_profile_dir() -> str:
+    template = _get_profile_template()
+    tmp_ud = new_profile_dir("chromedata_", os.path.dirname(template))
+    shutil.copytree(template, tmp_ud, dirs_exist_ok=True)
+    # copytree copies the template's mtime; the reaper would take the clone for an old orphan
+    os.utime(tmp_ud)
+    return tmp_ud
+
 
 def _create_chrome_driver(headless: bool = True) -> Tuple[webdriver.Chrome, str]:
     """
     Create Chrome driver for cloud deployment (works on Linux).
     Returns (driver, temp_user_data_dir).
     """
+    setup = discover_chrome()
+    if setup.error:
+        raise ChromeUnavailable(f"Could not initialize Chrome driver. {setup.error}")
+
     opts = ChromeOptions()
     
     if headless:
@@ -172,9 +448,12 @@ def _create_chrome_driver(headless: bool = True) -> Tuple[webdriver.Chrome, str]
     opts.add_argument("--disable-renderer-backgrounding")
     opts.add_argument("--disable-features=TranslateUI")
     opts.add_argument("--disable-ipc-flooding-protection")
+    opts.add_argument("--no-first-run")
+    opts.add_argument("--no-default-browser-check")
     opts.add_argument("--log-level=3")
     opts.add_argument("--window-size=1200,900")
-    opts.add_argument("--remote-debugging-port=9222")
+    # Let Chrome pick a free port so pooled workers can run side by side
+    opts.add_argument("--remote-debugging-port=0")
     
     # User agent
     opts.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36")
@@ -187,111 +466,38 @@ def _create_chrome_driver(headless: bool = True) -> Tuple[webdriver.Chrome, str]
     opts.add_experimental_option("prefs", prefs)
     opts.add_argument("--blink-settings=imagesEnabled=false")
     
-    # Unique profile dir
-    tmp_ud = tempfile.mkdtemp(prefix="chromedata_")
+    # Unique profile dir, cloned from the warm template
+    tmp_ud = _new_profile_dir()
     opts.add_argument(f"--user-data-dir={tmp_ud}")
 
-    # For cloud platforms, specify Chrome binary location explicitly
-    # Try multiple common locations for Chrome/Chromium
-    chrome_binary_locations = [
-        "/usr/bin/chromium-browser",  # Most common on Ubuntu/Debian
-        "/usr/bin/chromium",
-        "/usr/bin/google-chrome",
-        "/usr/bin/google-chrome-stable",
-        "/snap/bin/chromium",
-        "/usr/lib/chromium-browser/chromium-browser",
-    ]
-    
-    chrome_binary = None
-    for location in chrome_binary_locations:
-        if os.path.exists(location):
-            chrome_binary = location
-            break
-    
-    # Also try using 'which' command as fallback
-    if not chrome_binary:
-        import subprocess
-        for cmd in ["chromium-browser", "chromium", "google-chrome", "google-chrome-stable"]:
-            try:
-                result = subprocess.run(["which", cmd], capture_output=True, text=True, timeout=2)
-                if result.returncode == 0 and result.stdout.strip():
-                    chrome_binary = result.stdout.strip()
-                    break
-            except Exception:
-                pass
-    
-    if chrome_binary:
-        opts.binary_location = chrome_binary
-    
-    # Try to use system chromedriver first (more reliable in Docker)
+    opts.binary_location = setup.binary
+    service = ChromeService(executable_path=setup.driver)
+
+    # Driver log for debugging; the reaper rotates it (CHROMEDRIVER_LOG="" disables)
+    if DRIVER_LOG:
+        service.log_path = DRIVER_LOG
+
     try:
-        chromedriver_paths = [
-            "/usr/bin/chromedriver",
-            "/usr/local/bin/chromedriver",
-            "/snap/bin/chromium.chromedriver",
-        ]
-        chromedriver_path = None
-        for path in chromedriver_paths:
-            if os.path.exists(path):
-                chromedriver_path = path
-                break
-        
-        if chromedriver_path:
-            service = ChromeService(executable_path=chromedriver_path)
-        else:
-            # Try webdriver_manager as fallback
-            from selenium.webdriver.chrome.service import Service
-            from webdriver_manager.chrome import ChromeDriverManager
-            from webdriver_manager.core.os_manager import ChromeType
-            
-            if chrome_binary and "chromium" in chrome_binary.lower():
-                service = Service(ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install())
-            else:
-                service = Service(ChromeDriverManager().install())
-        
-        # Add service logging for debugging (can be removed in production)
-        service.log_path = "/tmp/chromedriver.log"
-        
         driver = webdriver.Chrome(service=service, options=opts)
     except Exception as e:
-        # Last resort: try without explicit service
-        try:
-            driver = webdriver.Chrome(options=opts)
-        except Exception as e2:
-            raise Exception(
-                f"Could not initialize Chrome driver. "
-                f"Chrome binary searched: {chrome_binary_locations}, "
-                f"Found: {chrome_binary}, "
-                f"Error: {str(e2)}"
-            )
+        remove_profile_dir(tmp_ud)
+        raise Exception(
+            f"Could not initialize Chrome driver. "
+            f"Binary: {setup.binary}, driver: {setup.driver}, "
+            f"Error: {str(e)}"
+        )
     
+    TRACKER.incr("drivers_started")
     driver.set_page_load_timeout(20)
     driver.set_script_timeout(10)
     
     return driver, tmp_ud
 
 
-def get_township_school_from_address(address: str, headless: bool = True) -> dict:
+def _selenium_lookup(address: str, headless: bool = True) -> dict:
     """
-    Return {township, county, school_district} for an address.
-    Fast path first; fallback to Selenium if needed.
-    Cloud-compatible version using Chrome.
+    Drive the HometownLocator search box with Chrome. Raises on failure.
     """
-    # Normalize address for cache key
-    cache_key = address.strip().lower()
-    
-    # Check cache first
-    if cache_key in _address_cache:
-        return _address_cache[cache_key]
-
-    # ---- FAST PATH (no browser) ----
-    fast = _try_fast_lookup(address)
-    if fast:
-        _address_cache[cache_key] = fast
-        fast["_method"] = "HTTP (Fast)"
-        return fast
-
-    # ---- SELENIUM FALLBACK (Chrome for cloud) ----
     driver = None
     tmp_ud = None
 
@@ -322,53 +528,186 @@ def get_township_school_from_address(address: str, headless: bool = True) -> dic
             EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.halfcontentpadded"))
         )
 
-        parsed = _parse_address_page(driver.page_source)
-        
-        # Cache successful results
-        if "error" not in parsed:
-            _address_cache[cache_key] = parsed
-            parsed["_method"] = "Selenium (Chrome)"
-        
-        return parsed
-
-    except Exception as e:
-        # If Selenium fails, try Playwright as fallback (works better in cloud)
-        error_msg = str(e)
-        
-        # Always try Playwright as fallback when Selenium fails
-        try:
-            from playwright_scraper import get_township_school_from_address as playwright_lookup
-            result = playwright_lookup(address)
-            if result and "error" not in result:
-                _address_cache[cache_key] = result
-                result["_method"] = "Playwright (Chromium) - Fallback"
-                return result
-        except Exception as playwright_error:
-            # Playwright also failed, log for debugging
-            import sys
-            print(f"Playwright fallback failed: {str(playwright_error)}", file=sys.stderr)
-        
-        # Return a user-friendly error message
-        if "Chrome instance exited" in error_msg or "session not created" in error_msg:
-            error_result = {
-                "error": "Browser automation failed. Please try again - the system will attempt alternative methods.",
-                "_debug": error_msg
-            }
-        else:
-            error_result = {
-                "error": f"Scraper error: {error_msg}. Please try again or check the address format.",
-                "_debug": error_msg
-            }
-        return error_result
+        return _parse_address_page(driver.page_source)
 
     finally:
         if driver:
-            try:
-                driver.quit()
-            except Exception:
-                pass
+            quit_driver(driver)
         if tmp_ud:
+            remove_profile_dir(tmp_ud)
+
+
+def _playwright_lookup(address: str) -> dict:
+    from playwright_scraper import get_township_school_from_address as playwright_lookup
+
+    result = playwright_lookup(address)
+    if not result or "error" in result:
+        raise Exception((result or {}).get("error") or "Playwright returned no result")
+    return result
+
+
+# Lookup backends in their default order; the breakers reorder them at runtime
+_BACKEND_LABELS = {
+    "http": "HTTP (Fast)",
+    "selenium": "Selenium (Chrome)",
+    "playwright": "Playwright (Chromium)",
+}
+_breakers = BreakerRegistry([
+    CircuitBreaker("http", expected_latency=1.5),
+    CircuitBreaker("selenium", expected_latency=10.0),
+    CircuitBreaker("playwright", expected_latency=12.0),
+])
+
+
+def get_backend_status() -> list:
+    """
+    Circuit breaker state per backend, in the order the next lookup will try them.
+    """
+    return _breakers.status()
+
+
+# Browser fallbacks run in worker processes (BROWSER_POOL_SIZE=0 runs them in-process)
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+BROWSER_JOB_TIMEOUT = float(os.environ.get("BROWSER_JOB_TIMEOUT", "45"))
+_browser_pool: Optional[BrowserPool] = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_resource_status() -> dict:
+    """
+    Profile dirs, driver/browser processes, memory and reaper activity for
+    this process plus its browser workers.
+    """
+    pool = _browser_pool
+    status = resource_status(pool.resource_counters() if pool else None)
+    status["recent_lookups"] = TRACKER.recent_lookups()
+    return status
+
+
+def get_browser_pool() -> Optional[BrowserPool]:
+    global _browser_pool
+    if BROWSER_POOL_SIZE <= 0:
+        return None
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            _browser_pool = BrowserPool(size=BROWSER_POOL_SIZE, job_timeout=BROWSER_JOB_TIMEOUT)
+        return _browser_pool
+
+
+def _run_backend(name: str, address: str, headless: bool) -> Optional[dict]:
+    if name == "http":
+        return _try_fast_lookup(address)
+    pool = get_browser_pool()
+    if pool is not None:
+        return pool.run(name, address, headless=headless)
+    if name == "selenium":
+        return _selenium_lookup(address, headless=headless)
+    return _playwright_lookup(address)
+
+
+def get_township_school_from_address(address: str, headless: bool = True) -> dict:
+    """
+    Return {township, county, school_district} for an address.
+    Tries HTTP, Selenium and Playwright, skipping backends whose circuit is
+    open and starting with the one currently cheapest to get an answer from.
+    Cloud-compatible version using Chrome.
+    """
+    with span("lookup", address=address.strip()) as s:
+        # Normalize address for cache key
+        cache_key = address.strip().lower()
+
+        # Check cache first
+        report_stage("cache", "Checking recent lookups...")
+        cached, state, age = _address_cache.get(cache_key)
+        if state == FRESH:
+            s.set(cache="hit", method=cached.get("_method"))
+            report_stage("cache", "Found in recent lookups")
+            return cached
+        if state == STALE:
+            # Answer now, refresh behind the user's back
+            started = _address_cache.revalidate(cache_key, lambda: _lookup_uncached(address, cache_key, headless))
+            s.set(cache="stale", age_s=round(age), refresh_started=started, method=cached.get("_method"))
+            report_stage("cache", "Found in recent lookups (stale - refreshing in the background)")
+            return mark_stale(cached, age)
+
+        # Never seen, or past ADDRESS_CACHE_MAX_AGE: wait for a fresh scrape
+        result = _lookup_uncached(address, cache_key, headless)
+        s.set(cache=state, method=result.get("_method"), error=result.get("error"))
+        return result
+
+
+def _lookup_uncached(address: str, cache_key: str, headless: bool) -> dict:
+    start_reaper()
+    attempts = []
+    last_error = ""
+    for breaker in _breakers.ordered():
+        if not breaker.allow():
+            attempts.append({"backend": breaker.name, "outcome": "skipped (circuit open)"})
+            event("backend.skipped", backend=breaker.name, state=breaker.state)
+            report_stage(breaker.name, f"{_BACKEND_LABELS[breaker.name]} skipped (circuit open)")
+            continue
+
+        # Browser attempts count the whole tree (workers, drivers, Chrome)
+        browser = breaker.name != "http"
+        report_stage(breaker.name, f"Trying {_BACKEND_LABELS[breaker.name]}...")
+        with span("backend", backend=breaker.name) as bs:
+            rss_before = measure_rss(tree=browser)
+            start = time.monotonic()
             try:
-                shutil.rmtree(tmp_ud, ignore_errors=True)
-            except Exception:
-                pass
+                parsed = _run_backend(breaker.name, address, headless)
+                found = parsed and (parsed.get("township") or parsed.get("school_district"))
+                error = "" if found or (parsed or {}).get("_not_found") else "no jurisdiction data"
+            except Exception as e:
+                parsed = None
+                error = str(e) or e.__class__.__name__
+            elapsed = time.monotonic() - start
+            sample = TRACKER.record_lookup(breaker.name, elapsed, rss_before, measure_rss(tree=browser))
+            outcome = error or ("not found" if parsed.get("_not_found") else "ok")
+            bs.set(outcome=outcome, rss_delta_mb=sample["rss_delta_mb"])
+
+        # Only backend failures count against the breaker; an unknown address is an answer
+        breaker.record(not error, elapsed, error)
+        attempts.append({
+            "backend": breaker.name,
+            "outcome": outcome,
+            "seconds": round(elapsed, 2),
+            "rss_delta_mb": sample["rss_delta_mb"],
+        })
+        if not error and parsed.get("_not_found"):
+            # The site itself said it has no such address
+            report_stage(breaker.name, "Address not found")
+            return {
+                "error": "No jurisdiction found for that address. Please check the street, city and ZIP code.",
+                "_method": _BACKEND_LABELS[breaker.name],
+                "_attempts": attempts,
+            }
+        if not error:
+            parsed["_method"] = _BACKEND_LABELS[breaker.name]
+            # Stored without this request's attempts (the cache keeps its own copy)
+            _address_cache.put(cache_key, parsed)
+            parsed["_attempts"] = attempts
+            return parsed
+
+        event("backend.failed", backend=breaker.name, error=error)
+        report_stage(breaker.name, f"{_BACKEND_LABELS[breaker.name]} failed: {error}")
+        if breaker.name != "http":
+            last_error = error
+
+    # Return a user-friendly error message
+    if not last_error:
+        error_result = {
+            "error": "All lookup methods are temporarily unavailable. Please try again in a minute.",
+            "_debug": "; ".join(f"{a['backend']}: {a['outcome']}" for a in attempts),
+        }
+    elif "Chrome instance exited" in last_error or "session not created" in last_error:
+        error_result = {
+            "error": "Browser automation failed. Please try again - the system will attempt alternative methods.",
+            "_debug": last_error,
+        }
+    else:
+        error_result = {
+            "error": f"Scraper error: {last_error}. Please try again or check the address format.",
+            "_debug": last_error,
+        }
+    error_result["_attempts"] = attempts
+    return error_result
@@ -0,0 +1,284 @@
+# estimate_store.py
+# Saved estimates, so a rate import can bring them up to date. Each estimate
+# keeps the inputs that fix its tax - matched Combined Key, price and tax
+# type - plus the values it was shown with and the millage generation they
+# came from. Since the tax is linear in price, recompute() is a join of the
+# outdated estimates against the jurisdiction table and one vectorized
+# multiply: no scraping, no re-matching.
+#
+# The table sits in the runtime database next to the jurisdiction table
+# (jurisdictions.STORE_PATH). The import scripts run recompute() when they
+# finish; it can also be run by hand:
+#
+# Usage: python estimate_store.py [db_file] [--store PATH] [--top N] [--output report.json]
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from jurisdictions import JURISDICTIONS_TABLE, STORE_PATH, JurisdictionStore, address_key
+from millage_store import DB_PATH, TABLE_NAME, changes_since, table_exists
+
+ESTIMATES_TABLE = "estimates"
+
+# Annual amounts closer than this are reported as unchanged
+CENT = 0.005
+
+
+def ensure_estimates_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {ESTIMATES_TABLE} (
+            id INTEGER PRIMARY KEY,
+            address_key TEXT NOT NULL,
+            address TEXT NOT NULL,
+            county TEXT NOT NULL DEFAULT '',
+            matched_key TEXT NOT NULL,
+            price REAL NOT NULL,
+            tax_type TEXT NOT NULL,
+            millage_rate REAL NOT NULL,
+            annual REAL NOT NULL,
+            monthly REAL NOT NULL,
+            generation INTEGER NOT NULL,
+            key_missing INTEGER NOT NULL DEFAULT 0,
+            source TEXT NOT NULL DEFAULT '',
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            UNIQUE (address_key, matched_key, price, tax_type)
+        )
+        """
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {ESTIMATES_TABLE}_generation ON {ESTIMATES_TABLE} (generation)")
+
+
+def _combined_keys(keys) -> List[str]:
+    # Same format as millage_index.combined_key
+    return [f"{t} - {s} ({c})" if c else f"{t} - {s}" for c, t, s in keys]
+
+
+class EstimateStore:
+    """
+    Saved estimates, safe to share across Streamlit sessions (one SQLite
+    connection per thread). Rates come from a JurisdictionStore over the
+    same two databases.
+    """
+
+    def __init__(
+        self, db_path: str = DB_PATH, store_path: str = STORE_PATH, jurisdictions: Optional[JurisdictionStore] = None
+    ):
+        self.db_path = db_path
+        self.store_path = store_path
+        self.jurisdictions = jurisdictions or JurisdictionStore(db_path, store_path)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.store_path, isolation_level=None, timeout=10)
+            ensure_estimates_table(conn)
+            self._local.conn = conn
+        return conn
+
+    def _table_generation(self) -> int:
+        # Generation the jurisdiction table was built from (0 before the first build)
+        row = self._conn().execute(f"SELECT generation FROM {JURISDICTIONS_TABLE} LIMIT 1").fetchone()
+        return int(row[0]) if row else 0
+
+    def save(self, estimate: dict, source: str = "", generation: Optional[int] = None) -> int:
+        """
+        Store an estimate dict (build_estimate / estimate_for_jurisdiction)
+        and return its id. Saving the same address, match, price and tax
+        type again updates the existing row. `generation` is the millage
+        generation its rate came from, by default the jurisdiction table's.
+        """
+        self.jurisdictions.refresh()
+        conn = self._conn()
+        if generation is None:
+            generation = self._table_generation()
+        now = time.time()
+        row = conn.execute(
+            f"""
+            INSERT INTO {ESTIMATES_TABLE} (
+                address_key, address, county, matched_key, price, tax_type,
+                millage_rate, annual, monthly, generation, source, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (address_key, matched_key, price, tax_type) DO UPDATE SET
+                address = excluded.address, county = excluded.county,
+                millage_rate = excluded.millage_rate, annual = excluded.annual, monthly = excluded.monthly,
+                generation = excluded.generation, key_missing = 0, source = excluded.source,
+                updated_at = excluded.updated_at
+            RETURNING id
+            """,
+            (
+                address_key(estimate["address"]), estimate["address"], estimate.get("county") or "",
+                estimate["matched_key"], float(estimate["price"]), estimate["tax_type"],
+                float(estimate["millage_rate"]), float(estimate["annual"]), float(estimate["monthly"]),
+                int(generation), source, now, now,
+            ),
+        ).fetchone()
+        return int(row[0])
+
+    def get(self, estimate_id: int) -> Optional[dict]:
+        conn = self._conn()
+        cur = conn.execute(f"SELECT * FROM {ESTIMATES_TABLE} WHERE id = ?", (estimate_id,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        return dict(zip((d[0] for d in cur.description), row))
+
+    def recompute(self, top: Optional[int] = None) -> dict:
+        """
+        Bring every estimate older than the current millage generation up to
+        date, in one transaction. Only estimates whose key changed since
+        their generation are looked at (all of them after a full reload).
+        Returns a report: counts plus the moved estimates with old/new
+        annual tax, largest change first (`top` of them if given).
+        """
+        # Rebuilt unconditionally: a shared store may not have looked at the import yet
+        self.jurisdictions.refresh(force=True)
+        conn = self._conn()
+        live = self._table_generation()
+        report = {
+            "generation": live, "checked": 0, "moved": 0, "unchanged": 0,
+            "key_missing": 0, "annual_delta": 0.0, "moves": [],
+        }
+        oldest = conn.execute(
+            f"SELECT MIN(generation) FROM {ESTIMATES_TABLE} WHERE generation < ?", (live,)
+        ).fetchone()[0]
+        if oldest is None:
+            return report
+
+        source = sqlite3.connect(self.db_path)
+        try:
+            changed = changes_since(source, oldest)[1] if table_exists(source, TABLE_NAME) else None
+        finally:
+            source.close()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            where = "e.generation < ?"
+            if changed is not None:
+                # Only keys touched by an import can have moved; the rest just move up a generation
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS changed_keys (combined_key TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM changed_keys")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO changed_keys VALUES (?)", ((k,) for k in _combined_keys(changed))
+                )
+                conn.execute(
+                    f"UPDATE {ESTIMATES_TABLE} SET generation = ? WHERE generation < ? "
+                    "AND matched_key NOT IN (SELECT combined_key FROM changed_keys)",
+                    (live, live),
+                )
+                where += " AND e.matched_key IN (SELECT combined_key FROM changed_keys)"
+
+            df = pd.read_sql_query(
+                "SELECT e.id, e.address, e.matched_key, e.tax_type, e.price, e.annual, "
+                "j.homestead_rate, j.non_homestead_rate, j.homestead_multiplier, j.non_homestead_multiplier "
+                f"FROM {ESTIMATES_TABLE} e LEFT JOIN {JURISDICTIONS_TABLE} j ON j.combined_key = e.matched_key "
+                f"WHERE {where}",
+                conn,
+                params=[live],
+            )
+
+            missing = df["homestead_rate"].isna().to_numpy()
+            homestead = (df["tax_type"] == "Homestead").to_numpy()
+            rate = np.where(homestead, df["homestead_rate"], df["non_homestead_rate"])
+            annual = df["price"].to_numpy() * np.where(
+                homestead, df["homestead_multiplier"], df["non_homestead_multiplier"]
+            )
+            old = df["annual"].to_numpy()
+            delta = annual - old
+            moved = ~missing & (np.abs(delta) >= CENT)
+
+            now = time.time()
+            conn.executemany(
+                f"UPDATE {ESTIMATES_TABLE} SET millage_rate = ?, annual = ?, monthly = ?, generation = ?, "
+                "key_missing = 0, updated_at = ? WHERE id = ?",
+                zip(
+                    rate[moved].tolist(), annual[moved].tolist(), (annual[moved] / 12.0).tolist(),
+                    [live] * int(moved.sum()), [now] * int(moved.sum()), df["id"][moved].tolist(),
+                ),
+            )
+            # Unmoved rows only change generation; rows whose key is gone keep their values, flagged
+            conn.executemany(
+                f"UPDATE {ESTIMATES_TABLE} SET generation = ?, key_missing = ? WHERE id = ?",
+                ((live, int(m), int(i)) for i, m in zip(df["id"][~moved], missing[~moved])),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        moves = df.loc[moved, ["id", "address", "matched_key", "tax_type", "price"]].assign(
+            old_annual=old[moved].round(2),
+            new_annual=annual[moved].round(2),
+            delta=delta[moved].round(2),
+            pct=np.round(100.0 * delta[moved] / np.where(old[moved] == 0, np.nan, old[moved]), 2),
+        )
+        moves = moves.reindex(moves["delta"].abs().sort_values(ascending=False).index)
+        if top is not None:
+            moves = moves.head(top)
+        report.update(
+            checked=len(df),
+            moved=int(moved.sum()),
+            unchanged=int((~moved & ~missing).sum()),
+            key_missing=int(missing.sum()),
+            annual_delta=round(float(delta[moved].sum()), 2),
+            moves=json.loads(moves.to_json(orient="records")),
+        )
+        return report
+
+
+def print_report(report: dict, top: int = 10) -> None:
+    print(
+        f"✅ Estimates at generation {report['generation']}: {report['checked']} checked, "
+        f"{report['moved']} moved (total {report['annual_delta']:+,.2f}/yr), "
+        f"{report['unchanged']} unchanged, {report['key_missing']} with a match no longer in the rates"
+    )
+    for m in report["moves"][:top]:
+        pct = f" ({m['pct']:+.2f}%)" if m["pct"] is not None else ""
+        print(
+            f"   {m['address']} [{m['tax_type']}, ${m['price']:,.0f}]: "
+            f"${m['old_annual']:,.2f} -> ${m['new_annual']:,.2f}{pct}"
+        )
+
+
+def recompute_after_import(db_file: str = DB_PATH, store_path: str = STORE_PATH) -> Optional[dict]:
+    """
+    Import scripts call this last. Nothing to do (None) when no estimate
+    has been saved yet.
+    """
+    if not os.path.exists(store_path):
+        return None
+    conn = sqlite3.connect(store_path)
+    try:
+        if not table_exists(conn, ESTIMATES_TABLE):
+            return None
+    finally:
+        conn.close()
+    report = EstimateStore(db_file, store_path).recompute()
+    print_report(report)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute saved estimates against the current millage rates")
+    parser.add_argument("db_file", nargs="?", default=DB_PATH)
+    parser.add_argument("--store", default=STORE_PATH, help="Runtime database holding the estimates")
+    parser.add_argument("--top", type=int, default=10, help="Moved estimates to print")
+    parser.add_argument("--output", help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    report = EstimateStore(args.db_file, args.store).recompute()
+    print_report(report, args.top)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}")
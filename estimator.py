@@ -0,0 +1,176 @@
+# estimator.py
+# The estimate itself, shared by the Streamlit button handler and non-UI
+# callers (load test): address lookup -> millage match -> tax math, or one
+# probe of the address memo for an address seen before.
+
+from typing import Callable, Optional, Tuple
+
+from jurisdictions import ASSESSED_RATIO, Jurisdiction, JurisdictionStore, tax_multiplier
+from millage_index import Match, MatchResults, MillageSnapshot, find_top_matches
+from spatial_resolver import SpatialResolver
+from tracing import span, trace
+
+
+def calc_taxes(price: float, millage_rate_mills: float):
+    assessed = price * ASSESSED_RATIO
+    # Same multiplier as the jurisdiction table, so memo and lookup estimates match exactly
+    annual = price * tax_multiplier(millage_rate_mills)
+    monthly = annual / 12.0
+    return assessed, annual, monthly
+
+
+def millage_rate_for(match: Match, tax_type: str) -> float:
+    if tax_type == "Homestead":
+        return match.homestead_rate
+    return match.non_homestead_rate
+
+
+def build_estimate(address: str, price: float, tax_type: str, county: str, match: Match) -> dict:
+    """
+    The result dict the UI keeps in st.session_state["last_result"].
+    """
+    millage_rate = millage_rate_for(match, tax_type)
+    assessed, annual, monthly = calc_taxes(price, millage_rate)
+    return {
+        "address": address,
+        "price": float(price),
+        "tax_type": tax_type,
+        "county": county,
+        "matched_key": match.combined_key,
+        "match_score": match.score,
+        "millage_rate": float(millage_rate),
+        "assessed": float(assessed),
+        "annual": float(annual),
+        "monthly": float(monthly),
+    }
+
+
+def estimate_for_jurisdiction(
+    address: str, price: float, tax_type: str, county: str, jurisdiction: Jurisdiction, match_score: Optional[int]
+) -> dict:
+    """
+    Same dict as build_estimate, from the materialized jurisdiction row:
+    the annual tax is price times the precomputed multiplier.
+    """
+    if tax_type == "Homestead":
+        millage_rate, multiplier = jurisdiction.homestead_rate, jurisdiction.homestead_multiplier
+    else:
+        millage_rate, multiplier = jurisdiction.non_homestead_rate, jurisdiction.non_homestead_multiplier
+    annual = float(price) * multiplier
+    return {
+        "address": address,
+        "price": float(price),
+        "tax_type": tax_type,
+        "county": county,
+        "matched_key": jurisdiction.combined_key,
+        "match_score": match_score if match_score is not None else 0,
+        "millage_rate": millage_rate,
+        "assessed": float(price) * ASSESSED_RATIO,
+        "annual": annual,
+        "monthly": annual / 12.0,
+    }
+
+
+def match_scraped(
+    scraped: dict, snapshot: MillageSnapshot, top_n: int = 8, on_county: Optional[Callable[[str], None]] = None
+) -> Tuple[str, Optional[MatchResults], str]:
+    """
+    Rank the millage rows for a successful lookup result: (county, top
+    matches, error). `on_county` gets the county once matching starts.
+    Shared by estimate_taxes and the UI's background lookups.
+    """
+    township = (scraped.get("township") or "").strip()
+    school = (scraped.get("school_district") or scraped.get("school") or "").strip()
+    county = (scraped.get("county") or "").strip()
+    if not township or not school:
+        return county, None, "Could not extract township and/or school district from that address."
+    if on_county is not None:
+        on_county(county)
+
+    _, top = find_top_matches(
+        snapshot.df, township, school, top_n=top_n, county=county, partitions=snapshot.partitions
+    )
+    if top.empty:
+        return county, None, "No millage rows to match against"
+    return county, top, ""
+
+
+def resolve_location(resolver: Optional[SpatialResolver], location: Optional[Tuple[float, float]]) -> Optional[dict]:
+    """
+    The lookup dict for a (lat, lon) from the boundary files, or None when
+    there is no resolver or location, or the point is outside every place
+    or every school district - callers then fall back to a lookup.
+    """
+    if resolver is None or location is None:
+        return None
+    with span("spatial") as ss:
+        scraped = resolver.resolve(*location)
+        complete = bool(scraped.get("township") and scraped.get("school_district"))
+        ss.set(hit=complete, error=scraped.get("error"))
+    return scraped if complete else None
+
+
+def estimate_taxes(
+    address: str,
+    price: float,
+    tax_type: str,
+    snapshot: MillageSnapshot,
+    lookup: Callable[..., dict],
+    top_n: int = 8,
+    headless: bool = True,
+    jurisdictions: Optional[JurisdictionStore] = None,
+    location: Optional[Tuple[float, float]] = None,
+    resolver: Optional[SpatialResolver] = None,
+    runner=None,
+) -> dict:
+    """
+    Run the "Estimate Taxes" flow without the UI, taking the top match.
+    Returns {"scraped", "top", "estimate"} or {"scraped", "error"}. With a
+    JurisdictionStore, a remembered address skips lookup and matching
+    (scraped["_method"] is "Address memo", no "top"), and new matches are
+    remembered. With a (lat, lon) location and a SpatialResolver, the
+    boundary files stand in for the lookup; a point they leave without a
+    township or school district falls back to `lookup`. With a
+    lookup_jobs.LookupRunner, lookup and matching run as a background job
+    the way the UI button runs them (queued for a LOOKUP_WORKERS slot) and
+    the call waits for it. The result carries the request's "trace_id".
+    """
+    with trace("estimate", address=address.strip(), tax_type=tax_type) as root:
+        result = _estimate_taxes(
+            address, price, tax_type, snapshot, lookup, top_n, headless, jurisdictions, location, resolver, runner
+        )
+        result["trace_id"] = root.trace_id
+        root.set(method=result["scraped"].get("_method"), error=result.get("error"))
+        return result
+
+
+def _estimate_taxes(
+    address, price, tax_type, snapshot, lookup, top_n, headless, jurisdictions, location, resolver, runner
+) -> dict:
+    if jurisdictions is not None:
+        with span("memo") as ms:
+            known = jurisdictions.lookup_address(address)
+            ms.set(hit=bool(known))
+        if known:
+            jurisdiction, county, score = known
+            return {
+                "scraped": {"county": county, "_method": "Address memo"},
+                "estimate": estimate_for_jurisdiction(address.strip(), price, tax_type, county, jurisdiction, score),
+            }
+
+    scraped = resolve_location(resolver, location)
+    if scraped is None and runner is not None:
+        job = runner.submit(address.strip(), lookup, snapshot, headless=headless, top_n=top_n)
+        job.future.result()
+        scraped, county, top, error = job.scraped or {}, job.county, job.top, job.error
+    else:
+        if scraped is None:
+            scraped = lookup(address.strip(), headless=headless)
+        if isinstance(scraped, dict) and "error" in scraped:
+            return {"scraped": scraped, "error": scraped["error"]}
+        county, top, error = match_scraped(scraped, snapshot, top_n)
+    if error:
+        return {"scraped": scraped, "error": error}
+    if jurisdictions is not None:
+        jurisdictions.remember(address, top[0].combined_key, county, top[0].score)
+    return {"scraped": scraped, "top": top, "estimate": build_estimate(address.strip(), price, tax_type, county, top[0])}
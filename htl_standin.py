@@ -0,0 +1,124 @@
+# htl_standin.py
+# Offline stand-in for michigan.hometownlocator.com, serving the saved
+# page.html so the lookup stack can be exercised without the real site.
+#
+# Usage: python htl_standin.py [--port 8765] [--latency 0.2] [--list-rate 0.2] [--empty-rate 0.0]
+# then run the app or load_test.py with HTL_BASE_URL=http://127.0.0.1:8765/
+
+import argparse
+import hashlib
+import html
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, quote_plus, urlparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULT_PAGE = os.path.join(HERE, "page.html")
+
+HOME_HTML = """<html><body>
+<form action="/maps/address-lookup.cfm" method="get">
+<input type="text" name="addr" class="address_input localsearchmapfield">
+</form>
+</body></html>"""
+
+LIST_HTML = """<html><body><div class="list-group">
+<a href="/maps/result.cfm?addr={q}">{addr}</a>
+<a href="/maps/result.cfm?addr=other">100 Other St, Lansing, MI</a>
+</div></body></html>"""
+
+EMPTY_HTML = "<html><body><p>No results for that address.</p></body></html>"
+
+
+def _fraction(address: str) -> float:
+    # Stable per address, so a given address always takes the same path
+    digest = hashlib.md5(address.encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) / 0xFFFFFFFF
+
+
+class StandinConfig:
+    def __init__(self, latency: float = 0.0, list_rate: float = 0.0, empty_rate: float = 0.0):
+        self.latency = latency
+        self.list_rate = list_rate
+        self.empty_rate = empty_rate
+        with open(RESULT_PAGE, encoding="utf-8", errors="replace") as f:
+            self.result_html = f.read()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+
+def _make_handler(config: StandinConfig):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: str, cookie: Optional[str] = None) -> None:
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            if cookie:
+                self.send_header("Set-Cookie", cookie)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _route(self) -> Tuple[int, str]:
+            url = urlparse(self.path)
+            addr = (parse_qs(url.query).get("addr") or [""])[0]
+            if url.path == "/maps/address-lookup.cfm":
+                frac = _fraction(addr)
+                if frac < config.empty_rate:
+                    return 200, EMPTY_HTML
+                if frac < config.empty_rate + config.list_rate:
+                    return 200, LIST_HTML.format(q=quote_plus(addr), addr=html.escape(addr))
+                return 200, config.result_html
+            if url.path == "/maps/result.cfm":
+                return 200, config.result_html
+            return 404, "not found"
+
+        def do_GET(self):
+            config.count()
+            if config.latency:
+                time.sleep(config.latency)
+            if urlparse(self.path).path == "/":
+                self._send(200, HOME_HTML, cookie="CFID=standin; Path=/")
+                return
+            status, body = self._route()
+            self._send(status, body)
+
+    return Handler
+
+
+def start_standin(
+    port: int = 0, latency: float = 0.0, list_rate: float = 0.0, empty_rate: float = 0.0
+) -> Tuple[ThreadingHTTPServer, StandinConfig]:
+    """
+    Serve in a background thread; returns (server, config). The base URL is
+    http://127.0.0.1:{server.server_address[1]}/
+    """
+    config = StandinConfig(latency, list_rate, empty_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, config
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline hometownlocator stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--list-rate", type=float, default=0.0, help="fraction of lookups answered with a list page")
+    parser.add_argument("--empty-rate", type=float, default=0.0, help="fraction of lookups with no result sections")
+    args = parser.parse_args()
+    server, _ = start_standin(args.port, args.latency, args.list_rate, args.empty_rate)
+    print(f"✅ Stand-in serving on http://127.0.0.1:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,17 +1,37 @@
-import pandas as pd
+import argparse
 import sqlite3
 
-# Load your cleaned Excel file
-excel_file = "All_Millage_Rates.xlsx"
-df = pd.read_excel(excel_file)
+import pandas as pd
+
+from estimate_store import recompute_after_import
+from incremental_import import prepare_rows
+from millage_store import COUNTY_COLUMN, quote_ident, record_generation
+
+parser = argparse.ArgumentParser(description="Replace the millage table with a workbook")
+parser.add_argument("excel_file", nargs="?", default="All_Millage_Rates.xlsx")
+parser.add_argument("db_file", nargs="?", default="all_millage_rates.db")
+parser.add_argument("--county", default="", help="County for sheets without a County column")
+args = parser.parse_args()
+
+# Load your cleaned Excel file, projected onto the table columns (County included)
+excel_file = args.excel_file
+df = prepare_rows(pd.read_excel(excel_file), args.county)
 
 # Connect to SQLite (creates a new file if it doesn't exist)
-conn = sqlite3.connect("all_millage_rates.db")
+conn = sqlite3.connect(args.db_file)
 
 # Save the DataFrame as a table named 'millage'
 df.to_sql("millage", conn, if_exists="replace", index=False)
+conn.execute(f"CREATE INDEX IF NOT EXISTS idx_millage_county ON millage({quote_ident(COUNTY_COLUMN)})")
+
+# Tell running apps to drop their in-memory copy and re-read the table
+# (use incremental_import.py to only rewrite changed rows)
+record_generation(conn, rows_written=len(df), source=excel_file, full_reload=True)
 
 conn.commit()
 conn.close()
 
-print("✅ Excel converted to SQLite database (all_millage_rates.db)")
+print(f"✅ Excel converted to SQLite database ({args.db_file})")
+
+# Bring saved estimates up to the new rates
+recompute_after_import(args.db_file)
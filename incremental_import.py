@@ -0,0 +1,152 @@
+# incremental_import.py
+# Refresh all_millage_rates.db from All_Millage_Rates.xlsx without dropping the
+# table: only (county, township, school) groups whose rates changed are
+# rewritten, and the change is recorded as a new generation the running app
+# can apply in place.
+#
+# Usage: python incremental_import.py [excel_file] [db_file] [--county NAME]
+
+import argparse
+import sqlite3
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from estimate_store import recompute_after_import
+from millage_store import (
+    COUNTY_COLUMN,
+    DB_PATH,
+    KEY_COLUMNS,
+    RATE_COLUMNS,
+    REQUIRED_COLUMNS,
+    TABLE_COLUMNS,
+    TABLE_NAME,
+    create_millage_table,
+    ensure_county_column,
+    quote_ident,
+    record_generation,
+    table_exists,
+)
+
+EXCEL_FILE = "All_Millage_Rates.xlsx"
+
+# Rates are stored with 4 decimals in the county sheets
+RATE_DECIMALS = 4
+
+
+def _group_signatures(df: pd.DataFrame) -> Dict[Tuple[str, str, str], tuple]:
+    """
+    Map each (county, township, school) key to a sorted tuple of its rate rows.
+    Keys can repeat (special assessment rows, or unknown counties), so a key
+    is compared as a whole group rather than row by row.
+    """
+    rates = df[RATE_COLUMNS].astype(float).round(RATE_DECIMALS)
+    keys = df[KEY_COLUMNS].astype(str)
+    groups: Dict[Tuple[str, str, str], list] = {}
+    for key, rate in zip(keys.itertuples(index=False, name=None), rates.itertuples(index=False, name=None)):
+        groups.setdefault(key, []).append(rate)
+    return {k: tuple(sorted(v)) for k, v in groups.items()}
+
+
+def diff_millage(old: pd.DataFrame, new: pd.DataFrame) -> List[Tuple[str, str, str]]:
+    """
+    Return the keys that were added, removed or whose rates changed.
+    """
+    old_sig = _group_signatures(old)
+    new_sig = _group_signatures(new)
+    changed = [k for k, sig in new_sig.items() if old_sig.get(k) != sig]
+    changed += [k for k in old_sig if k not in new_sig]
+    return sorted(changed)
+
+
+def prepare_rows(df: pd.DataFrame, county: str = "") -> pd.DataFrame:
+    """
+    Project a source sheet onto the table columns. A sheet without a County
+    column gets `county` for every row.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Excel file is missing columns: {missing}")
+    df = df.copy()
+    if COUNTY_COLUMN not in df.columns:
+        df[COUNTY_COLUMN] = county
+    df = df[TABLE_COLUMNS]
+    df[KEY_COLUMNS] = df[KEY_COLUMNS].fillna("").astype(str).apply(lambda col: col.str.strip())
+    return df
+
+
+def apply_increment(conn: sqlite3.Connection, new: pd.DataFrame, source: str = "", county: str = "") -> dict:
+    """
+    Write the rows for changed keys and bump the generation, all in one transaction.
+    """
+    new = prepare_rows(new, county)
+
+    cols = ", ".join(quote_ident(c) for c in TABLE_COLUMNS)
+    placeholders = ", ".join("?" for _ in TABLE_COLUMNS)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not table_exists(conn, TABLE_NAME):
+            # First import: table, rows and generation in this one transaction
+            create_millage_table(conn, TABLE_NAME)
+            conn.executemany(
+                f"INSERT INTO {quote_ident(TABLE_NAME)} ({cols}) VALUES ({placeholders})",
+                list(new.itertuples(index=False, name=None)),
+            )
+            generation = record_generation(conn, rows_written=len(new), source=source, full_reload=True)
+            conn.execute("COMMIT")
+            return {"generation": generation, "keys_changed": len(new), "rows_written": len(new)}
+
+        ensure_county_column(conn, TABLE_NAME)
+        old = pd.read_sql_query(f"SELECT {cols} FROM {quote_ident(TABLE_NAME)}", conn)
+        changed = diff_millage(old, new)
+        if not changed:
+            conn.execute("ROLLBACK")
+            return {"generation": None, "keys_changed": 0, "rows_written": 0}
+
+        where = " AND ".join(f"{quote_ident(c)} = ?" for c in KEY_COLUMNS)
+        conn.executemany(f"DELETE FROM {quote_ident(TABLE_NAME)} WHERE {where}", changed)
+
+        changed_set = set(changed)
+        mask = [k in changed_set for k in new[KEY_COLUMNS].itertuples(index=False, name=None)]
+        rows = list(new[mask].itertuples(index=False, name=None))
+        conn.executemany(f"INSERT INTO {quote_ident(TABLE_NAME)} ({cols}) VALUES ({placeholders})", rows)
+
+        generation = record_generation(conn, keys=changed, rows_written=len(rows), source=source)
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+    return {"generation": generation, "keys_changed": len(changed), "rows_written": len(rows)}
+
+
+def main(excel_file: str = EXCEL_FILE, db_file: str = DB_PATH, county: str = "") -> None:
+    df = pd.read_excel(excel_file)
+
+    # Autocommit mode so apply_increment controls the transaction itself
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    try:
+        summary = apply_increment(conn, df, source=excel_file, county=county)
+    finally:
+        conn.close()
+
+    if summary["generation"] is None:
+        print(f"✅ No changes in {excel_file}; {db_file} is up to date")
+    else:
+        print(
+            f"✅ Generation {summary['generation']}: "
+            f"{summary['keys_changed']} county/township/school keys changed, "
+            f"{summary['rows_written']} rows written to {db_file}"
+        )
+        recompute_after_import(db_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally import a millage workbook")
+    parser.add_argument("excel_file", nargs="?", default=EXCEL_FILE)
+    parser.add_argument("db_file", nargs="?", default=DB_PATH)
+    parser.add_argument("--county", default="", help="County for sheets without a County column")
+    args = parser.parse_args()
+    main(args.excel_file, args.db_file, args.county)
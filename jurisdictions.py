@@ -0,0 +1,217 @@
+# jurisdictions.py
+# Materialized per-jurisdiction tax table keyed by Combined Key, plus an
+# address -> jurisdiction memo. The tax is linear in price, so once an
+# address is tied to a jurisdiction an estimate is one indexed probe and a
+# multiply - no scrape, no fuzzy matching.
+#
+# Both tables live in their own database next to the millage one (written
+# at runtime, unlike the imported rate data). The jurisdiction table is
+# rebuilt whenever the millage generation moves, so memoized addresses
+# always see the current rates.
+
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional, Tuple
+
+from millage_store import (
+    DB_PATH,
+    TABLE_COLUMNS,
+    TABLE_NAME,
+    current_generation,
+    quote_ident,
+    select_columns,
+    table_exists,
+)
+
+# Michigan assessed (taxable) value is taken as 45% of the property value
+ASSESSED_RATIO = 0.45
+
+STORE_PATH = "jurisdictions.db"
+JURISDICTIONS_TABLE = "jurisdictions"
+ADDRESS_MEMO_TABLE = "address_jurisdictions"
+
+
+class Jurisdiction(NamedTuple):
+    combined_key: str
+    county: str
+    township: str
+    school: str
+    homestead_rate: float
+    non_homestead_rate: float
+    # Annual tax per dollar of property value
+    homestead_multiplier: float
+    non_homestead_multiplier: float
+
+
+_JURISDICTION_COLUMNS = ", ".join(Jurisdiction._fields)
+
+
+def tax_multiplier(rate_mills: float, assessed_ratio: float = ASSESSED_RATIO) -> float:
+    """
+    Annual tax per dollar of property value. Every estimate path multiplies
+    the price by this, so they agree to the last bit.
+    """
+    return assessed_ratio * float(rate_mills) / 1000.0
+
+
+def address_key(address: str) -> str:
+    return " ".join((address or "").lower().split())
+
+
+def ensure_jurisdiction_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {JURISDICTIONS_TABLE} (
+            combined_key TEXT PRIMARY KEY,
+            county TEXT NOT NULL,
+            township TEXT NOT NULL,
+            school TEXT NOT NULL,
+            homestead_rate REAL NOT NULL,
+            non_homestead_rate REAL NOT NULL,
+            homestead_multiplier REAL NOT NULL,
+            non_homestead_multiplier REAL NOT NULL,
+            source_rows INTEGER NOT NULL,
+            generation INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {ADDRESS_MEMO_TABLE} (
+            address_key TEXT PRIMARY KEY,
+            combined_key TEXT NOT NULL,
+            county TEXT NOT NULL DEFAULT '',
+            match_score INTEGER,
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def materialize_jurisdictions(
+    source: sqlite3.Connection, conn: sqlite3.Connection, assessed_ratio: float = ASSESSED_RATIO
+) -> int:
+    """
+    Rebuild the jurisdiction table in `conn` (inside the caller's
+    transaction) from the millage table in `source`. Keys shared by several
+    rate rows keep the first in table order - the one find_top_matches
+    ranks first on a tie. Rows without both rates are left out. Returns the
+    number of keys.
+    """
+    ensure_jurisdiction_tables(conn)
+    generation = current_generation(source)
+    cols = select_columns(source, TABLE_NAME, TABLE_COLUMNS)
+    rows = source.execute(f"SELECT {cols} FROM {quote_ident(TABLE_NAME)} ORDER BY rowid")
+
+    by_key = {}
+    counts = {}
+    for county, township, school, homestead, non_homestead in rows:
+        county, township, school = (str(v) if v is not None else "" for v in (county, township, school))
+        # Same format as millage_index.combined_key
+        key = f"{township} - {school} ({county})" if county else f"{township} - {school}"
+        counts[key] = counts.get(key, 0) + 1
+        if key in by_key or homestead is None or non_homestead is None:
+            continue
+        by_key[key] = (
+            key, county, township, school, float(homestead), float(non_homestead),
+            tax_multiplier(homestead, assessed_ratio), tax_multiplier(non_homestead, assessed_ratio),
+        )
+
+    conn.execute(f"DELETE FROM {JURISDICTIONS_TABLE}")
+    conn.executemany(
+        f"INSERT INTO {JURISDICTIONS_TABLE} ({_JURISDICTION_COLUMNS}, source_rows, generation) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (row + (counts[row[0]], generation) for row in by_key.values()),
+    )
+    return len(by_key)
+
+
+class JurisdictionStore:
+    """
+    Probe side of the two tables, safe to share across Streamlit sessions
+    (one SQLite connection per thread).
+    """
+
+    def __init__(self, db_path: str = DB_PATH, store_path: str = STORE_PATH, check_interval: float = 5.0):
+        self.db_path = db_path
+        self.store_path = store_path
+        self.check_interval = check_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._built_generation: Optional[int] = None
+        self._last_check = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.store_path, isolation_level=None, timeout=10)
+            ensure_jurisdiction_tables(conn)
+            self._local.conn = conn
+        return conn
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Rebuild the jurisdiction table if the millage generation moved since
+        it was built (checked at most every check_interval seconds).
+        """
+        now = time.monotonic()
+        if not force and self._built_generation is not None and now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            self._last_check = now
+            conn = self._conn()
+            source = sqlite3.connect(self.db_path)
+            try:
+                if not table_exists(source, TABLE_NAME):
+                    return
+                live = current_generation(source)
+                row = conn.execute(f"SELECT generation FROM {JURISDICTIONS_TABLE} LIMIT 1").fetchone()
+                if row is not None and row[0] == live and not force:
+                    self._built_generation = live
+                    return
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    materialize_jurisdictions(source, conn)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                self._built_generation = live
+            finally:
+                source.close()
+
+    def get(self, combined_key: str) -> Optional[Jurisdiction]:
+        self.refresh()
+        row = self._conn().execute(
+            f"SELECT {_JURISDICTION_COLUMNS} FROM {JURISDICTIONS_TABLE} WHERE combined_key = ?", (combined_key,)
+        ).fetchone()
+        return Jurisdiction(*row) if row else None
+
+    def lookup_address(self, address: str) -> Optional[Tuple[Jurisdiction, str, Optional[int]]]:
+        """
+        (Jurisdiction, scraped county, match score) remembered for this
+        address, or None. A memo whose key no longer exists after an import
+        is a miss.
+        """
+        self.refresh()
+        cols = ", ".join(f"j.{c}" for c in Jurisdiction._fields)
+        row = self._conn().execute(
+            f"SELECT {cols}, m.county, m.match_score FROM {ADDRESS_MEMO_TABLE} m "
+            f"JOIN {JURISDICTIONS_TABLE} j ON j.combined_key = m.combined_key "
+            "WHERE m.address_key = ?",
+            (address_key(address),),
+        ).fetchone()
+        if row is None:
+            return None
+        return Jurisdiction(*row[:-2]), row[-2], row[-1]
+
+    def remember(self, address: str, combined_key: str, county: str = "", match_score: Optional[int] = None) -> None:
+        self._conn().execute(
+            f"INSERT OR REPLACE INTO {ADDRESS_MEMO_TABLE} "
+            "(address_key, combined_key, county, match_score, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (address_key(address), combined_key, county or "", match_score, time.time()),
+        )
+
+    def forget(self, address: str) -> None:
+        self._conn().execute(f"DELETE FROM {ADDRESS_MEMO_TABLE} WHERE address_key = ?", (address_key(address),))
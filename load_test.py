@@ -0,0 +1,271 @@
+# load_test.py
+# Multi-user load test of the "Estimate Taxes" flow (address lookup -> millage
+# match -> tax math) against the offline hometownlocator stand-in. Lookups go
+# through the same LookupRunner queue as the UI button (LOOKUP_WORKERS slots),
+# so concurrency above that measures queueing too. Writes a
+# JSON report (sorted keys, one run per concurrency level) meant to be
+# diffed between versions.
+#
+# Usage: python load_test.py [--concurrency 1,4,8] [--requests 50 | --duration 30]
+#        [--base-url URL] [--latency 0.2] [--list-rate 0.2] [--output load_report.json]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from proc_stats import browser_pids, tree_rss_bytes
+
+REPORT_FILE = "load_report.json"
+
+STREETS = ["Main St", "Oak Ave", "Grand River Ave", "Michigan Ave", "Saginaw St", "Washtenaw Ave"]
+CITIES = ["Lansing", "East Lansing", "Okemos", "Haslett", "Williamston", "Mason"]
+
+
+def make_address(i: int, repeat: int = 0) -> str:
+    # Unique by default so the address cache does not hide the lookup cost
+    n = i % repeat if repeat else i
+    return f"{100 + n} {STREETS[n % len(STREETS)]}, {CITIES[n % len(CITIES)]}, MI 48823"
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class ResourceSampler:
+    """
+    Polls RSS of this process tree and the number of live browser/driver
+    processes in the background, keeping the peaks.
+    """
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_browsers: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self) -> None:
+        self.peak_rss = max(self.peak_rss, tree_rss_bytes())
+        browsers = browser_pids()
+        if browsers is not None:
+            self.peak_browsers = max(self.peak_browsers or 0, len(browsers))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def run_level(
+    concurrency: int,
+    n_requests: int,
+    duration: float,
+    snapshot,
+    lookup,
+    repeat: int,
+    start_index: int,
+    jurisdictions=None,
+    runner=None,
+) -> dict:
+    from estimator import estimate_taxes
+
+    latencies: List[float] = []
+    methods: Dict[str, int] = {}
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    counter = [start_index]
+    deadline = time.monotonic() + duration if duration else None
+    issued = [0]
+
+    def next_index() -> Optional[int]:
+        with lock:
+            if deadline is not None:
+                if time.monotonic() >= deadline:
+                    return None
+            elif issued[0] >= n_requests:
+                return None
+            issued[0] += 1
+            counter[0] += 1
+            return counter[0]
+
+    def user() -> None:
+        while True:
+            i = next_index()
+            if i is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                result = estimate_taxes(
+                    make_address(i, repeat), 250000, "Homestead", snapshot, lookup,
+                    jurisdictions=jurisdictions, runner=runner,
+                )
+                error = result.get("error")
+                method = result["scraped"].get("_method", "") if isinstance(result["scraped"], dict) else ""
+            except Exception as e:
+                error, method = f"{e.__class__.__name__}: {e}", ""
+            elapsed = time.perf_counter() - t0
+            with lock:
+                latencies.append(elapsed)
+                if error:
+                    key = str(error)[:80]
+                    errors[key] = errors.get(key, 0) + 1
+                else:
+                    methods[method or "unknown"] = methods.get(method or "unknown", 0) + 1
+
+    with ResourceSampler() as sampler:
+        t_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for _ in range(concurrency):
+                pool.submit(user)
+        wall = time.perf_counter() - t_start
+
+    latencies.sort()
+    done = len(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": done,
+        "errors": sum(errors.values()),
+        "error_kinds": errors,
+        "methods": methods,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(done / wall, 2) if wall else None,
+        "latency_ms": {
+            name: None if percentile(latencies, p) is None else round(percentile(latencies, p) * 1000, 1)
+            for name, p in (("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "peak_rss_mb": round(sampler.peak_rss / 1024 / 1024, 1),
+        "peak_browser_processes": sampler.peak_browsers,
+    }
+
+
+def _report_resources(status: dict) -> dict:
+    # Drop the time-stamped / per-lookup parts so reports diff cleanly
+    return {k: v for k, v in status.items() if k not in ("last_reap", "recent_lookups", "rss_mb")}
+
+
+def _git_version() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True, text=True, timeout=10, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def main(args) -> dict:
+    server = config = None
+    base_url = args.base_url
+    if not base_url:
+        from htl_standin import start_standin
+
+        server, config = start_standin(0, args.latency, args.list_rate, args.empty_rate)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    # Must be set before cloud_scraper is imported (URLs are read at import)
+    os.environ["HTL_BASE_URL"] = base_url
+    import cloud_scraper
+    from lookup_jobs import LOOKUP_WORKERS, LookupRunner
+    from millage_index import MillageIndex
+    from millage_store import DB_PATH
+
+    snapshot = MillageIndex(args.db).snapshot()
+    jurisdictions = None
+    if args.memo:
+        import tempfile
+
+        from jurisdictions import JurisdictionStore
+
+        # Fresh memo per run, so every run starts cold
+        memo_path = os.path.join(tempfile.mkdtemp(prefix="loadtest_"), "jurisdictions.db")
+        jurisdictions = JurisdictionStore(args.db, memo_path)
+    lookup = cloud_scraper.get_township_school_from_address
+    runner = LookupRunner()
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    runs = []
+    index = 0
+    for level in levels:
+        before = config.requests if config else None
+        run = run_level(
+            level, args.requests, args.duration, snapshot, lookup, args.repeat, index, jurisdictions, runner
+        )
+        if config:
+            run["standin_requests"] = config.requests - before
+        index += run["requests"]
+        runs.append(run)
+        lat = run["latency_ms"]
+        print(
+            f"c={level:<3} {run['requests']:>5} req  {run['throughput_rps']} req/s  "
+            f"p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms  errors={run['errors']}  "
+            f"rss={run['peak_rss_mb']}MB  browsers={run['peak_browser_processes']}"
+        )
+
+    report = {
+        "version": _git_version(),
+        "python": sys.version.split()[0],
+        "config": {
+            "base_url": "standin" if server else base_url,
+            "latency_s": args.latency if server else None,
+            "list_rate": args.list_rate if server else None,
+            "empty_rate": args.empty_rate if server else None,
+            "requests_per_level": None if args.duration else args.requests,
+            "duration_s": args.duration or None,
+            "repeat_addresses": args.repeat,
+            "address_memo": args.memo,
+            "lookup_workers": LOOKUP_WORKERS,
+            "millage_rows": len(snapshot.df),
+            "db": os.path.basename(args.db or DB_PATH),
+        },
+        "backends": cloud_scraper.get_backend_status(),
+        "resources": _report_resources(cloud_scraper.get_resource_status()),
+        "runs": runs,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✅ Report written to {args.output}")
+
+    runner.shutdown()
+    if server:
+        server.shutdown()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the tax estimation flow")
+    parser.add_argument("--concurrency", default="1,4,8", help="comma-separated concurrent users per run")
+    parser.add_argument("--requests", type=int, default=50, help="estimates per concurrency level")
+    parser.add_argument("--duration", type=float, default=0.0, help="run each level for N seconds instead")
+    parser.add_argument("--repeat", type=int, default=0, help="cycle through N addresses (exercises the cache)")
+    parser.add_argument("--base-url", default="", help="use a running stand-in instead of starting one")
+    parser.add_argument("--latency", type=float, default=0.1, help="stand-in response latency in seconds")
+    parser.add_argument("--list-rate", type=float, default=0.2, help="stand-in list-page fraction")
+    parser.add_argument("--empty-rate", type=float, default=0.0, help="stand-in no-result fraction")
+    parser.add_argument("--memo", action="store_true", help="use the address -> jurisdiction memo")
+    parser.add_argument("--db", default="all_millage_rates.db")
+    parser.add_argument("--output", default=REPORT_FILE)
+    main(parser.parse_args())
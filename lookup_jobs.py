@@ -0,0 +1,140 @@
+# lookup_jobs.py
+# Background address lookups for the UI. A lookup (scrape + millage match)
+# runs on a shared thread pool while the Streamlit session stays
+# interactive; the page polls the LookupJob for its current stage and shows
+# the county and top matches as soon as they exist.
+#
+# The scrapers call report_stage() as they move through cache -> HTTP ->
+# browser; it updates the job running in the current context and is a
+# no-op everywhere else (load test, scripts).
+#
+# LOOKUP_WORKERS   concurrent lookups across all sessions, default 4
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Tuple
+
+from estimator import match_scraped
+from millage_index import MatchResults, MillageSnapshot
+from tracing import current_trace_id, new_trace_id, trace
+
+LOOKUP_WORKERS = int(os.environ.get("LOOKUP_WORKERS", "4"))
+
+PENDING, DONE, FAILED = "pending", "done", "failed"
+
+_current_job: ContextVar[Optional["LookupJob"]] = ContextVar("lookup_job", default=None)
+
+
+class LookupJob:
+    """
+    One submitted lookup. Written by the worker thread, read by the page;
+    fields are only ever replaced, never mutated in place.
+    """
+
+    def __init__(self, address: str, trace_id: Optional[str] = None):
+        self.job_id = new_trace_id()[:8]
+        self.trace_id = trace_id or new_trace_id()
+        self.address = address
+        self.submitted = time.time()
+        self.finished: Optional[float] = None
+        self.state = PENDING
+        self.stage = "queued"
+        self.detail = "Waiting for a free lookup worker..."
+        self.scraped: Optional[dict] = None
+        self.county = ""
+        self.top: Optional[MatchResults] = None
+        self.error = ""
+        self.future: Optional[Future] = None
+        # Match the page last remembered for this address (set by the page)
+        self.chosen_key: Optional[str] = None
+        self._history: List[Tuple[float, str, str]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.state != PENDING
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.time()) - self.submitted
+
+    def set_stage(self, stage: str, detail: str = "") -> None:
+        with self._lock:
+            self._history = self._history + [(round(self.elapsed, 2), stage, detail)]
+        self.stage, self.detail = stage, detail
+
+    def history(self) -> List[dict]:
+        return [{"seconds": t, "stage": s, "detail": d} for t, s, d in self._history]
+
+
+def report_stage(stage: str, detail: str = "") -> None:
+    """
+    Progress from inside a lookup (e.g. "cache", "http", "selenium").
+    """
+    job = _current_job.get()
+    if job is not None:
+        job.set_stage(stage, detail)
+
+
+def run_lookup(
+    job: LookupJob, lookup: Callable[..., dict], snapshot: MillageSnapshot, headless: bool = True, top_n: int = 8
+) -> LookupJob:
+    """
+    Scrape the address and rank the millage rows; the body of a job. The
+    county becomes visible as soon as the scrape returns, before matching.
+    """
+    token = _current_job.set(job)
+    try:
+        with trace("lookup_job", trace_id=job.trace_id, address=job.address) as root:
+            job.set_stage("lookup", "Starting address lookup...")
+            scraped = lookup(job.address, headless=headless)
+            job.scraped = scraped
+            if isinstance(scraped, dict) and "error" in scraped:
+                job.error = scraped["error"]
+                return job
+
+            def county_found(county: str) -> None:
+                job.county = county
+                job.set_stage("match", "Finding best millage rate matches...")
+
+            county, top, error = match_scraped(scraped, snapshot, top_n, on_county=county_found)
+            if error:
+                job.county = county
+                job.error = error
+                return job
+            job.top = top
+            root.set(method=scraped.get("_method"))
+            return job
+    except Exception as e:
+        job.error = f"Lookup failed: {e}"
+        return job
+    finally:
+        job.finished = time.time()
+        job.set_stage("failed" if job.error else "done", job.error or "Lookup complete")
+        job.state = FAILED if job.error else DONE
+        _current_job.reset(token)
+
+
+class LookupRunner:
+    """
+    Thread pool shared by all sessions. Jobs run in a copy of the
+    submitter's context, so a lookup submitted inside a trace continues it.
+    """
+
+    def __init__(self, max_workers: int = LOOKUP_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lookup")
+
+    def submit(
+        self, address: str, lookup: Callable[..., dict], snapshot: MillageSnapshot, headless: bool = True, top_n: int = 8
+    ) -> LookupJob:
+        job = LookupJob(address, trace_id=current_trace_id())
+        ctx = contextvars.copy_context()
+        job.future = self._executor.submit(ctx.run, run_lookup, job, lookup, snapshot, headless, top_n)
+        return job
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
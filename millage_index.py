@@ -0,0 +1,361 @@
+# millage_index.py
+# In-memory millage table used for matching. Holds the DataFrame plus the
+# cleaned match columns and a per-county partition, and follows the database
+# generation so incremental imports are applied in place instead of
+# reloading everything.
+
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from millage_store import (
+    COUNTY_COLUMN,
+    DB_PATH,
+    KEY_COLUMNS,
+    RATE_COLUMNS,
+    REQUIRED_COLUMNS,
+    TABLE_COLUMNS,
+    TABLE_NAME,
+    changes_since,
+    column_names,
+    current_generation,
+    quote_ident,
+    select_columns,
+)
+from scorers import Scorer, get_scorer
+from tracing import span
+
+
+# ----------------- Text cleaning -----------------
+def clean_city_twp(s: str) -> str:
+    s = (s or "").strip().lower()
+    junk = [
+        "city of", "village of", "charter township of", "charter township",
+        "township of", "township", "twp", "city", "village"
+    ]
+    for j in junk:
+        s = s.replace(j, " ")
+    s = re.sub(r"[^a-z0-9\s]", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s.title()
+
+
+def clean_school(s: str) -> str:
+    s = (s or "").strip().lower()
+    s = s.replace("&", "and")
+    s = re.sub(r"[^a-z0-9\s]", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s.title()
+
+
+def clean_county(s: str) -> str:
+    # "County: Kent County" / "Kent County" / "kent" -> "Kent"
+    s = (s or "").strip().lower()
+    s = s.split(":")[-1]
+    s = s.replace("county", " ")
+    s = re.sub(r"[^a-z0-9\s]", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return s.title()
+
+
+# Low-cardinality text columns kept as pandas categoricals
+CATEGORY_COLUMNS = KEY_COLUMNS + ["County_Clean", "Township_Clean", "School_Clean"]
+
+
+def add_match_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn raw (county, township, school, rates) rows into the compact frame
+    find_top_matches scores against: names as categoricals, rates as float64
+    and the cleaned match columns. Cleaning runs once per distinct name
+    rather than once per row.
+    """
+    df = df.copy()
+    if COUNTY_COLUMN not in df.columns:
+        df[COUNTY_COLUMN] = ""
+    df = df[TABLE_COLUMNS]
+    for col in KEY_COLUMNS:
+        df[col] = df[col].fillna("").astype(str).astype("category")
+    for col in RATE_COLUMNS:
+        df[col] = df[col].astype("float64")
+
+    county = df[COUNTY_COLUMN]
+    twp = df["Township/City"]
+    school = df["School District"]
+    df["County_Clean"] = county.map({c: clean_county(c) for c in county.cat.categories}).astype("category")
+    df["Township_Clean"] = twp.map({c: clean_city_twp(c) for c in twp.cat.categories}).astype("category")
+    df["School_Clean"] = school.map({c: clean_school(c) for c in school.cat.categories}).astype("category")
+    # Nearly unique per row, so a categorical would not save anything here
+    df["Combined_Clean"] = df["Township_Clean"].astype(str) + " - " + df["School_Clean"].astype(str)
+    return df
+
+
+def combined_key(df: pd.DataFrame) -> pd.Series:
+    """
+    Display key "Township/City - School District" for the given rows, with
+    " (County)" appended when the row's county is known so same-named
+    townships in different counties stay distinguishable.
+    Built on demand for the handful of rows shown instead of stored per row.
+    """
+    key = df["Township/City"].astype(str) + " - " + df["School District"].astype(str)
+    county = df[COUNTY_COLUMN].astype(str)
+    return key.where(county == "", key + " (" + county + ")")
+
+
+def county_partitions(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Row positions per cleaned county name. Rows with an unknown county are
+    under "".
+    """
+    if df.empty:
+        return {}
+    return {
+        str(k): v
+        for k, v in df.groupby("County_Clean", observed=True, sort=False).indices.items()
+    }
+
+
+class MillageSnapshot(NamedTuple):
+    df: pd.DataFrame
+    partitions: Dict[str, np.ndarray]
+    generation: int
+
+
+class MillageIndex:
+    """
+    Millage rows plus match columns and the per-county partition, kept in
+    step with the database generation.
+
+    The snapshot is replaced wholesale on every change (never mutated), so a
+    session that already grabbed one keeps a consistent table while the next
+    rerun sees the new generation.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, table: str = TABLE_NAME, check_interval: float = 5.0):
+        self.db_path = db_path
+        self.table = table
+        self.check_interval = check_interval
+        self._snapshot = MillageSnapshot(pd.DataFrame(), {}, 0)
+        self._lock = threading.RLock()
+        self._last_check = 0.0
+        self.reload()
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self._snapshot.df
+
+    @property
+    def partitions(self) -> Dict[str, np.ndarray]:
+        return self._snapshot.partitions
+
+    @property
+    def generation(self) -> int:
+        return self._snapshot.generation
+
+    def snapshot(self) -> MillageSnapshot:
+        return self._snapshot
+
+    def _swap(self, df: pd.DataFrame, generation: int) -> None:
+        self._snapshot = MillageSnapshot(df, county_partitions(df), generation)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit so the explicit BEGIN below gives a consistent snapshot
+        return sqlite3.connect(self.db_path, isolation_level=None)
+
+    def reload(self) -> None:
+        """
+        Read the whole table and rebuild every match column.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            present = set(column_names(conn, self.table))
+            missing = [c for c in REQUIRED_COLUMNS if c not in present]
+            if missing:
+                raise ValueError(f"DB table is missing columns: {missing}")
+
+            # Only the columns matching needs, not SELECT *
+            cols = select_columns(conn, self.table, TABLE_COLUMNS)
+            df = pd.read_sql_query(f"SELECT {cols} FROM {quote_ident(self.table)}", conn)
+            generation = current_generation(conn)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        df = add_match_columns(df)
+        with self._lock:
+            self._swap(df, generation)
+            self._last_check = time.monotonic()
+
+    def _apply_changes(self, keys: List[Tuple[str, str, str]], rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        Drop every row of a changed key and append its current rows with
+        freshly computed match columns. Untouched rows are not re-cleaned.
+        """
+        old = self.df
+        changed = pd.MultiIndex.from_tuples(keys, names=KEY_COLUMNS)
+        stale = pd.MultiIndex.from_frame(old[KEY_COLUMNS].astype(str)).isin(changed)
+        kept = old[~stale]
+        if rows.empty:
+            return kept.reset_index(drop=True)
+        df = pd.concat([kept, add_match_columns(rows)], ignore_index=True)
+        # concat falls back to object dtype when category sets differ
+        for col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype("category")
+        return df
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Pick up any generation written since the last check and swap it in.
+        Returns True if the table changed. Checks are throttled to one per
+        `check_interval` seconds unless forced.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN")
+                latest, keys, rows = changes_since(conn, self.generation, self.table)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+
+            self._last_check = now
+            if latest <= self.generation:
+                return False
+            if keys is None:
+                self.reload()
+                return True
+
+            self._swap(self._apply_changes(keys, rows) if keys else self.df, latest)
+        return True
+
+    def memory_bytes(self) -> int:
+        return int(self.df.memory_usage(deep=True).sum())
+
+
+# ----------------- Matching -----------------
+# Below this best in-county score, rows from other counties are ranked too
+COUNTY_FALLBACK_SCORE = 80
+
+
+class Match(NamedTuple):
+    """
+    One ranked candidate. row_id is the position in the snapshot's frame.
+    """
+
+    row_id: int
+    score: int
+    in_county: bool
+    combined_key: str
+    homestead_rate: float
+    non_homestead_rate: float
+
+
+class MatchResults:
+    """
+    Ranked top-N candidates as parallel arrays: row positions, scores and
+    the display fields, instead of a copied and sorted DataFrame.
+    """
+
+    __slots__ = ("target", "row_ids", "scores", "in_county", "keys", "homestead", "non_homestead")
+
+    def __init__(self, target: str, df: pd.DataFrame, row_ids: np.ndarray, scores: np.ndarray, in_county: np.ndarray):
+        self.target = target
+        self.row_ids = row_ids
+        self.scores = scores
+        self.in_county = in_county
+        self.keys = [_combined_key_at(df, int(i)) for i in row_ids]
+        self.homestead = df["Total Homestead Millage Rate"].to_numpy()[row_ids]
+        self.non_homestead = df["Total Non-Homestead Millage Rate"].to_numpy()[row_ids]
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    def __getitem__(self, i: int) -> Match:
+        return Match(
+            int(self.row_ids[i]),
+            int(self.scores[i]),
+            bool(self.in_county[i]),
+            self.keys[i],
+            float(self.homestead[i]),
+            float(self.non_homestead[i]),
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def empty(self) -> bool:
+        return len(self.row_ids) == 0
+
+    def options(self) -> List[str]:
+        """
+        Selectbox labels, in rank order.
+        """
+        return [f"{key}   (Score: {score})" for key, score in zip(self.keys, self.scores)]
+
+    def to_records(self) -> List[dict]:
+        return [m._asdict() for m in self]
+
+
+def _combined_key_at(df: pd.DataFrame, pos: int) -> str:
+    # Scalar version of combined_key() for one row
+    key = f"{df['Township/City'].iat[pos]} - {df['School District'].iat[pos]}"
+    county = str(df[COUNTY_COLUMN].iat[pos])
+    return f"{key} ({county})" if county else key
+
+
+def find_top_matches(
+    df: pd.DataFrame,
+    township: str,
+    school: str,
+    top_n: int = 8,
+    county: str = "",
+    partitions: Optional[Dict[str, np.ndarray]] = None,
+    scorer: Optional[Scorer] = None,
+) -> Tuple[str, MatchResults]:
+    """
+    Score only the scraped county's partition (plus rows whose county is
+    unknown). If that county isn't in the table, or its best score is below
+    COUNTY_FALLBACK_SCORE, the other counties are scored as well and ranked
+    after in-county rows of equal score. Ties keep table order.
+    `scorer` defaults to get_scorer() (MATCH_SCORER).
+    """
+    scorer = scorer or get_scorer()
+    t = clean_city_twp(township)
+    s = clean_school(school)
+    target = f"{t} - {s}"
+
+    c = clean_county(county)
+    local_rows = None
+    if c and partitions and c in partitions:
+        local_rows = np.sort(np.concatenate([partitions[c], partitions.get("", np.array([], dtype=int))]))
+
+    with span("match", scorer=scorer.name, county=c, target=target) as sp:
+        if local_rows is None:
+            positions = np.arange(len(df))
+            scores = scorer.score(df, positions, t, s)
+            in_county = np.zeros(len(positions), dtype=bool)
+        else:
+            positions = local_rows
+            scores = scorer.score(df, positions, t, s)
+            in_county = np.ones(len(positions), dtype=bool)
+            if len(scores) == 0 or scores.max() < COUNTY_FALLBACK_SCORE:
+                others = np.setdiff1d(np.arange(len(df)), local_rows, assume_unique=True)
+                positions = np.concatenate([positions, others])
+                scores = np.concatenate([scores, scorer.score(df, others, t, s)])
+                in_county = np.concatenate([in_county, np.zeros(len(others), dtype=bool)])
+                sp.set(county_fallback=True)
+
+        # Score first, in-county second; the stable sort keeps table order on ties
+        order = np.argsort(-(scores * 2 + in_county), kind="stable")[:top_n]
+        sp.set(candidates=len(positions), best_score=int(scores[order[0]]) if len(order) else None)
+        return target, MatchResults(target, df, positions[order], scores[order], in_county[order])
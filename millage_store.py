@@ -0,0 +1,199 @@
+# millage_store.py
+# SQLite side of the millage dataset: table names, required columns and the
+# generation bookkeeping that lets a running app pick up incremental imports.
+
+import sqlite3
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+DB_PATH = "all_millage_rates.db"
+TABLE_NAME = "millage"
+
+# One row per import; the highest generation is the live one.
+GENERATIONS_TABLE = "millage_generations"
+# Keys (county, township, school) whose rows were rewritten in a given generation.
+CHANGES_TABLE = "millage_changes"
+
+# Optional in source files; "" means the county is unknown for that row.
+COUNTY_COLUMN = "County"
+NAME_COLUMNS = ["Township/City", "School District"]
+KEY_COLUMNS = [COUNTY_COLUMN] + NAME_COLUMNS
+RATE_COLUMNS = ["Total Homestead Millage Rate", "Total Non-Homestead Millage Rate"]
+# What the app cannot work without
+REQUIRED_COLUMNS = NAME_COLUMNS + RATE_COLUMNS
+# What the importers write
+TABLE_COLUMNS = KEY_COLUMNS + RATE_COLUMNS
+
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def ensure_meta_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {GENERATIONS_TABLE} (
+            generation INTEGER PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            source TEXT,
+            full_reload INTEGER NOT NULL DEFAULT 0,
+            keys_changed INTEGER NOT NULL DEFAULT 0,
+            rows_written INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    key_cols = ", ".join(f"{quote_ident(c)} TEXT" for c in KEY_COLUMNS)
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {CHANGES_TABLE} (generation INTEGER NOT NULL, {key_cols})"
+    )
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{CHANGES_TABLE}_generation ON {CHANGES_TABLE}(generation)"
+    )
+    ensure_county_column(conn, CHANGES_TABLE)
+
+
+def create_millage_table(conn: sqlite3.Connection, table: str = TABLE_NAME) -> None:
+    """
+    Empty millage table plus its County index, inside the caller's
+    transaction (pandas' to_sql would commit it).
+    """
+    cols_sql = ", ".join(f"{quote_ident(c)} {'REAL' if c in RATE_COLUMNS else 'TEXT'}" for c in TABLE_COLUMNS)
+    conn.execute(f"CREATE TABLE {quote_ident(table)} ({cols_sql})")
+    conn.execute(
+        f"CREATE INDEX {quote_ident('idx_' + table + '_county')} ON {quote_ident(table)}({quote_ident(COUNTY_COLUMN)})"
+    )
+
+
+def column_names(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({quote_ident(table)})")]
+
+
+def ensure_county_column(conn: sqlite3.Connection, table: str) -> None:
+    """
+    Add the County column to tables written before county support.
+    Existing rows get "" (unknown county).
+    """
+    if COUNTY_COLUMN not in column_names(conn, table):
+        conn.execute(
+            f"ALTER TABLE {quote_ident(table)} "
+            f"ADD COLUMN {quote_ident(COUNTY_COLUMN)} TEXT NOT NULL DEFAULT ''"
+        )
+
+
+def select_columns(conn: sqlite3.Connection, table: str, columns: List[str], alias: str = "") -> str:
+    """
+    SELECT list for `columns`, reading a missing County column as "".
+    """
+    present = set(column_names(conn, table))
+    prefix = f"{alias}." if alias else ""
+    parts = []
+    for c in columns:
+        if c == COUNTY_COLUMN and c not in present:
+            parts.append(f"'' AS {quote_ident(c)}")
+        else:
+            parts.append(f"{prefix}{quote_ident(c)}")
+    return ", ".join(parts)
+
+
+def table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def current_generation(conn: sqlite3.Connection) -> int:
+    """
+    Live generation number, or 0 for a database that has never been
+    imported incrementally.
+    """
+    if not table_exists(conn, GENERATIONS_TABLE):
+        return 0
+    row = conn.execute(f"SELECT MAX(generation) FROM {GENERATIONS_TABLE}").fetchone()
+    return int(row[0] or 0)
+
+
+def record_generation(
+    conn: sqlite3.Connection,
+    keys: Iterable[Tuple[str, str, str]] = (),
+    rows_written: int = 0,
+    source: str = "",
+    full_reload: bool = False,
+) -> int:
+    """
+    Register a new generation (inside the caller's transaction) and return its number.
+    A full reload tells readers to drop whatever they hold and re-read the table.
+    """
+    ensure_meta_tables(conn)
+    generation = current_generation(conn) + 1
+    keys = list(keys)
+    conn.execute(
+        f"INSERT INTO {GENERATIONS_TABLE} "
+        "(generation, created_at, source, full_reload, keys_changed, rows_written) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            generation,
+            datetime.now().isoformat(timespec="seconds"),
+            source,
+            int(full_reload),
+            len(keys),
+            rows_written,
+        ),
+    )
+    if keys:
+        cols = ", ".join(quote_ident(c) for c in ["generation"] + KEY_COLUMNS)
+        placeholders = ", ".join("?" for _ in range(len(KEY_COLUMNS) + 1))
+        conn.executemany(
+            f"INSERT INTO {CHANGES_TABLE} ({cols}) VALUES ({placeholders})",
+            [(generation, *k) for k in keys],
+        )
+    return generation
+
+
+def changes_since(
+    conn: sqlite3.Connection, generation: int, table: str = TABLE_NAME
+) -> Tuple[int, Optional[List[Tuple[str, str, str]]], Optional[pd.DataFrame]]:
+    """
+    Describe what happened after `generation`.
+
+    Returns (latest_generation, changed_keys, rows). changed_keys/rows are None
+    when a full reload happened in between and the caller must re-read the
+    whole table; rows holds the current rows for every changed key.
+    """
+    latest = current_generation(conn)
+    if latest <= generation:
+        return latest, [], None
+
+    full = conn.execute(
+        f"SELECT 1 FROM {GENERATIONS_TABLE} WHERE generation > ? AND full_reload = 1 LIMIT 1",
+        (generation,),
+    ).fetchone()
+    if full:
+        return latest, None, None
+
+    key_sel = ", ".join(quote_ident(c) for c in KEY_COLUMNS)
+    keys = [
+        tuple(r)
+        for r in conn.execute(
+            f"SELECT DISTINCT {key_sel} FROM {CHANGES_TABLE} WHERE generation > ?",
+            (generation,),
+        ).fetchall()
+    ]
+    if not keys:
+        return latest, [], pd.DataFrame(columns=TABLE_COLUMNS)
+
+    # Stage the keys in a temp table so the join works for any number of keys
+    conn.execute("DROP TABLE IF EXISTS temp._changed_keys")
+    conn.execute(f"CREATE TEMP TABLE _changed_keys ({key_sel})")
+    conn.executemany(
+        f"INSERT INTO temp._changed_keys VALUES ({', '.join('?' for _ in KEY_COLUMNS)})", keys
+    )
+    cols = select_columns(conn, table, TABLE_COLUMNS, alias="m")
+    join = " AND ".join(f"m.{quote_ident(c)} = k.{quote_ident(c)}" for c in KEY_COLUMNS)
+    rows = pd.read_sql_query(
+        f"SELECT {cols} FROM {quote_ident(table)} m JOIN temp._changed_keys k ON {join}", conn
+    )
+    conn.execute("DROP TABLE temp._changed_keys")
+    return latest, keys, rows
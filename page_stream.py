@@ -0,0 +1,241 @@
+# page_stream.py
+# Streaming read of hometownlocator result pages. The body is fed chunk by
+# chunk into an lxml parser whose target keeps only what _parse_address_page
+# looks at (section headings, list items, links); once the administrative
+# and school sections have closed, reading stops and the connection is
+# dropped. The rest of the page - mostly ad scripts - is never downloaded
+# and no document tree is built.
+#
+# Extraction rules are those of cloud_scraper._parse_address_page; the
+# parser corpus (bench_parsers.py, parser "stream") checks they agree.
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from lxml import etree
+
+CHUNK_SIZE = 16 * 1024
+
+ADMIN_HEADINGS = ["administrative", "geographic units", "census"]
+SCHOOL_HEADINGS = ["school district", "school zones", "schools", "school"]
+PLACE_WORDS = ["city of", "township", "village of", "charter township"]
+DISTRICT_RE = re.compile(r"(public\s+schools?|school\s+district)", re.I)
+
+# get_text() leaves out the contents of these
+_SKIP_TEXT = {"script", "style", "template"}
+
+
+def _clean_text(s: str) -> str:
+    return re.sub(r"\s+", " ", s or "").strip()
+
+
+class _Section:
+    __slots__ = ("depth", "heading", "li_texts", "first_link")
+
+    def __init__(self):
+        self.depth = 1
+        self.heading: Optional[str] = None
+        self.li_texts: List[str] = []
+        self.first_link: Optional[str] = None
+
+
+class _Collector:
+    """
+    One piece of text being gathered: an h2, li or a. Strings are kept
+    separately so li text can be joined with spaces like get_text(" ").
+    """
+
+    __slots__ = ("tag", "depth", "strings", "sections")
+
+    def __init__(self, tag: str, sections: List[_Section]):
+        self.tag = tag
+        self.depth = 1
+        self.strings: List[str] = []
+        # Every section it is inside, as find("h2") / find_all("li") would see it
+        self.sections = sections
+
+
+class ResultPageTarget:
+    """
+    lxml parser target collecting township / county / school district.
+    `done` turns true once both kinds of section have closed and a
+    district was found (without one the page-wide link fallback needs
+    the whole document).
+    """
+
+    def __init__(self):
+        self.result: Dict[str, Optional[str]] = {"township": None, "county": None, "school_district": None}
+        self.fallback_school: Optional[str] = None
+        self.admin_seen = False
+        self.school_seen = False
+        self.sections_seen = 0
+        self._sections: List[_Section] = []
+        self._collectors: List[_Collector] = []
+        self._text: List[str] = []
+        self._skip = 0
+        self._closed = False
+
+    @property
+    def done(self) -> bool:
+        return self.admin_seen and self.school_seen and bool(self.result["school_district"])
+
+    def _flush(self) -> None:
+        # lxml may split one text node over several data() calls
+        if self._text:
+            s = "".join(self._text)
+            self._text = []
+            for c in self._collectors:
+                c.strings.append(s)
+
+    def start(self, tag, attrib) -> None:
+        self._flush()
+        if tag in _SKIP_TEXT:
+            self._skip += 1
+        for s in self._sections:
+            if tag == "div":
+                s.depth += 1
+        for c in self._collectors:
+            if tag == c.tag:
+                c.depth += 1
+        if tag == "div" and "halfcontentpadded" in (attrib.get("class") or "").split():
+            self._sections.append(_Section())
+            self.sections_seen += 1
+        elif tag in ("h2", "li", "a") and (tag == "a" or self._sections):
+            self._collectors.append(_Collector(tag, list(self._sections)))
+
+    def end(self, tag) -> None:
+        self._flush()
+        if tag in _SKIP_TEXT and self._skip:
+            self._skip -= 1
+        for c in list(self._collectors):
+            if tag == c.tag:
+                c.depth -= 1
+                if not c.depth:
+                    self._collectors.remove(c)
+                    self._finish_text(c)
+        if tag == "div":
+            for s in list(self._sections):
+                s.depth -= 1
+                if not s.depth:
+                    self._sections.remove(s)
+                    self._finish_section(s)
+
+    def comment(self, text) -> None:
+        # A comment still separates the strings around it
+        self._flush()
+
+    def data(self, data) -> None:
+        if not self._skip and self._collectors:
+            self._text.append(data)
+
+    def _finish_text(self, c: _Collector) -> None:
+        if c.tag == "li":
+            text = _clean_text(" ".join(c.strings))
+            for s in c.sections:
+                s.li_texts.append(text)
+            return
+        text = _clean_text("".join(c.strings))
+        if c.tag == "h2":
+            for s in c.sections:
+                if s.heading is None:
+                    s.heading = text.lower()
+        else:
+            # Links count for their sections and for the page-wide fallback
+            for s in c.sections:
+                if s.first_link is None:
+                    s.first_link = text
+            if self.fallback_school is None and DISTRICT_RE.search(text):
+                self.fallback_school = text
+
+    def _finish_section(self, s: _Section) -> None:
+        heading = s.heading or ""
+        result = self.result
+        if any(k in heading for k in ADMIN_HEADINGS):
+            self.admin_seen = True
+            for txt in s.li_texts:
+                low = txt.lower()
+                if any(k in low for k in PLACE_WORDS):
+                    result["township"] = txt
+                if "county" in low:
+                    result["county"] = txt.split(":")[-1].strip() if ":" in txt else txt
+        if any(k in heading for k in SCHOOL_HEADINGS):
+            self.school_seen = True
+            if s.first_link is not None and not result["school_district"] and len(s.first_link) >= 4:
+                result["school_district"] = s.first_link
+            for txt in s.li_texts:
+                if DISTRICT_RE.search(txt):
+                    result["school_district"] = txt
+
+    def close(self) -> Dict[str, Optional[str]]:
+        if not self._closed:
+            self._closed = True
+            self._flush()
+            # Sections left open by a truncated read still count
+            for s in reversed(self._sections):
+                self._finish_section(s)
+            self._sections = []
+            if not self.result["school_district"]:
+                self.result["school_district"] = self.fallback_school
+            for k, v in self.result.items():
+                if isinstance(v, str):
+                    self.result[k] = v.replace("County:", "").strip()
+        return self.result
+
+
+class PageRead(NamedTuple):
+    parsed: Optional[Dict[str, Optional[str]]]  # None when the body was not stream-parsed
+    html: str  # whole body; "" when reading stopped early
+    bytes_read: int
+    stopped_early: bool
+    has_sections: bool
+
+
+def parse_chunks(chunks: Iterable, encoding: Optional[str] = None) -> PageRead:
+    """
+    Feed chunks (bytes or str) until the result sections are complete.
+    The body is kept only while no section has started, so a list page
+    can still be handed to the link parser.
+    """
+    target = ResultPageTarget()
+    parser = etree.HTMLParser(target=target, encoding=encoding)
+    kept, size, stopped = [], 0, False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        size += len(chunk)
+        parser.feed(chunk)
+        if target.sections_seen:
+            kept = None
+        else:
+            kept.append(chunk)
+        if target.done:
+            stopped = True
+            break
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass  # an empty body
+    parsed = target.close()
+    html = ""
+    if kept:
+        html = b"".join(kept).decode(encoding or "utf-8", errors="replace") if isinstance(kept[0], bytes) else "".join(kept)
+    return PageRead(parsed, html, size, stopped, bool(target.sections_seen))
+
+
+def read_response(r, chunk_size: int = CHUNK_SIZE) -> PageRead:
+    """
+    Stream a requests response (get(..., stream=True)) through the parser
+    and close it; stopping early drops the connection instead of
+    returning it to the pool.
+    """
+    try:
+        return parse_chunks(r.iter_content(chunk_size=chunk_size), r.encoding)
+    finally:
+        r.close()
+
+
+def parse_address_page(html: str, chunk_size: int = CHUNK_SIZE) -> Dict[str, Optional[str]]:
+    """
+    The streaming parser over a page already in memory (parser corpus).
+    """
+    return parse_chunks(html[i:i + chunk_size] for i in range(0, len(html), chunk_size)).parsed
@@ -1,5 +1,6 @@
 # playwright_scraper.py
 
+import os
 import sys
 import asyncio
 from playwright.sync_api import sync_playwright
@@ -16,6 +17,51 @@ if sys.platform.startswith("win"):
         # If it’s already set or this fails, we just ignore and let Playwright try
         pass
 
+# HTL_BASE_URL points the scraper at another host (e.g. htl_standin.py for load tests)
+HTL_HOME = os.environ.get("HTL_BASE_URL", "https://michigan.hometownlocator.com/")
+
+
+def _parse_address_page(html: str) -> dict:
+    """
+    Pull {township, county, school_district} out of a result page.
+    """
+    result = {
+        "township": None,
+        "county": None,
+        "school_district": None,
+    }
+    soup = BeautifulSoup(html, "html.parser")
+
+    for section in soup.find_all("div", class_="halfcontentpadded"):
+        h2 = section.find("h2")
+        if not h2:
+            continue
+
+        heading = h2.get_text(strip=True).lower()
+
+        # --- Township + County ---
+        if "administrative" in heading or "geographic units" in heading:
+            for li in section.find_all("li"):
+                text = li.get_text(" ", strip=True)
+                lower_text = text.lower()
+
+                if any(
+                    x in lower_text
+                    for x in ["city of", "township", "village of", "charter township"]
+                ):
+                    result["township"] = text
+
+                if "county" in lower_text:
+                    result["county"] = text
+
+        # --- School District ---
+        if "school district" in heading or "school zones" in heading:
+            link = section.find("a")
+            if link:
+                result["school_district"] = link.get_text(strip=True)
+
+    return result
+
 
 def get_township_school_from_address(address: str) -> dict:
     """
@@ -26,12 +72,6 @@ def get_township_school_from_address(address: str) -> dict:
       - school_district
     """
 
-    result = {
-        "township": None,
-        "county": None,
-        "school_district": None,
-    }
-
     with sync_playwright() as p:
         # Launch headless Chromium managed by Playwright (no driver path headaches)
         browser = p.chromium.launch(headless=True)
@@ -40,7 +80,7 @@ def get_township_school_from_address(address: str) -> dict:
         try:
             # 1) Go to the main site
             page.goto(
-                "https://michigan.hometownlocator.com/",
+                HTL_HOME,
                 wait_until="domcontentloaded",
                 timeout=30000,
             )
@@ -60,39 +100,9 @@ def get_township_school_from_address(address: str) -> dict:
             # 4) Wait for the content we care about
             page.wait_for_selector("div.halfcontentpadded", timeout=15000)
 
-            # 5) Grab the HTML and parse with BeautifulSoup
+            # 5) Grab the HTML and parse it
             html = page.content()
-            soup = BeautifulSoup(html, "html.parser")
-
-            for section in soup.find_all("div", class_="halfcontentpadded"):
-                h2 = section.find("h2")
-                if not h2:
-                    continue
-
-                heading = h2.get_text(strip=True).lower()
-
-                # --- Township + County ---
-                if "administrative" in heading or "geographic units" in heading:
-                    for li in section.find_all("li"):
-                        text = li.get_text(" ", strip=True)
-                        lower_text = text.lower()
-
-                        if any(
-                            x in lower_text
-                            for x in ["city of", "township", "village of", "charter township"]
-                        ):
-                            result["township"] = text
-
-                        if "county" in lower_text:
-                            result["county"] = text
-
-                # --- School District ---
-                if "school district" in heading or "school zones" in heading:
-                    link = section.find("a")
-                    if link:
-                        result["school_district"] = link.get_text(strip=True)
-
-            return result
+            return _parse_address_page(html)
 
         except Exception as e:
             return {"error": str(e)}
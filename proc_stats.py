@@ -0,0 +1,122 @@
+# proc_stats.py
+# Process-tree memory and browser-process counts read straight from /proc
+# (Linux). Elsewhere the functions degrade to this process only / None.
+
+import os
+import resource
+import sys
+from typing import Dict, List, Optional
+
+BROWSER_PROCESS_NAMES = ("chrome", "chromium", "chromedriver", "headless_shell", "msedge", "msedgedriver")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+HAS_PROC = os.path.isdir("/proc/self")
+
+
+def _read(path: str) -> str:
+    try:
+        with open(path, errors="replace") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def _parent_map() -> Dict[int, int]:
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        stat = _read(f"/proc/{entry}/stat")
+        if not stat:
+            continue
+        # Field 4 is the ppid; the command name (field 2) may contain spaces
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 1:
+            parents[int(entry)] = int(fields[1])
+    return parents
+
+
+def process_tree(pid: Optional[int] = None) -> List[int]:
+    """
+    pid and all of its descendants.
+    """
+    pid = os.getpid() if pid is None else pid
+    if not HAS_PROC:
+        return [pid]
+    children: Dict[int, List[int]] = {}
+    for child, parent in _parent_map().items():
+        children.setdefault(parent, []).append(child)
+    tree, stack = [], [pid]
+    while stack:
+        p = stack.pop()
+        tree.append(p)
+        stack.extend(children.get(p, []))
+    return tree
+
+
+def process_name(pid: int) -> str:
+    return _read(f"/proc/{pid}/comm").strip()
+
+
+def rss_bytes(pid: int) -> int:
+    statm = _read(f"/proc/{pid}/statm").split()
+    return int(statm[1]) * _PAGE_SIZE if len(statm) > 1 else 0
+
+
+def tree_rss_bytes(pid: Optional[int] = None) -> int:
+    """
+    Resident memory of a process and its descendants (browser workers,
+    chromedriver, Chrome). Shared pages are counted once per process.
+    """
+    if not HAS_PROC:
+        # Peak, not current, and this process only
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return sum(rss_bytes(p) for p in process_tree(pid))
+
+
+def is_browser_process(pid: int) -> bool:
+    name = process_name(pid).lower()
+    return any(name.startswith(b) for b in BROWSER_PROCESS_NAMES)
+
+
+def browser_pids(pid: Optional[int] = None, tree_only: bool = True) -> Optional[List[int]]:
+    """
+    Browser/driver processes under `pid` (default: this process), or
+    system-wide with tree_only=False. None where /proc is unavailable.
+    """
+    if not HAS_PROC:
+        return None
+    pids = process_tree(pid) if tree_only else [int(e) for e in os.listdir("/proc") if e.isdigit()]
+    return [p for p in pids if is_browser_process(p)]
+
+
+def parent_pid(pid: int) -> Optional[int]:
+    stat = _read(f"/proc/{pid}/stat")
+    fields = stat[stat.rfind(")") + 2:].split()
+    return int(fields[1]) if len(fields) > 1 else None
+
+
+def process_state(pid: int) -> str:
+    """
+    One-letter state from /proc (R, S, D, Z, ...), or "" if gone.
+    """
+    stat = _read(f"/proc/{pid}/stat")
+    fields = stat[stat.rfind(")") + 2:].split()
+    return fields[0] if fields else ""
+
+
+def process_cmdline(pid: int) -> List[str]:
+    return [a for a in _read(f"/proc/{pid}/cmdline").split("\0") if a]
+
+
+def process_environ(pid: int) -> Dict[str, str]:
+    """
+    Environment a process started with; empty if gone or not ours to read.
+    """
+    env = {}
+    for entry in _read(f"/proc/{pid}/environ").split("\0"):
+        name, sep, value = entry.partition("=")
+        if sep:
+            env[name] = value
+    return env
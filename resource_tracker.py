@@ -0,0 +1,330 @@
+# resource_tracker.py
+# Accounting for what the browser fallbacks leave behind - temp profile dirs,
+# driver/browser processes, memory per lookup - and a periodic reaper that
+# removes orphaned chromedata_*/edgedata_* dirs, kills browser processes that
+# outlived their lookup and keeps the chromedriver log bounded.
+#
+# The reaper only touches what this app started. Profile dir names carry
+# OWNER_TAG, and every process the app starts (pool workers, chromedriver,
+# Playwright's driver and the browsers under them) inherits it through the
+# BROWSER_OWNER_TAG environment variable, so another app's Chrome on the
+# same host - or its profile dirs - are never killed or removed.
+
+import hashlib
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from proc_stats import (
+    HAS_PROC,
+    browser_pids,
+    parent_pid,
+    process_cmdline,
+    process_environ,
+    process_name,
+    process_state,
+    rss_bytes,
+    tree_rss_bytes,
+)
+from tracing import event
+
+# Stable per app directory, so a restarted app still reaps what a crashed
+# run left behind. Set before any browser starts; children inherit it.
+OWNER_ENV = "BROWSER_OWNER_TAG"
+OWNER_TAG = os.environ.setdefault(
+    OWNER_ENV, hashlib.sha1(os.path.dirname(os.path.abspath(__file__)).encode()).hexdigest()[:12]
+)
+
+PROFILE_PREFIXES = ("chromedata_", "edgedata_")
+# Only these dirs are ours to reap: new_profile_dir names them <prefix><tag>_*
+OWNED_PROFILE_PREFIXES = tuple(f"{p}{OWNER_TAG}_" for p in PROFILE_PREFIXES)
+DRIVER_NAMES = ("chromedriver", "msedgedriver")
+
+# CHROMEDRIVER_LOG="" turns the driver log off
+DRIVER_LOG = os.environ.get("CHROMEDRIVER_LOG", "/tmp/chromedriver.log")
+DRIVER_LOG_MAX_BYTES = int(os.environ.get("CHROMEDRIVER_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+
+REAP_INTERVAL = float(os.environ.get("REAP_INTERVAL", "300"))
+# A dir younger than this may belong to a launch still in progress. Without
+# /proc we can't see which dirs are in use, so wait much longer.
+ORPHAN_MIN_AGE = 120.0 if HAS_PROC else 3600.0
+
+COUNTERS = (
+    "profile_dirs_created",
+    "profile_dirs_removed",
+    "profile_dir_remove_failures",
+    "drivers_started",
+    "drivers_quit",
+    "driver_quit_failures",
+    "reaped_dirs",
+    "reaped_processes",
+    "reaped_zombies",
+)
+
+
+class ResourceTracker:
+    """
+    Thread-safe counters plus the most recent per-lookup memory samples.
+    Each process has its own; the browser pool sums its workers' counters.
+    """
+
+    def __init__(self, history: int = 50):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {name: 0 for name in COUNTERS}
+        self._lookups: Deque[dict] = deque(maxlen=history)
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def record_lookup(self, backend: str, seconds: float, rss_before: int, rss_after: int) -> dict:
+        sample = {
+            "backend": backend,
+            "seconds": round(seconds, 2),
+            "rss_mb": round(rss_after / 1024 / 1024, 1),
+            "rss_delta_mb": round((rss_after - rss_before) / 1024 / 1024, 1),
+        }
+        with self._lock:
+            self._lookups.append(sample)
+        return sample
+
+    def recent_lookups(self) -> List[dict]:
+        with self._lock:
+            return list(self._lookups)
+
+
+TRACKER = ResourceTracker()
+
+
+def add_counters(total: Dict[str, int], counters: Dict[str, int]) -> Dict[str, int]:
+    for name, value in counters.items():
+        total[name] = total.get(name, 0) + value
+    return total
+
+
+def measure_rss(tree: bool) -> int:
+    # The tree walk scans /proc; only worth it around browser launches
+    return tree_rss_bytes() if tree else rss_bytes(os.getpid())
+
+
+# ---- Profile dirs and drivers ----
+def new_profile_dir(prefix: str, root: Optional[str] = None) -> str:
+    path = tempfile.mkdtemp(prefix=f"{prefix}{OWNER_TAG}_", dir=root)
+    TRACKER.incr("profile_dirs_created")
+    return path
+
+
+def remove_profile_dir(path: str) -> bool:
+    shutil.rmtree(path, ignore_errors=True)
+    if os.path.exists(path):
+        # Usually Chrome still holding files; the reaper retries later
+        TRACKER.incr("profile_dir_remove_failures")
+        event("profile_dir.remove_failed", path=path)
+        return False
+    TRACKER.incr("profile_dirs_removed")
+    return True
+
+
+def quit_driver(driver) -> bool:
+    try:
+        driver.quit()
+    except Exception as e:
+        TRACKER.incr("driver_quit_failures")
+        event("driver.quit_failed", error=str(e))
+        return False
+    TRACKER.incr("drivers_quit")
+    return True
+
+
+# ---- Reaper ----
+def profile_roots() -> List[str]:
+    roots = [tempfile.gettempdir(), "/dev/shm"]
+    return [r for i, r in enumerate(roots) if os.path.isdir(r) and r not in roots[:i]]
+
+
+def find_profile_dirs(roots: Optional[List[str]] = None) -> List[str]:
+    found = []
+    for root in roots or profile_roots():
+        try:
+            names = os.listdir(root)
+        except OSError:
+            continue
+        found.extend(os.path.join(root, n) for n in names if n.startswith(OWNED_PROFILE_PREFIXES))
+    return found
+
+
+def _owned(pid: int) -> bool:
+    # Inherited from this app (or an earlier run of it); unreadable means not ours
+    return process_environ(pid).get(OWNER_ENV) == OWNER_TAG
+
+
+def profile_dirs_in_use() -> Optional[Set[str]]:
+    """
+    --user-data-dir of every live browser process; None without /proc.
+    """
+    pids = browser_pids(tree_only=False)
+    if pids is None:
+        return None
+    in_use = set()
+    for pid in pids:
+        for arg in process_cmdline(pid):
+            if arg.startswith("--user-data-dir="):
+                in_use.add(os.path.realpath(arg.split("=", 1)[1]))
+    return in_use
+
+
+def orphaned_browser_pids() -> List[int]:
+    """
+    Our browser/driver processes that lost their owner: reparented to init
+    (or to this process acting as PID 1 / subreaper) after a worker or
+    chromedriver died. Chrome normally hangs off a chromedriver or a
+    Playwright driver, never directly off the app. Processes without our
+    OWNER_TAG in their environment are never included.
+    """
+    pids = browser_pids(tree_only=False) or []
+    adopters = {1, os.getpid()}
+    orphans = []
+    for pid in pids:
+        if process_state(pid) == "Z" or parent_pid(pid) not in adopters:
+            continue
+        is_driver = process_name(pid).lower().startswith(DRIVER_NAMES)
+        if is_driver and parent_pid(pid) == os.getpid():
+            continue  # in-process Selenium (BROWSER_POOL_SIZE=0)
+        if _owned(pid):
+            orphans.append(pid)
+    return orphans
+
+
+def zombie_browser_pids() -> List[int]:
+    return [p for p in browser_pids(tree_only=False) or [] if process_state(p) == "Z"]
+
+
+def trim_driver_log(path: str = DRIVER_LOG, max_bytes: int = DRIVER_LOG_MAX_BYTES) -> bool:
+    """
+    Keep one rotated copy once the log passes max_bytes. Drivers still
+    running keep writing to the rotated file until they exit.
+    """
+    if not path:
+        return False
+    try:
+        if os.path.getsize(path) <= max_bytes:
+            return False
+        os.replace(path, path + ".1")
+        return True
+    except OSError:
+        return False
+
+
+def reap(min_age: float = ORPHAN_MIN_AGE) -> dict:
+    """
+    One reaper pass. Safe to run while lookups are in flight: dirs in use
+    by a live browser, or younger than min_age, are left alone.
+    """
+    started = time.monotonic()
+    result = {"dirs_removed": 0, "processes_killed": 0, "zombies_reaped": 0, "log_rotated": False}
+
+    for pid in orphaned_browser_pids():
+        try:
+            os.kill(pid, signal.SIGKILL)
+            result["processes_killed"] += 1
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    # Zombies can only be collected by their parent
+    for pid in zombie_browser_pids():
+        if parent_pid(pid) != os.getpid():
+            continue
+        try:
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                result["zombies_reaped"] += 1
+        except ChildProcessError:
+            pass
+
+    in_use = profile_dirs_in_use() or set()
+    now = time.time()
+    for path in find_profile_dirs():
+        try:
+            age = now - os.path.getmtime(path)
+        except OSError:
+            continue
+        if age < min_age or os.path.realpath(path) in in_use:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        if not os.path.exists(path):
+            result["dirs_removed"] += 1
+
+    result["log_rotated"] = trim_driver_log()
+    TRACKER.incr("reaped_dirs", result["dirs_removed"])
+    TRACKER.incr("reaped_processes", result["processes_killed"])
+    TRACKER.incr("reaped_zombies", result["zombies_reaped"])
+    result["seconds"] = round(time.monotonic() - started, 3)
+    result["at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    return result
+
+
+class _Reaper:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.last: Optional[dict] = None
+        self._thread = threading.Thread(target=self._run, name="resource-reaper", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.last = reap()
+            except Exception as e:
+                self.last = {"error": str(e), "at": time.strftime("%Y-%m-%d %H:%M:%S")}
+            time.sleep(self.interval)
+
+
+_reaper: Optional[_Reaper] = None
+_reaper_lock = threading.Lock()
+
+
+def start_reaper(interval: float = REAP_INTERVAL) -> None:
+    """
+    Start the background reaper once per process (REAP_INTERVAL=0 disables it).
+    """
+    global _reaper
+    if interval <= 0:
+        return
+    with _reaper_lock:
+        if _reaper is None:
+            _reaper = _Reaper(interval)
+
+
+def resource_status(extra_counters: Optional[Dict[str, int]] = None) -> dict:
+    """
+    Snapshot for the debug panel and load test reports. extra_counters
+    (e.g. the browser pool's workers) are added to this process's counts.
+    """
+    counters = add_counters(TRACKER.counters(), extra_counters or {})
+    pids = browser_pids(tree_only=False)
+    try:
+        log_bytes = os.path.getsize(DRIVER_LOG) if DRIVER_LOG else 0
+    except OSError:
+        log_bytes = 0
+    status = dict(counters)
+    status.update({
+        "profile_dirs_leaked": counters["profile_dirs_created"] - counters["profile_dirs_removed"],
+        "profile_dirs_on_disk": len(find_profile_dirs()),
+        "live_browser_processes": None if pids is None else sum(1 for p in pids if process_state(p) != "Z"),
+        "live_drivers": None if pids is None else sum(
+            1 for p in pids if process_name(p).lower().startswith(DRIVER_NAMES) and process_state(p) != "Z"
+        ),
+        "zombie_browser_processes": None if pids is None else len(zombie_browser_pids()),
+        "driver_log_mb": round(log_bytes / 1024 / 1024, 2),
+        "rss_mb": round(tree_rss_bytes() / 1024 / 1024, 1),
+        "last_reap": _reaper.last if _reaper else None,
+    })
+    return status
@@ -0,0 +1,120 @@
+# scorers.py
+# Similarity scorers for township/school matching. Each scorer rates a set of
+# millage rows (by position) against the cleaned scraped township and school
+# and returns integer scores 0-100, so find_top_matches and its county
+# fallback threshold work the same whichever one is selected.
+#
+# MATCH_SCORER picks the default (token_set, token_sort, weighted, rapidfuzz).
+
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz
+
+# C-backed implementation (optional)
+try:
+    from rapidfuzz import fuzz as rf_fuzz
+    from rapidfuzz import process as rf_process
+    from rapidfuzz import utils as rf_utils
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    HAS_RAPIDFUZZ = False
+
+DEFAULT_SCORER = os.environ.get("MATCH_SCORER", "token_set")
+
+
+def _target(township: str, school: str) -> str:
+    return f"{township} - {school}"
+
+
+class Scorer:
+    name = ""
+
+    def score(self, df: pd.DataFrame, positions: np.ndarray, township: str, school: str) -> np.ndarray:
+        raise NotImplementedError
+
+
+class ComboScorer(Scorer):
+    """
+    A fuzzywuzzy ratio of "township - school" against each row's
+    Combined_Clean, row by row.
+    """
+
+    def __init__(self, name: str, ratio):
+        self.name = name
+        self.ratio = ratio
+
+    def score(self, df, positions, township, school):
+        target = _target(township, school)
+        candidates = df["Combined_Clean"].to_numpy()
+        return np.fromiter(
+            (self.ratio(target, candidates[p]) for p in positions), dtype=np.int64, count=len(positions)
+        )
+
+
+def _category_scores(column: pd.Series, positions: np.ndarray, value: str, ratio) -> np.ndarray:
+    # Score each distinct name once and spread it over the rows by code
+    cats = column.cat.categories
+    per_cat = np.fromiter((ratio(value, c) for c in cats), dtype=np.float64, count=len(cats))
+    codes = column.cat.codes.to_numpy()[positions]
+    return np.where(codes >= 0, per_cat[codes], 0.0)
+
+
+class WeightedScorer(Scorer):
+    """
+    Township and school scored separately against Township_Clean and
+    School_Clean, then blended. One ratio call per distinct name, not per row.
+    """
+
+    name = "weighted"
+
+    def __init__(self, township_weight: float = 0.5, ratio=fuzz.token_set_ratio):
+        self.township_weight = township_weight
+        self.ratio = ratio
+
+    def score(self, df, positions, township, school):
+        twp = _category_scores(df["Township_Clean"], positions, township, self.ratio)
+        sch = _category_scores(df["School_Clean"], positions, school, self.ratio)
+        blended = self.township_weight * twp + (1.0 - self.township_weight) * sch
+        return np.rint(blended).astype(np.int64)
+
+
+class RapidFuzzScorer(Scorer):
+    """
+    token_set_ratio from rapidfuzz over all rows in one C call (cdist),
+    with fuzzywuzzy's default preprocessing.
+    """
+
+    name = "rapidfuzz"
+
+    def score(self, df, positions, township, school):
+        target = _target(township, school)
+        candidates = df["Combined_Clean"].to_numpy()[positions]
+        scores = rf_process.cdist(
+            [target], candidates, scorer=rf_fuzz.token_set_ratio, processor=rf_utils.default_process
+        )[0]
+        return np.rint(scores).astype(np.int64)
+
+
+SCORERS: Dict[str, Scorer] = {
+    "token_set": ComboScorer("token_set", fuzz.token_set_ratio),
+    "token_sort": ComboScorer("token_sort", fuzz.token_sort_ratio),
+    "weighted": WeightedScorer(),
+}
+if HAS_RAPIDFUZZ:
+    SCORERS["rapidfuzz"] = RapidFuzzScorer()
+
+
+def get_scorer(name: Optional[str] = None) -> Scorer:
+    """
+    Scorer by name (default MATCH_SCORER). An unavailable rapidfuzz falls
+    back to token_set, which gives the same scores, only slower.
+    """
+    name = name or DEFAULT_SCORER
+    if name == "rapidfuzz" and not HAS_RAPIDFUZZ:
+        name = "token_set"
+    if name not in SCORERS:
+        raise ValueError(f"Unknown scorer {name!r}; choose from {sorted(SCORERS)}")
+    return SCORERS[name]
@@ -2,8 +2,6 @@
 
 import os
 import re
-import tempfile
-import shutil
 from typing import Optional, Dict, Tuple
 
 import requests
@@ -24,6 +22,12 @@ from selenium.webdriver.edge.options import Options as EdgeOptions
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from address_cache import FRESH, STALE, AddressCache, mark_stale
+from lookup_jobs import report_stage
+from page_stream import read_response
+from tracing import span
+from resource_tracker import TRACKER, new_profile_dir, quit_driver, remove_profile_dir, start_reaper
+
 HTL_HOME = "https://michigan.hometownlocator.com/"
 LOOKUP_URL = "https://michigan.hometownlocator.com/maps/address-lookup.cfm"
 HEADERS = {"User-Agent": "Mozilla/5.0"}
@@ -92,7 +96,8 @@ def _parse_address_page(html: str) -> Dict[str, Optional[str]]:
 def _try_fast_lookup(address: str) -> Optional[dict]:
     """
     Try HTTP fetch (no browser). Return parsed dict or None to indicate fallback.
-    Optimized with shorter timeout and connection reuse.
+    Optimized with shorter timeout; the page is parsed as it streams in and
+    reading stops once the result sections are complete.
     """
     try:
         # Use session for connection pooling (faster)
@@ -103,16 +108,18 @@ def _try_fast_lookup(address: str) -> Optional[dict]:
             headers=HEADERS,
             timeout=10,  # Reduced from 20 to 10 seconds
             allow_redirects=True,
+            stream=True,
         )
         if r.status_code != 200:
+            r.close()
             return None
 
-        html = r.text
-        # Only parse if expected structure is present
-        if "halfcontentpadded" not in html.lower():
+        page = read_response(r)
+        # Only trust pages with the expected structure
+        if not page.has_sections:
             return None
 
-        parsed = _parse_address_page(html)
+        parsed = page.parsed
         if parsed.get("township") or parsed.get("school_district"):
             return parsed
         return None
@@ -154,10 +161,6 @@ def _create_edge_driver(headless: bool = True) -> Tuple[webdriver.Edge, str]:
     opts.add_experimental_option("prefs", prefs)
     opts.add_argument("--blink-settings=imagesEnabled=false")
 
-    # unique profile dir so you don’t get "user data dir already in use"
-    tmp_ud = tempfile.mkdtemp(prefix="edgedata_")
-    opts.add_argument(f"--user-data-dir={tmp_ud}")
-
     driver_path = _driver_path_local()
     if not os.path.exists(driver_path):
         raise FileNotFoundError(
@@ -165,8 +168,17 @@ def _create_edge_driver(headless: bool = True) -> Tuple[webdriver.Edge, str]:
             "Put msedgedriver.exe in the same folder as selenium_scraper.py"
         )
 
+    # unique profile dir so you don’t get "user data dir already in use"
+    tmp_ud = new_profile_dir("edgedata_")
+    opts.add_argument(f"--user-data-dir={tmp_ud}")
+
     service = EdgeService(executable_path=driver_path)
-    driver = webdriver.Edge(service=service, options=opts)
+    try:
+        driver = webdriver.Edge(service=service, options=opts)
+    except Exception:
+        remove_profile_dir(tmp_ud)
+        raise
+    TRACKER.incr("drivers_started")
     driver.set_page_load_timeout(20)  # Reduced from 40 to 20 seconds
     driver.set_window_size(1200, 900)
     
@@ -176,8 +188,8 @@ def _create_edge_driver(headless: bool = True) -> Tuple[webdriver.Edge, str]:
     return driver, tmp_ud
 
 
-# Cache for address lookups (in-memory, persists for session)
-_address_cache: Dict[str, dict] = {}
+# Cache for address lookups (in-memory, stale-while-revalidate past its TTL)
+_address_cache = AddressCache()
 
 def get_township_school_from_address(address: str, headless: bool = True) -> dict:
     """
@@ -185,21 +197,42 @@ def get_township_school_from_address(address: str, headless: bool = True) -> dic
     Fast path first; fallback to Selenium if needed.
     Uses caching to avoid repeated lookups for the same address.
     """
-    # Normalize address for cache key
-    cache_key = address.strip().lower()
-    
-    # Check cache first
-    if cache_key in _address_cache:
-        return _address_cache[cache_key]
-
+    with span("lookup", address=address.strip()) as s:
+        # Normalize address for cache key
+        cache_key = address.strip().lower()
+
+        # Check cache first
+        report_stage("cache", "Checking recent lookups...")
+        cached, state, age = _address_cache.get(cache_key)
+        if state == FRESH:
+            s.set(cache="hit")
+            report_stage("cache", "Found in recent lookups")
+            return cached
+        if state == STALE:
+            # Answer now, refresh behind the user's back
+            started = _address_cache.revalidate(cache_key, lambda: _lookup(address, cache_key, headless))
+            s.set(cache="stale", age_s=round(age), refresh_started=started)
+            report_stage("cache", "Found in recent lookups (stale - refreshing in the background)")
+            return mark_stale(cached, age)
+
+        # Never seen, or past ADDRESS_CACHE_MAX_AGE: wait for a fresh scrape
+        result = _lookup(address, cache_key, headless)
+        s.set(cache=state, error=result.get("error"))
+        return result
+
+
+def _lookup(address: str, cache_key: str, headless: bool) -> dict:
     # ---- FAST PATH (no browser) ----
+    report_stage("http", "Trying HTTP (Fast)...")
     fast = _try_fast_lookup(address)
     if fast:
         # Cache successful fast lookup
-        _address_cache[cache_key] = fast
+        _address_cache.put(cache_key, fast)
         return fast
 
     # ---- SELENIUM FALLBACK ----
+    report_stage("selenium", "HTTP lookup found nothing - starting Edge...")
+    start_reaper()
     driver = None
     tmp_ud = None
 
@@ -236,7 +269,7 @@ def get_township_school_from_address(address: str, headless: bool = True) -> dic
         
         # Cache successful results
         if "error" not in parsed:
-            _address_cache[cache_key] = parsed
+            _address_cache.put(cache_key, parsed)
         
         return parsed
 
@@ -246,12 +279,6 @@ def get_township_school_from_address(address: str, headless: bool = True) -> dic
 
     finally:
         if driver:
-            try:
-                driver.quit()
-            except Exception:
-                pass
+            quit_driver(driver)
         if tmp_ud:
-            try:
-                shutil.rmtree(tmp_ud, ignore_errors=True)
-            except Exception:
-                pass
+            remove_profile_dir(tmp_ud)
@@ -0,0 +1,370 @@
+# spatial_resolver.py
+# Coordinates -> {township, county, school_district} from local boundary
+# files, for addresses that already carry lat/lon (CRM exports): no scrape.
+# The dict has the same keys and spelling as the scrapers' (e.g. "City of
+# Wyoming", "Kent County"), so find_top_matches takes it unchanged.
+#
+# Each boundary layer is indexed once in a uniform grid. Cells that no
+# polygon edge passes through are resolved while loading (the polygon that
+# contains them, or none), so most points are answered by one array lookup;
+# only points in cells an edge crosses are ray-cast, against the polygons
+# whose bounding box covers the cell. Batches are done with numpy throughout.
+#
+# BOUNDARY_PLACES    township/city/village polygons (GeoJSON; .shp needs pyshp)
+# BOUNDARY_SCHOOLS   school district polygons
+# BOUNDARY_GRID      grid cells per side of each index, default 512
+#
+# Usage: python spatial_resolver.py PLACES SCHOOLS LAT LON
+#        python spatial_resolver.py PLACES SCHOOLS --bench 100000
+
+import argparse
+import json
+import os
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Shapefile support (optional)
+try:
+    import shapefile
+    HAS_PYSHP = True
+except ImportError:
+    HAS_PYSHP = False
+
+BOUNDARY_PLACES = os.environ.get("BOUNDARY_PLACES", "")
+BOUNDARY_SCHOOLS = os.environ.get("BOUNDARY_SCHOOLS", "")
+BOUNDARY_GRID = int(os.environ.get("BOUNDARY_GRID", "512"))
+
+# Property names tried in order (state GIS and Census TIGER exports differ)
+NAME_FIELDS = ("NAME", "Name", "name", "LABEL", "NAMELSAD", "DISTRICT")
+TYPE_FIELDS = ("TYPE", "Type", "type", "LSAD_TRANS", "MCD_TYPE")
+COUNTY_FIELDS = ("COUNTY", "County", "county", "COUNTY_NAME", "CNTY_NAME")
+
+OUTSIDE, BOUNDARY = -1, -2
+
+# A feature: its rings as (n, 2) lon/lat arrays, and its properties
+Feature = Tuple[List[np.ndarray], dict]
+
+
+# ----------------- Boundary files -----------------
+def _geojson_rings(geometry: dict) -> List[np.ndarray]:
+    if not geometry:
+        return []
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        return []
+    return [np.asarray(ring, dtype=np.float64)[:, :2] for polygon in polygons for ring in polygon if len(ring) >= 3]
+
+
+def read_features(path: str) -> List[Feature]:
+    """
+    Polygon features of a GeoJSON FeatureCollection or a shapefile, in
+    lon/lat (no reprojection is done).
+    """
+    if path.lower().endswith(".shp"):
+        if not HAS_PYSHP:
+            raise ImportError("Reading shapefiles needs pyshp (pip install pyshp); or export to GeoJSON")
+        features = []
+        with shapefile.Reader(path) as reader:
+            for sr in reader.iterShapeRecords():
+                points = np.asarray(sr.shape.points, dtype=np.float64)
+                bounds = list(sr.shape.parts) + [len(points)]
+                rings = [points[a:b] for a, b in zip(bounds, bounds[1:]) if b - a >= 3]
+                features.append((rings, sr.record.as_dict()))
+        return features
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return [(_geojson_rings(feat.get("geometry")), feat.get("properties") or {}) for feat in data.get("features", [])]
+
+
+def _field(props: dict, names: Sequence[str]) -> str:
+    for name in names:
+        value = props.get(name)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def place_label(name: str, kind: str = "") -> str:
+    # Spelled the way hometownlocator lists it: "City of X", "X Charter Township"
+    low, kind = name.lower(), kind.lower()
+    if any(w in low for w in ("city", "village", "township")):
+        return name
+    if "charter" in kind:
+        return f"{name} Charter Township"
+    if "township" in kind:
+        return f"{name} Township"
+    if "village" in kind:
+        return f"Village of {name}"
+    if "city" in kind:
+        return f"City of {name}"
+    return name
+
+
+def county_label(name: str) -> str:
+    if not name or name.lower().endswith("county"):
+        return name
+    return f"{name} County"
+
+
+# ----------------- Grid index -----------------
+def _crossings(x1, y1, x2, y2, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    # Even-odd rule over every ring of the polygon, so holes and
+    # multi-part polygons need no special handling
+    inside = np.zeros(len(xs), dtype=bool)
+    step = max(1, 4_000_000 // max(len(x1), 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i in range(0, len(xs), step):
+            px, py = xs[i:i + step, None], ys[i:i + step, None]
+            spans = (y1 > py) != (y2 > py)
+            hit = spans & (px < (x2 - x1) * (py - y1) / (y2 - y1) + x1)
+            inside[i:i + step] = hit.sum(axis=1) % 2 == 1
+    return inside
+
+
+class Layer:
+    """
+    One boundary file's polygons in a uniform grid. owner[cell] is the
+    polygon containing the whole cell, OUTSIDE, or BOUNDARY when an edge
+    crosses it; candidates for BOUNDARY cells are in a CSR list.
+    """
+
+    def __init__(self, features: List[Feature], grid: int = BOUNDARY_GRID):
+        features = [(rings, props) for rings, props in features if rings]
+        self.properties = [props for _, props in features]
+        self.grid = grid
+
+        # All edges, contiguous per polygon
+        starts, ends, bboxes = [], [], []
+        x1, y1, x2, y2 = [], [], [], []
+        n = 0
+        for rings, _ in features:
+            starts.append(n)
+            for ring in rings:
+                nxt = np.roll(ring, -1, axis=0)
+                x1.append(ring[:, 0])
+                y1.append(ring[:, 1])
+                x2.append(nxt[:, 0])
+                y2.append(nxt[:, 1])
+                n += len(ring)
+            ends.append(n)
+            pts = np.concatenate(rings)
+            bboxes.append((pts[:, 0].min(), pts[:, 1].min(), pts[:, 0].max(), pts[:, 1].max()))
+        empty = np.empty(0)
+        self.x1, self.y1, self.x2, self.y2 = (np.concatenate(v) if v else empty for v in (x1, y1, x2, y2))
+        self.edge_start = np.asarray(starts, dtype=np.int64)
+        self.edge_end = np.asarray(ends, dtype=np.int64)
+        self.bbox = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+
+        if len(self.bbox):
+            self.minx, self.miny = self.bbox[:, 0].min(), self.bbox[:, 1].min()
+            width = max(self.bbox[:, 2].max() - self.minx, 1e-9)
+            height = max(self.bbox[:, 3].max() - self.miny, 1e-9)
+        else:
+            self.minx = self.miny = 0.0
+            width = height = 1.0
+        # Slightly oversized so the max edge falls inside the last cell
+        self.dx = width * (1 + 1e-9) / grid
+        self.dy = height * (1 + 1e-9) / grid
+        self._build_grid()
+
+    def __len__(self) -> int:
+        return len(self.properties)
+
+    def _cells_xy(self, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return np.floor((xs - self.minx) / self.dx).astype(np.int64), np.floor((ys - self.miny) / self.dy).astype(np.int64)
+
+    def _build_grid(self) -> None:
+        g = self.grid
+        # Candidate polygons per cell from bounding boxes (CSR, sorted by cell then polygon)
+        ix0, iy0 = self._cells_xy(self.bbox[:, 0], self.bbox[:, 1])
+        ix1, iy1 = self._cells_xy(self.bbox[:, 2], self.bbox[:, 3])
+        cells, polys = [], []
+        for p in range(len(self.bbox)):
+            cx, cy = np.meshgrid(np.arange(ix0[p], ix1[p] + 1), np.arange(iy0[p], iy1[p] + 1))
+            cells.append((cy * g + cx).ravel())
+            polys.append(np.full(cx.size, p, dtype=np.int64))
+        cells = np.concatenate(cells) if cells else np.empty(0, dtype=np.int64)
+        polys = np.concatenate(polys) if polys else np.empty(0, dtype=np.int64)
+        order = np.lexsort((polys, cells))
+        cells, self.cell_polys = cells[order], polys[order]
+        self.cell_ptr = np.zeros(g * g + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=g * g), out=self.cell_ptr[1:])
+
+        # Cells any edge's bounding box touches may be split between polygons
+        crossed = np.zeros(g * g, dtype=bool)
+        ex0, ey0 = self._cells_xy(np.minimum(self.x1, self.x2), np.minimum(self.y1, self.y2))
+        ex1, ey1 = self._cells_xy(np.maximum(self.x1, self.x2), np.maximum(self.y1, self.y2))
+        single = (ex0 == ex1) & (ey0 == ey1)
+        crossed[ey0[single] * g + ex0[single]] = True
+        for a, b, c, d in zip(ex0[~single], ey0[~single], ex1[~single], ey1[~single]):
+            crossed.reshape(g, g)[b:d + 1, a:c + 1] = True
+
+        # Every other cell lies wholly inside one polygon or none: test its centre
+        self.owner = np.full(g * g, OUTSIDE, dtype=np.int32)
+        self.owner[crossed] = BOUNDARY
+        open_cells = np.flatnonzero(~crossed & (np.diff(self.cell_ptr) > 0))
+        centres_x = self.minx + (open_cells % g + 0.5) * self.dx
+        centres_y = self.miny + (open_cells // g + 0.5) * self.dy
+        self.owner[open_cells] = self._resolve(open_cells, centres_x, centres_y)
+
+    def _contains(self, p: int, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        a, b = self.edge_start[p], self.edge_end[p]
+        return _crossings(self.x1[a:b], self.y1[a:b], self.x2[a:b], self.y2[a:b], xs, ys)
+
+    def _resolve(self, cells: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Ray-cast points against their cells' candidate polygons, one
+        vectorized pass per polygon. The lowest polygon index wins overlaps.
+        """
+        result = np.full(len(cells), OUTSIDE, dtype=np.int32)
+        counts = self.cell_ptr[cells + 1] - self.cell_ptr[cells]
+        if not counts.sum():
+            return result
+        point_idx = np.repeat(np.arange(len(cells)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cand = self.cell_polys[np.repeat(self.cell_ptr[cells], counts) + offsets]
+        order = np.argsort(cand, kind="stable")
+        point_idx, cand = point_idx[order], cand[order]
+        bounds = np.flatnonzero(np.diff(cand)) + 1
+        for idx, group in zip(np.split(point_idx, bounds), np.split(cand, bounds)):
+            idx = idx[result[idx] == OUTSIDE]
+            if len(idx):
+                hit = self._contains(int(group[0]), xs[idx], ys[idx])
+                result[idx[hit]] = group[0]
+        return result
+
+    def locate(self, x: float, y: float) -> int:
+        """
+        Polygon index containing (x, y), or -1. One array lookup unless the
+        point is in a cell an edge crosses.
+        """
+        ix, iy = int((x - self.minx) // self.dx), int((y - self.miny) // self.dy)
+        if not (0 <= ix < self.grid and 0 <= iy < self.grid):
+            return OUTSIDE
+        cell = iy * self.grid + ix
+        owner = int(self.owner[cell])
+        if owner != BOUNDARY:
+            return owner
+        pt_x, pt_y = np.array([x]), np.array([y])
+        for p in self.cell_polys[self.cell_ptr[cell]:self.cell_ptr[cell + 1]]:
+            if self._contains(int(p), pt_x, pt_y)[0]:
+                return int(p)
+        return OUTSIDE
+
+    def locate_many(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+        ix, iy = self._cells_xy(xs, ys)
+        valid = (ix >= 0) & (ix < self.grid) & (iy >= 0) & (iy < self.grid)
+        cells = np.where(valid, iy * self.grid + ix, 0)
+        result = np.where(valid, self.owner[cells], OUTSIDE).astype(np.int32)
+        todo = np.flatnonzero(result == BOUNDARY)
+        if len(todo):
+            result[todo] = self._resolve(cells[todo], xs[todo], ys[todo])
+        return result
+
+
+# ----------------- Resolver -----------------
+class SpatialResolver:
+    """
+    Place and school-district layers. resolve() returns the scrapers'
+    dict ("_method": "Local boundaries"), or {"error": ...} when the point
+    is outside every place so callers can fall back to a scrape.
+    """
+
+    def __init__(self, places: Layer, schools: Layer):
+        self.places = places
+        self.schools = schools
+        # Labels worked out once per polygon, so a query is index lookups
+        self._townships = [place_label(_field(p, NAME_FIELDS), _field(p, TYPE_FIELDS)) for p in places.properties]
+        self._counties = [county_label(_field(p, COUNTY_FIELDS)) for p in places.properties]
+        self._schools = [_field(p, NAME_FIELDS) for p in schools.properties]
+
+    @classmethod
+    def from_files(cls, places_path: str, schools_path: str, grid: int = BOUNDARY_GRID) -> "SpatialResolver":
+        return cls(Layer(read_features(places_path), grid), Layer(read_features(schools_path), grid))
+
+    def _result(self, place: int, school: int, lat: float, lon: float) -> dict:
+        if place < 0:
+            return {"error": f"No township/city boundary contains {lat:.6f}, {lon:.6f}"}
+        return {
+            "township": self._townships[place],
+            "county": self._counties[place],
+            "school_district": self._schools[school] if school >= 0 else None,
+            "_method": "Local boundaries",
+        }
+
+    def resolve(self, lat: float, lon: float) -> dict:
+        return self._result(self.places.locate(lon, lat), self.schools.locate(lon, lat), lat, lon)
+
+    def resolve_many(self, lats: Sequence[float], lons: Sequence[float]) -> List[dict]:
+        lats, lons = np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+        places = self.places.locate_many(lons, lats)
+        schools = self.schools.locate_many(lons, lats)
+        return [self._result(p, s, la, lo) for p, s, la, lo in zip(places.tolist(), schools.tolist(), lats, lons)]
+
+
+def parse_location(text: str) -> Optional[Tuple[float, float]]:
+    """
+    "42.8847, -85.7239" -> (lat, lon); None for blank text. ValueError for
+    anything else that is not a point in lat/lon range.
+    """
+    if not text or not text.strip():
+        return None
+    parts = text.replace(",", " ").split()
+    if len(parts) != 2:
+        raise ValueError(f"Expected 'lat, lon', got {text!r}")
+    lat, lon = float(parts[0]), float(parts[1])
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"Not a lat/lon: {text!r}")
+    return lat, lon
+
+
+_resolver: Optional[SpatialResolver] = None
+
+
+def get_resolver() -> Optional[SpatialResolver]:
+    """
+    Resolver over BOUNDARY_PLACES / BOUNDARY_SCHOOLS, loaded on first use;
+    None when they are not configured.
+    """
+    global _resolver
+    if _resolver is None and BOUNDARY_PLACES and BOUNDARY_SCHOOLS:
+        _resolver = SpatialResolver.from_files(BOUNDARY_PLACES, BOUNDARY_SCHOOLS)
+    return _resolver
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve coordinates against local boundary files")
+    parser.add_argument("places")
+    parser.add_argument("schools")
+    parser.add_argument("lat", type=float, nargs="?")
+    parser.add_argument("lon", type=float, nargs="?")
+    parser.add_argument("--grid", type=int, default=BOUNDARY_GRID)
+    parser.add_argument("--bench", type=int, default=0, help="time N random points inside the places extent")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    resolver = SpatialResolver.from_files(args.places, args.schools, args.grid)
+    print(f"Loaded {len(resolver.places)} places, {len(resolver.schools)} school districts in {time.perf_counter() - t0:.2f}s")
+
+    if args.lat is not None and args.lon is not None:
+        print(json.dumps(resolver.resolve(args.lat, args.lon), indent=2))
+    if args.bench:
+        rng = np.random.default_rng(0)
+        layer = resolver.places
+        lons = layer.minx + rng.random(args.bench) * layer.dx * layer.grid
+        lats = layer.miny + rng.random(args.bench) * layer.dy * layer.grid
+        t0 = time.perf_counter()
+        for la, lo in zip(lats[:10000], lons[:10000]):
+            resolver.resolve(la, lo)
+        single = (time.perf_counter() - t0) / min(args.bench, 10000)
+        t0 = time.perf_counter()
+        resolver.resolve_many(lats, lons)
+        batch = (time.perf_counter() - t0) / args.bench
+        print(f"resolve: {single * 1e6:.1f} us/point   resolve_many: {batch * 1e6:.2f} us/point")
@@ -0,0 +1,182 @@
+# stream_import.py
+# Load a (possibly huge, multi-sheet) millage workbook into SQLite without
+# holding it in memory: rows are streamed from openpyxl's read-only reader and
+# written in chunks with executemany inside a single transaction.
+#
+# Usage: python stream_import.py [excel_file] [db_file] [--county NAME | --sheet-county]
+
+import argparse
+import sqlite3
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from openpyxl import load_workbook
+
+from estimate_store import recompute_after_import
+from millage_store import (
+    DB_PATH,
+    NAME_COLUMNS,
+    REQUIRED_COLUMNS,
+    TABLE_COLUMNS,
+    TABLE_NAME,
+    create_millage_table,
+    quote_ident,
+    record_generation,
+)
+
+EXCEL_FILE = "All_Millage_Rates.xlsx"
+CHUNK_SIZE = 5000
+
+# Bulk-load settings. The journal and synchronous mode are left alone: the
+# database also holds the generation log, and the DROP/CREATE must roll back
+# cleanly if the process dies mid-import. Speed comes from the one transaction.
+BULK_PRAGMAS = [
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",  # 64 MB page cache
+]
+
+
+def _header_positions(header: Tuple) -> Dict[str, int]:
+    names = [str(h).strip() if h is not None else "" for h in header]
+    return {name: i for i, name in enumerate(names) if name}
+
+
+def validate_workbook(wb) -> Dict[str, List[Optional[int]]]:
+    """
+    Check every sheet's header row before anything is written.
+    Returns {sheet_name: [column index for each of TABLE_COLUMNS]}, with None
+    for a sheet that has no County column. Sheets with no header at all
+    (blank tabs) are skipped.
+    """
+    layout: Dict[str, List[Optional[int]]] = {}
+    problems = []
+    for ws in wb.worksheets:
+        header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
+        if not header or all(h is None for h in header):
+            continue
+        positions = _header_positions(header)
+        missing = [c for c in REQUIRED_COLUMNS if c not in positions]
+        if missing:
+            problems.append(f"{ws.title}: missing {missing}")
+            continue
+        layout[ws.title] = [positions.get(c) for c in TABLE_COLUMNS]
+
+    if problems:
+        raise ValueError("Workbook schema check failed - " + "; ".join(problems))
+    if not layout:
+        raise ValueError("Workbook has no sheet with the required columns")
+    return layout
+
+
+def _to_rate(value) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_millage_rows(
+    wb,
+    layout: Dict[str, List[Optional[int]]],
+    stats: dict,
+    county: str = "",
+    sheet_county: bool = False,
+) -> Iterator[Tuple]:
+    """
+    Yield (county, township, school, homestead, non_homestead) tuples sheet
+    by sheet. Rows of a sheet without a County column get the sheet name
+    (sheet_county) or `county`. Blank rows are ignored; rows with a missing
+    name or a non-numeric rate are counted in stats["skipped"] and left out.
+    """
+    n_names = len(NAME_COLUMNS)
+    for sheet_name, cols in layout.items():
+        ws = wb[sheet_name]
+        default_county = sheet_name.strip() if sheet_county else county
+        for row in ws.iter_rows(min_row=2, values_only=True):
+            if not row or all(v is None for v in row):
+                continue
+            values = [row[i] if i is not None and i < len(row) else None for i in cols]
+            row_county = str(values[0]).strip() if values[0] is not None else default_county
+            names = [str(v).strip() if v is not None else "" for v in values[1:1 + n_names]]
+            rates = [_to_rate(v) for v in values[1 + n_names:]]
+            if not all(names) or any(r is None for r in rates):
+                stats["skipped"] += 1
+                continue
+            yield tuple([row_county] + names + rates)
+
+
+def stream_excel_to_sqlite(
+    excel_file: str = EXCEL_FILE,
+    db_file: str = DB_PATH,
+    table: str = TABLE_NAME,
+    chunk_size: int = CHUNK_SIZE,
+    county: str = "",
+    sheet_county: bool = False,
+) -> dict:
+    """
+    Replace `table` with the rows of every sheet in `excel_file`.
+    The old table stays visible to readers until the single commit at the end.
+    """
+    wb = load_workbook(excel_file, read_only=True, data_only=True)
+    stats = {"rows": 0, "skipped": 0, "sheets": 0}
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    try:
+        layout = validate_workbook(wb)
+        stats["sheets"] = len(layout)
+
+        for pragma in BULK_PRAGMAS:
+            conn.execute(pragma)
+
+        placeholders = ", ".join("?" for _ in TABLE_COLUMNS)
+        insert_sql = f"INSERT INTO {quote_ident(table)} VALUES ({placeholders})"
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"DROP TABLE IF EXISTS {quote_ident(table)}")
+            create_millage_table(conn, table)
+
+            chunk: List[Tuple] = []
+            for row in iter_millage_rows(wb, layout, stats, county, sheet_county):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    conn.executemany(insert_sql, chunk)
+                    stats["rows"] += len(chunk)
+                    chunk = []
+            if chunk:
+                conn.executemany(insert_sql, chunk)
+                stats["rows"] += len(chunk)
+
+            stats["generation"] = record_generation(
+                conn, rows_written=stats["rows"], source=excel_file, full_reload=True
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+        wb.close()
+
+    return stats
+
+
+def main(excel_file: str = EXCEL_FILE, db_file: str = DB_PATH, county: str = "", sheet_county: bool = False) -> None:
+    stats = stream_excel_to_sqlite(excel_file, db_file, county=county, sheet_county=sheet_county)
+    print(
+        f"✅ Streamed {stats['rows']} rows from {stats['sheets']} sheet(s) of {excel_file} "
+        f"into {db_file} (skipped {stats['skipped']} invalid rows)"
+    )
+    recompute_after_import(db_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a millage workbook into SQLite")
+    parser.add_argument("excel_file", nargs="?", default=EXCEL_FILE)
+    parser.add_argument("db_file", nargs="?", default=DB_PATH)
+    parser.add_argument("--county", default="", help="County for sheets without a County column")
+    parser.add_argument(
+        "--sheet-county", action="store_true", help="Use each sheet's name as its county (one sheet per county)"
+    )
+    args = parser.parse_args()
+    main(args.excel_file, args.db_file, args.county, args.sheet_county)
@@ -0,0 +1,70 @@
+# tests/test_circuit_breaker.py
+# The breaker's CLOSED -> OPEN -> HALF_OPEN -> CLOSED cycle, on a fake clock.
+#
+# Usage: python -m unittest discover -s tests
+
+import unittest
+from unittest import mock
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, BreakerRegistry, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("circuit_breaker.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker("http", expected_latency=1.0, failure_threshold=3, cooldown=60.0)
+
+    def trip(self):
+        for _ in range(3):
+            self.breaker.record(False, 0.5, "boom")
+
+    def test_full_cycle(self):
+        b = self.breaker
+        b.record(False, 0.5, "boom")
+        b.record(False, 0.5, "boom")
+        self.assertEqual(b.state, CLOSED)
+        b.record(False, 0.5, "boom")
+        self.assertEqual(b.state, OPEN)
+        self.assertFalse(b.allow())
+
+        self.clock.now += 60.0
+        self.assertTrue(b.allow())
+        self.assertEqual(b.state, HALF_OPEN)
+        # Exactly one probe while it is out
+        self.assertFalse(b.allow())
+
+        b.record(True, 0.2)
+        self.assertEqual(b.state, CLOSED)
+        self.assertEqual(b.consecutive_failures, 0)
+        self.assertTrue(b.allow())
+
+    def test_failed_probe_reopens(self):
+        self.trip()
+        self.clock.now += 60.0
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record(False, 0.5, "still down")
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.status()["retry_in_s"], 60.0)
+        self.assertFalse(self.breaker.allow())
+
+    def test_open_breakers_sort_last(self):
+        slow = CircuitBreaker("selenium", expected_latency=10.0)
+        registry = BreakerRegistry([self.breaker, slow])
+        self.assertEqual([b.name for b in registry.ordered()], ["http", "selenium"])
+        self.trip()
+        self.assertEqual([b.name for b in registry.ordered()], ["selenium", "http"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# tests/test_estimate_store.py
+# EstimateStore.recompute after an import changes one jurisdiction's rate.
+#
+# Usage: python -m unittest discover -s tests
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from estimate_store import EstimateStore
+from estimator import estimate_for_jurisdiction
+from incremental_import import apply_increment
+from jurisdictions import tax_multiplier
+from test_incremental_import import RATES
+
+LOWELL = "Ada Township - Lowell (Kent)"
+FOREST_HILLS = "Ada Township - Forest Hills (Kent)"
+
+
+class RecomputeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "millage.db")
+        self.store = EstimateStore(self.db_path, os.path.join(self.tmp.name, "runtime.db"))
+        self.import_rates(RATES)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def import_rates(self, df):
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            apply_increment(conn, df)
+        finally:
+            conn.close()
+
+    def save(self, address, key, tax_type, price=200000.0):
+        self.store.jurisdictions.refresh(force=True)
+        jurisdiction = self.store.jurisdictions.get(key)
+        return self.store.save(estimate_for_jurisdiction(address, price, tax_type, "Kent", jurisdiction, 100))
+
+    def test_nothing_to_do_at_current_generation(self):
+        self.save("1 Main St", LOWELL, "Homestead")
+        report = self.store.recompute()
+        self.assertEqual((report["generation"], report["checked"], report["moved"]), (1, 0, 0))
+
+    def test_rate_change_moves_only_affected_estimates(self):
+        moved = self.save("1 Main St", LOWELL, "Homestead")
+        other_type = self.save("1 Main St", LOWELL, "Non-Homestead")
+        other_key = self.save("2 Oak Ave", FOREST_HILLS, "Homestead")
+        before = self.store.get(moved)["annual"]
+
+        new = RATES.copy()
+        new.loc[1, "Total Homestead Millage Rate"] = 35.0
+        self.import_rates(new)
+        report = self.store.recompute()
+
+        # Only the Lowell estimates are checked; the homestead one moved
+        self.assertEqual(report["generation"], 2)
+        self.assertEqual((report["checked"], report["moved"], report["unchanged"], report["key_missing"]), (2, 1, 1, 0))
+        self.assertEqual([m["id"] for m in report["moves"]], [moved])
+
+        row = self.store.get(moved)
+        self.assertAlmostEqual(row["annual"], 200000.0 * tax_multiplier(35.0))
+        self.assertAlmostEqual(row["monthly"], row["annual"] / 12.0)
+        self.assertEqual(row["millage_rate"], 35.0)
+        self.assertAlmostEqual(report["annual_delta"], round(row["annual"] - before, 2))
+        # Everything is at the new generation, moved or not
+        for estimate_id in (moved, other_type, other_key):
+            self.assertEqual(self.store.get(estimate_id)["generation"], 2)
+        self.assertEqual(self.store.recompute()["checked"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# tests/test_incremental_import.py
+# apply_increment on a brand-new database and on one that already has rates.
+#
+# Usage: python -m unittest discover -s tests
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+from incremental_import import apply_increment
+from millage_store import TABLE_NAME, changes_since, current_generation
+
+
+def sheet(rows):
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "County", "Township/City", "School District",
+            "Total Homestead Millage Rate", "Total Non-Homestead Millage Rate",
+        ],
+    )
+
+
+RATES = sheet([
+    ("Kent", "Ada Township", "Forest Hills", 31.6608, 49.6608),
+    ("Kent", "Ada Township", "Lowell", 32.5844, 50.4926),
+    ("Ionia", "City of Ionia", "Ionia", 40.1, 58.1),
+])
+
+
+class IncrementalImportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(os.path.join(self.tmp.name, "millage.db"), isolation_level=None)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def rows(self):
+        return self.conn.execute(f"SELECT * FROM {TABLE_NAME} ORDER BY 1, 2, 3").fetchall()
+
+    def test_first_import_into_empty_db(self):
+        summary = apply_increment(self.conn, RATES, source="first.xlsx")
+        self.assertEqual(summary, {"generation": 1, "keys_changed": 3, "rows_written": 3})
+        self.assertFalse(self.conn.in_transaction)
+        self.assertEqual(len(self.rows()), 3)
+        self.assertEqual(current_generation(self.conn), 1)
+        # The first generation is a full reload
+        self.assertIsNone(changes_since(self.conn, 0)[1])
+
+    def test_increment_rewrites_only_changed_keys(self):
+        apply_increment(self.conn, RATES)
+        new = RATES.copy()
+        new.loc[1, "Total Homestead Millage Rate"] = 33.0
+        summary = apply_increment(self.conn, new, source="second.xlsx")
+        self.assertEqual(summary, {"generation": 2, "keys_changed": 1, "rows_written": 1})
+
+        latest, keys, rows = changes_since(self.conn, 1)
+        self.assertEqual(latest, 2)
+        self.assertEqual(keys, [("Kent", "Ada Township", "Lowell")])
+        self.assertEqual(rows["Total Homestead Millage Rate"].tolist(), [33.0])
+        self.assertIn(("Kent", "Ada Township", "Lowell", 33.0, 50.4926), self.rows())
+
+    def test_unchanged_sheet_adds_no_generation(self):
+        apply_increment(self.conn, RATES)
+        summary = apply_increment(self.conn, RATES)
+        self.assertIsNone(summary["generation"])
+        self.assertEqual(current_generation(self.conn), 1)
+        self.assertFalse(self.conn.in_transaction)
+
+
+if __name__ == "__main__":
+    unittest.main()
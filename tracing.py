@@ -0,0 +1,172 @@
+# tracing.py
+# Request-scoped tracing: a correlation ID created when an estimate starts
+# (button click, load test request) is carried in a context variable through
+# the address lookup, each backend attempt, page parsing and matching. Spans
+# are written as JSON lines to a rotating local file.
+#
+# TRACE_FILE          where spans go ("" turns tracing off), default traces.jsonl
+# TRACE_SAMPLE_RATE   fraction of traces recorded (0-1), default 1.0
+# TRACE_MAX_BYTES     rotate the file past this size, default 5 MB (3 backups)
+#
+# Unsampled traces keep their ID (for display) but record nothing, so the
+# cost of a span there is one context variable lookup.
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Iterator, Optional
+
+TRACE_FILE = os.environ.get("TRACE_FILE", "traces.jsonl")
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_MAX_BYTES = int(os.environ.get("TRACE_MAX_BYTES", str(5 * 1024 * 1024)))
+TRACE_BACKUPS = 3
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attrs", "sampled", "_start", "_t0")
+
+    def __init__(self, trace_id: str, name: str, parent_id: Optional[str] = None, sampled: bool = True, **attrs):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(32):08x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.sampled = sampled
+        self._start = time.time()
+        self._t0 = time.perf_counter()
+
+    def set(self, **attrs) -> None:
+        if self.sampled:
+            self.attrs.update(attrs)
+
+    def _record(self, status: str, error: str = "") -> dict:
+        record = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self._start, 6),
+            "duration_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+            "status": status,
+        }
+        if error:
+            record["error"] = error[:500]
+        if self.attrs:
+            record["attrs"] = self.attrs
+        return record
+
+
+# Streamlit's st.stop() / st.rerun() unwind through spans as exceptions
+_CONTROL_FLOW = ("StopException", "RerunException")
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+_logger: Optional[logging.Logger] = None
+_logger_lock = threading.Lock()
+
+
+def _get_logger() -> logging.Logger:
+    global _logger
+    if _logger is not None:
+        return _logger
+    with _logger_lock:
+        if _logger is not None:
+            return _logger
+        logger = logging.getLogger("property_tax.trace")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        if not logger.handlers:
+            handler = RotatingFileHandler(TRACE_FILE, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUPS)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        _logger = logger
+    return _logger
+
+
+def _emit(record: dict) -> None:
+    try:
+        _get_logger().info(json.dumps(record, default=str))
+    except Exception:
+        pass  # tracing must never break an estimate
+
+
+def new_trace_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+def is_sampled(trace_id: str, rate: float = TRACE_SAMPLE_RATE) -> bool:
+    # Decided by the ID, so every span of a trace gets the same answer
+    if not TRACE_FILE or rate <= 0:
+        return False
+    return rate >= 1 or int(trace_id[:8], 16) / 0xFFFFFFFF < rate
+
+
+def current_trace_id() -> Optional[str]:
+    span_ = _current.get()
+    return span_.trace_id if span_ else None
+
+
+@contextmanager
+def trace(name: str, trace_id: Optional[str] = None, **attrs) -> Iterator[Span]:
+    """
+    Root span of a request. Nested inside another trace it is just a span.
+    """
+    if _current.get() is not None:
+        with span(name, **attrs) as s:
+            yield s
+        return
+    trace_id = trace_id or new_trace_id()
+    root = Span(trace_id, name, sampled=is_sampled(trace_id), **attrs)
+    with _activate(root) as s:
+        yield s
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Span]:
+    """
+    Child of the current span. Outside a trace, or in an unsampled one,
+    nothing is recorded.
+    """
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        yield parent or _UNTRACED
+        return
+    with _activate(Span(parent.trace_id, name, parent.span_id, **attrs)) as s:
+        yield s
+
+
+@contextmanager
+def _activate(span_: Span) -> Iterator[Span]:
+    token = _current.set(span_)
+    try:
+        yield span_
+    except BaseException as e:
+        if span_.sampled:
+            if e.__class__.__name__ in _CONTROL_FLOW:
+                _emit(span_._record("stopped"))
+            else:
+                _emit(span_._record("error", f"{e.__class__.__name__}: {e}"))
+        raise
+    else:
+        if span_.sampled:
+            _emit(span_._record("ok"))
+    finally:
+        _current.reset(token)
+
+
+def event(name: str, **attrs) -> None:
+    """
+    Zero-length record under the current span (replaces ad-hoc stderr prints).
+    """
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        return
+    _emit(Span(parent.trace_id, name, parent.span_id, **attrs)._record("event"))
+
+
+_UNTRACED = Span("", "untraced", sampled=False)